@@ -0,0 +1,7 @@
+"""
+Herramientas de medición de rendimiento para DATAR (tiempo de importación, carga).
+
+Se ejecutan como módulos desde el directorio `prototipo/`, por ejemplo:
+    python -m benchmarks.import_time
+    python -m benchmarks.load_test --users 10
+"""
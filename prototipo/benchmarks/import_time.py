@@ -0,0 +1,219 @@
+"""
+Benchmark de tiempo de importación y cold start del árbol de agentes.
+
+Mide, en un proceso limpio por cada repetición:
+- el tiempo de pared y la memoria residente máxima (RSS) de `import datar_integraciones`,
+  también hasta que terminan los hilos que la importación deja corriendo (el
+  índice del pre-enrutador, por ejemplo): el cold start no termina antes;
+- lo mismo para cada `sub_agents/Gente_*/agent.py` importado por separado;
+- el desglose por dependencia pesada (osmnx, geopandas, matplotlib, scipy, PIL, fitz)
+  a partir de la salida de `python -X importtime`.
+
+Los resultados se escriben en JSON para poder compararlos entre versiones.
+
+Uso:
+    cd prototipo
+    python -m benchmarks.import_time --repeat 5 --output import_time.json
+    python -m benchmarks.import_time --compare import_time_anterior.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PAQUETE = "datar_integraciones"
+RAIZ_PROYECTO = Path(__file__).resolve().parent.parent
+PAQUETE_DIR = RAIZ_PROYECTO / PAQUETE
+
+DEPENDENCIAS_PESADAS = ["osmnx", "geopandas", "matplotlib", "scipy", "PIL", "fitz"]
+
+# Código que corre en el proceso hijo: importa el módulo y reporta tiempo y RSS.
+# El RSS se lee después de esperar a los hilos no daemon (con límite, por si alguno no termina).
+_CODIGO_HIJO = """
+import json, resource, sys, threading, time
+factor = 1024 if sys.platform == "darwin" else 1
+rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // factor
+inicio = time.perf_counter()
+__import__({modulo!r})  # `__import__` (no importlib) para que -X importtime registre el módulo
+wall = time.perf_counter() - inicio
+for hilo in threading.enumerate():
+    if hilo is not threading.main_thread() and not hilo.daemon:
+        hilo.join(timeout=max(0.0, 60 - (time.perf_counter() - inicio)))
+wall_hilos = time.perf_counter() - inicio
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // factor
+print(json.dumps({{"wall_s": wall, "wall_hilos_s": wall_hilos, "max_rss_kb": rss, "rss_inicial_kb": rss_inicial}}))
+"""
+
+
+def modulos_objetivo() -> List[str]:
+    """Devuelve el paquete raíz y el módulo `agent` de cada sub-agente `Gente_*`."""
+    sub_agentes = sorted(
+        p.name for p in (PAQUETE_DIR / "sub_agents").glob("Gente_*")
+        if (p / "agent.py").exists()
+    )
+    return [PAQUETE] + [f"{PAQUETE}.sub_agents.{nombre}.agent" for nombre in sub_agentes]
+
+
+def parsear_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Convierte la salida de `-X importtime` en {módulo: (microsegundos acumulados, nivel)}.
+
+    Cada módulo aparece una sola vez (la primera vez que se importa), así que el
+    acumulado de un paquete incluye todos los submódulos que importa. El nivel es
+    la profundidad de anidamiento (0 = importado directamente por el código medido).
+    """
+    acumulados: Dict[str, Tuple[int, int]] = {}
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "imported package" in linea:
+            continue
+        # Formato: "import time:   <propio> | <acumulado> |   <módulo>" (2 espacios por nivel)
+        columnas = linea.split(":", 1)[1].split("|")
+        if len(columnas) != 3:
+            continue
+        nombre = columnas[2].rstrip()
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        try:
+            acumulados[nombre.strip()] = (int(columnas[1]), nivel)
+        except ValueError:
+            continue
+    return acumulados
+
+
+def _importtime_total_us(modulo: str, importtime: Dict[str, Tuple[int, int]]) -> int:
+    """Suma el acumulado de `modulo` y de sus paquetes padre importados en la medición."""
+    partes = modulo.split(".")
+    prefijos = {".".join(partes[:i]) for i in range(1, len(partes) + 1)}
+    return sum(us for nombre, (us, nivel) in importtime.items() if nombre in prefijos and nivel == 0)
+
+
+def medir_una_vez(modulo: str) -> dict:
+    """Importa `modulo` en un proceso nuevo y devuelve sus métricas crudas."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(RAIZ_PROYECTO), env.get("PYTHONPATH")]))
+    # Los módulos de agentes exigen la clave al importarse; no se hace ninguna llamada.
+    env.setdefault("OPENROUTER_API_KEY", "benchmark-sin-llamadas")
+
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CODIGO_HIJO.format(modulo=modulo)],
+        cwd=RAIZ_PROYECTO,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proceso.returncode != 0:
+        errores = [l for l in proceso.stderr.splitlines() if not l.startswith("import time:")]
+        return {"error": "\n".join(errores[-5:])}
+
+    datos = json.loads(proceso.stdout.strip().splitlines()[-1])
+    datos["importtime_us"] = parsear_importtime(proceso.stderr)
+    return datos
+
+
+def medir_modulo(modulo: str, repeticiones: int) -> dict:
+    """Repite la medición de `modulo` y resume con medianas."""
+    corridas = [medir_una_vez(modulo) for _ in range(repeticiones)]
+    validas = [c for c in corridas if "error" not in c]
+    if not validas:
+        return {"error": corridas[-1]["error"]}
+
+    wall = [c["wall_s"] for c in validas]
+    wall_hilos = [c["wall_hilos_s"] for c in validas]
+    rss = [c["max_rss_kb"] - c["rss_inicial_kb"] for c in validas]
+
+    dependencias = {}
+    for dep in DEPENDENCIAS_PESADAS:
+        tiempos = [c["importtime_us"][dep][0] for c in validas if dep in c["importtime_us"]]
+        if tiempos:
+            dependencias[dep] = round(statistics.median(tiempos) / 1000, 2)
+
+    return {
+        "repeticiones": len(validas),
+        "wall_s": {
+            "mediana": round(statistics.median(wall), 4),
+            "min": round(min(wall), 4),
+            "max": round(max(wall), 4),
+        },
+        "wall_hilos_s": round(statistics.median(wall_hilos), 4),
+        "rss_mb": round(statistics.median(rss) / 1024, 1),
+        "importtime_total_ms": round(
+            statistics.median(_importtime_total_us(modulo, c["importtime_us"]) for c in validas) / 1000, 2
+        ),
+        "dependencias_ms": dependencias,
+    }
+
+
+def _commit_actual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ_PROYECTO, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(repeticiones: int, modulos: Optional[List[str]] = None) -> dict:
+    """Corre el benchmark completo y devuelve el documento JSON de resultados."""
+    resultados = {}
+    for modulo in modulos or modulos_objetivo():
+        print(f"Midiendo {modulo}...", file=sys.stderr)
+        resultados[modulo] = medir_modulo(modulo, repeticiones)
+
+    return {
+        "metadata": {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit_actual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticiones": repeticiones,
+        },
+        "resultados": resultados,
+    }
+
+
+def imprimir_resumen(documento: dict, anterior: Optional[dict] = None) -> None:
+    """Imprime una tabla legible; si hay resultados previos, agrega la diferencia."""
+    previos = (anterior or {}).get("resultados", {})
+    print(
+        f"{'módulo':<55} {'wall (s)':>10} {'Δ':>8} {'+hilos (s)':>10} {'RSS (MB)':>9} {'Δ':>7}  dependencias (ms)"
+    )
+    for modulo, r in documento["resultados"].items():
+        nombre = modulo.replace(f"{PAQUETE}.sub_agents.", "")
+        if "error" in r:
+            print(f"{nombre:<55} ERROR: {r['error'].splitlines()[-1] if r['error'] else ''}")
+            continue
+        wall = r["wall_s"]["mediana"]
+        previo = previos.get(modulo, {})
+        delta_wall = f"{wall - previo['wall_s']['mediana']:+.3f}" if "wall_s" in previo else ""
+        delta_rss = f"{r['rss_mb'] - previo['rss_mb']:+.1f}" if "rss_mb" in previo else ""
+        deps = ", ".join(f"{d}={ms:.0f}" for d, ms in r["dependencias_ms"].items())
+        print(
+            f"{nombre:<55} {wall:>10.3f} {delta_wall:>8} {r['wall_hilos_s']:>10.3f} "
+            f"{r['rss_mb']:>9.1f} {delta_rss:>7}  {deps}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Procesos limpios por módulo (mediana).")
+    parser.add_argument("--output", type=Path, default=Path("import_time.json"), help="Archivo JSON de salida.")
+    parser.add_argument("--compare", type=Path, help="JSON de una corrida anterior para comparar.")
+    parser.add_argument("--module", action="append", dest="modulos", help="Medir solo este módulo (repetible).")
+    args = parser.parse_args(argv)
+
+    documento = ejecutar(args.repeat, args.modulos)
+    args.output.write_text(json.dumps(documento, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    anterior = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    imprimir_resumen(documento, anterior)
+    print(f"\nResultados guardados en {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Prueba de carga de extremo a extremo con sesiones concurrentes.
+
+Lanza N personas simuladas contra `datar_integraciones.app` a través del runner de
+ADK (`InMemoryRunner`). Cada persona recorre un guion de conversación realista
+(Bosque etapas 1 a 4 hasta el mapa emocional, Pasto pidiendo un paisaje sonoro,
+el pipeline de 4 modelos de Gente_Interpretativa, el trazo de Gente_Intuitiva...).
+
+Reporta:
+- latencia por turno (p50, p95, p99) global y por escenario, y tiempo hasta el
+  primer texto visible de cada turno (con `--stream`, el primer token);
+- latencia de cada herramienta (entre el evento de llamada y el de respuesta);
+- memoria residente máxima (RSS) del proceso y errores;
+- las métricas de la cola de subidas y de la caché del LLM (`metrics_utils`).
+
+Funciona con el modelo falso (`--backend fake`, sin red) o con OpenRouter
+(`--backend openrouter`), para dimensionar la concurrencia y la memoria de
+Cloud Run con datos.
+
+Uso:
+    cd prototipo
+    python -m benchmarks.load_test --users 20 --iterations 3 --backend fake --latency-ms 800
+    python -m benchmarks.load_test --users 5 --mix bosque=2,pasto=1 --backend openrouter --output carga.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.import_time import RAIZ_PROYECTO, _commit_actual
+
+# Cada escenario es la lista de mensajes que la persona envía, en orden, en una sesión.
+ESCENARIOS: Dict[str, List[str]] = {
+    "bosque": [
+        "Hola, estoy caminando por el bosque de La Macarena.",
+        "Veo musgo en las piedras, siento humedad y frío. ¿Qué especies viven aquí?",
+        "Me interesan los hongos y los líquenes, ¿cómo se relacionan con los árboles?",
+        "Siento tranquilidad, curiosidad y algo de melancolía. ¿Puedes crear el mapa emocional?",
+    ],
+    "pasto": [
+        "Hola, quiero escuchar al pasto.",
+        "Crea un paisaje sonoro con pájaros y viento suave.",
+    ],
+    "interpretativa": [
+        "Interpreta estos emojis: 🌱🌊✨ siento calma después de la lluvia.",
+    ],
+    "intuitiva": [
+        "🌊🌿✨ hoy el río me habla despacio",
+        "crea imagen de ese trazo",
+    ],
+    "sonora": [
+        "Quiero escuchar un sonido del humedal La Conejera.",
+        "Haz un gráfico del humedal con agua y plantas.",
+    ],
+    "compostada": [
+        "Quiero aprender sobre el compost en el Parkway.",
+        "Me imagino hojas secas y cáscaras de fruta que vuelven a la tierra.",
+    ],
+    "montana": [
+        "Hola montaña",
+    ],
+}
+
+
+def percentiles(valores: List[float]) -> dict:
+    """Resume una lista de duraciones (segundos) con p50/p95/p99, media y máximo."""
+    if not valores:
+        return {"n": 0}
+    ordenados = sorted(valores)
+
+    def p(q: float) -> float:
+        # Rango más cercano: el valor que deja al menos q% de las muestras por debajo
+        indice = max(0, min(len(ordenados) - 1, int(round(q / 100 * len(ordenados) + 0.5)) - 1))
+        return ordenados[indice]
+
+    return {
+        "n": len(ordenados),
+        "p50": round(p(50), 4),
+        "p95": round(p(95), 4),
+        "p99": round(p(99), 4),
+        "media": round(statistics.fmean(ordenados), 4),
+        "max": round(ordenados[-1], 4),
+    }
+
+
+def _rss_pico_mb() -> float:
+    factor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / factor, 1)
+
+
+def parsear_mezcla(texto: Optional[str]) -> Dict[str, int]:
+    """Convierte "bosque=2,pasto=1" en pesos por escenario (todos con peso 1 si no se da)."""
+    if not texto:
+        return {nombre: 1 for nombre in ESCENARIOS}
+    pesos = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        nombre = nombre.strip()
+        if nombre not in ESCENARIOS:
+            raise SystemExit(f"Escenario desconocido: {nombre!r} (disponibles: {', '.join(ESCENARIOS)})")
+        pesos[nombre] = int(peso or 1)
+    return pesos
+
+
+class Resultados:
+    """Acumula las mediciones de todas las personas simuladas."""
+
+    def __init__(self):
+        self.turnos: List[float] = []
+        self.primer_texto: List[float] = []
+        self.turnos_por_escenario: Dict[str, List[float]] = defaultdict(list)
+        self.herramientas: Dict[str, List[float]] = defaultdict(list)
+        self.errores: List[dict] = []
+        self.sesiones_completas = 0
+
+
+async def _turno(
+    runner, user_id: str, session_id: str, mensaje: str, resultados: Resultados, errores_turno: List[dict],
+    run_config=None,
+) -> None:
+    from google.genai import types
+
+    inicio = time.perf_counter()
+    primer_texto = None
+    llamadas: Dict[str, tuple] = {}
+
+    contenido = types.Content(role="user", parts=[types.Part(text=mensaje)])
+    async for evento in runner.run_async(
+        user_id=user_id, session_id=session_id, new_message=contenido, run_config=run_config
+    ):
+        ahora = time.perf_counter()
+        if evento.error_code:
+            errores_turno.append({"tipo": evento.error_code, "detalle": evento.error_message, "autor": evento.author})
+        for part in (evento.content.parts if evento.content else None) or []:
+            if part.function_call is not None:
+                llamadas[part.function_call.id or part.function_call.name] = (part.function_call.name, ahora)
+            elif part.function_response is not None:
+                clave = part.function_response.id or part.function_response.name
+                if clave in llamadas:
+                    nombre, desde = llamadas.pop(clave)
+                    resultados.herramientas[nombre].append(ahora - desde)
+            elif part.text and primer_texto is None and not part.thought:
+                primer_texto = ahora - inicio
+
+    resultados.turnos.append(time.perf_counter() - inicio)
+    if primer_texto is not None:
+        resultados.primer_texto.append(primer_texto)
+
+
+async def _persona(
+    indice: int,
+    runner,
+    app_name: str,
+    escenarios: List[str],
+    timeout: float,
+    resultados: Resultados,
+    run_config=None,
+) -> None:
+    user_id = f"carga-{indice}"
+    for escenario in escenarios:
+        sesion = await runner.session_service.create_session(app_name=app_name, user_id=user_id)
+        errores_turno: List[dict] = []
+        try:
+            for mensaje in ESCENARIOS[escenario]:
+                inicio = time.perf_counter()
+                await asyncio.wait_for(
+                    _turno(runner, user_id, sesion.id, mensaje, resultados, errores_turno, run_config), timeout
+                )
+                resultados.turnos_por_escenario[escenario].append(time.perf_counter() - inicio)
+            resultados.sesiones_completas += 1
+        except asyncio.TimeoutError:
+            errores_turno.append({"tipo": "timeout", "detalle": f"> {timeout}s"})
+        except Exception as e:
+            # ADK emite un evento de error y luego relanza la excepción: se cuenta una sola vez
+            if not any(error["tipo"] == type(e).__name__ for error in errores_turno):
+                errores_turno.append({
+                    "tipo": type(e).__name__,
+                    "detalle": str(e)[:300],
+                    "traza": traceback.format_exc(limit=3),
+                })
+        resultados.errores.extend({**error, "escenario": escenario} for error in errores_turno)
+
+
+def _preparar_entorno(args: argparse.Namespace) -> None:
+    """Fija las variables de entorno antes de importar el paquete (se leen al importarlo)."""
+    os.environ["DATAR_LLM_BACKEND"] = args.backend
+    if args.backend == "fake":
+        os.environ.setdefault("OPENROUTER_API_KEY", "prueba-de-carga-sin-llamadas")
+        os.environ["DATAR_FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+        os.environ["DATAR_FAKE_LLM_JITTER_MS"] = str(args.jitter_ms)
+    if args.storage == "local":
+        os.environ["MEDIA_STORAGE_BACKEND"] = "local"
+        os.environ.setdefault("MEDIA_LOCAL_DIR", os.path.join(tempfile.gettempdir(), "datar_carga"))
+    # Los litellm/ADK más recientes intentan descargar metadatos al importar
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    if str(RAIZ_PROYECTO) not in sys.path:
+        sys.path.insert(0, str(RAIZ_PROYECTO))
+
+
+async def ejecutar(args: argparse.Namespace) -> dict:
+    """Corre la prueba de carga y devuelve el documento JSON de resultados."""
+    _preparar_entorno(args)
+
+    inicio_import = time.perf_counter()
+    from google.adk.runners import InMemoryRunner
+
+    from datar_integraciones import app
+    from datar_integraciones.agents_streaming import streaming_run_config
+    from datar_integraciones.metrics_utils import metrics_snapshot
+    import_s = time.perf_counter() - inicio_import
+    rss_inicial = _rss_pico_mb()
+
+    runner = InMemoryRunner(app=app)
+    run_config = streaming_run_config() if args.stream else None
+    pesos = parsear_mezcla(args.mix)
+    aleatorio = random.Random(args.seed)
+    nombres, valores = list(pesos), list(pesos.values())
+
+    resultados = Resultados()
+    tareas = []
+    inicio = time.perf_counter()
+    for i in range(args.users):
+        escenarios = aleatorio.choices(nombres, weights=valores, k=args.iterations)
+        tareas.append(asyncio.create_task(
+            _persona(i, runner, app.name, escenarios, args.timeout, resultados, run_config)
+        ))
+        if args.ramp_up > 0:
+            await asyncio.sleep(args.ramp_up / args.users)
+    await asyncio.gather(*tareas)
+    duracion = time.perf_counter() - inicio
+
+    metricas = metrics_snapshot()
+    return {
+        "metadata": {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit_actual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "backend": args.backend,
+            "storage": os.getenv("MEDIA_STORAGE_BACKEND", "gcs"),
+            "usuarios": args.users,
+            "iteraciones": args.iterations,
+            "mezcla": pesos,
+            "latencia_falsa_ms": args.latency_ms if args.backend == "fake" else None,
+            "streaming": args.stream,
+        },
+        "resultados": {
+            "duracion_s": round(duracion, 3),
+            "import_s": round(import_s, 3),
+            "turnos_por_segundo": round(len(resultados.turnos) / duracion, 3) if duracion else 0.0,
+            "sesiones_completas": resultados.sesiones_completas,
+            "latencia_turno_s": percentiles(resultados.turnos),
+            "primer_texto_s": percentiles(resultados.primer_texto),
+            "latencia_por_escenario_s": {
+                nombre: percentiles(valores) for nombre, valores in resultados.turnos_por_escenario.items()
+            },
+            "latencia_herramientas_s": {
+                nombre: percentiles(valores) for nombre, valores in sorted(resultados.herramientas.items())
+            },
+            "rss_inicial_mb": rss_inicial,
+            "rss_pico_mb": _rss_pico_mb(),
+            "errores": {
+                "total": len(resultados.errores),
+                "por_tipo": dict(sorted(
+                    ((tipo, sum(1 for e in resultados.errores if e["tipo"] == tipo))
+                     for tipo in {e["tipo"] for e in resultados.errores}),
+                )),
+                "ejemplos": resultados.errores[:5],
+            },
+            "metricas": metricas.get("gauges", {}),
+        },
+    }
+
+
+def imprimir_resumen(documento: dict) -> None:
+    """Imprime una tabla legible con latencias, herramientas, memoria y errores."""
+    r = documento["resultados"]
+    m = documento["metadata"]
+    print(f"\n{m['usuarios']} usuarios × {m['iteraciones']} sesiones, backend={m['backend']}, "
+          f"streaming={'sse' if m['streaming'] else 'no'}, storage={m['storage']}: {r['duracion_s']:.1f}s, {r['turnos_por_segundo']:.2f} turnos/s")
+
+    def fila(nombre: str, p: dict) -> str:
+        if not p.get("n"):
+            return f"{nombre:<40} {'-':>6}"
+        return f"{nombre:<40} {p['n']:>6} {p['p50']:>8.3f} {p['p95']:>8.3f} {p['p99']:>8.3f} {p['max']:>8.3f}"
+
+    print(f"\n{'latencia (s)':<40} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    print(fila("turno", r["latencia_turno_s"]))
+    print(fila("primer texto", r["primer_texto_s"]))
+    for nombre, p in r["latencia_por_escenario_s"].items():
+        print(fila(f"escenario {nombre}", p))
+    for nombre, p in r["latencia_herramientas_s"].items():
+        print(fila(f"tool {nombre}", p))
+
+    print(f"\nRSS: inicial {r['rss_inicial_mb']:.1f} MB, pico {r['rss_pico_mb']:.1f} MB "
+          f"(import {r['import_s']:.2f}s)")
+    errores = r["errores"]
+    print(f"Errores: {errores['total']} {errores['por_tipo'] or ''}")
+    for ejemplo in errores["ejemplos"][:3]:
+        print(f"  - {ejemplo['tipo']}: {ejemplo.get('detalle')}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10, help="Personas simuladas concurrentes.")
+    parser.add_argument("--iterations", type=int, default=1, help="Sesiones (escenarios) por persona.")
+    parser.add_argument("--mix", help="Pesos por escenario, por ejemplo 'bosque=2,pasto=1' (por defecto todos).")
+    parser.add_argument("--backend", choices=["fake", "openrouter"], default="fake", help="Modelo a usar.")
+    parser.add_argument("--storage", choices=["local", "gcs"], default="local", help="Backend de medios.")
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Latencia del modelo falso por llamada.")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="Variación aleatoria del modelo falso.")
+    parser.add_argument("--stream", action="store_true", help="Usar streaming SSE (respuestas token a token).")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Segundos para arrancar a todas las personas.")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Tiempo máximo por turno (s).")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla para elegir escenarios.")
+    parser.add_argument("--output", type=Path, default=Path("load_test.json"), help="Archivo JSON de salida.")
+    args = parser.parse_args(argv)
+
+    documento = asyncio.run(ejecutar(args))
+    args.output.write_text(json.dumps(documento, indent=2, ensure_ascii=False), encoding="utf-8")
+    imprimir_resumen(documento)
+    print(f"\nResultados guardados en {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,43 +23,52 @@ warnings.filterwarnings(
 
 from google.adk.agents.llm_agent import Agent
 from google.adk.apps import App
-from google.adk.models.lite_llm import LiteLlm
-from .agents_utils import get_openrouter_config
-from .sub_agents.Gente_Montaña.agent import root_agent as Gente_Montaña
-from .sub_agents.Gente_Pasto.agent import root_agent as Gente_Pasto
-from .sub_agents.Gente_Intuitiva.agent import root_agent as Gente_Intuitiva
-from .sub_agents.Gente_Interpretativa.agent import root_agent as Gente_Interpretativa
-from .sub_agents.Gente_Bosque.agent import root_agent as Gente_Bosque
-from .sub_agents.Gente_Sonora.agent import root_agent as Gente_Sonora
-from .sub_agents.Gente_Horaculo.agent import root_agent as Gente_Horaculo
-from .sub_agents.Gente_Compostada.agent import root_agent as Gente_Compostada
+from .agents_factory import build_sub_agents
+from .agents_lazy import LazyAgentPreloadPlugin
+from .agents_registry import AGENTS_REGISTRY
+from .agents_router import TfidfRouter
+from .agents_streaming import TimeToFirstTokenPlugin
+from .agents_utils import get_settings
+from .logging_utils import configure_logging
+from .metrics_utils import start_metrics_server
+from .models_metrics import ModelUsagePlugin
+from .models_utils import get_llm
 
-config = get_openrouter_config()
+# Logging JSON no bloqueante para todo el paquete (nivel en DATAR_LOG_LEVEL)
+configure_logging()
+
+# Pre-enrutador TF-IDF: si el mensaje coincide claramente con un sub-agente,
+# transfiere sin la llamada al LLM de Gente_Raiz (DATAR_ROUTER_MODE=shadow|active|off)
+router = TfidfRouter(get_settings().router_mode, AGENTS_REGISTRY["app"].get("router"))
 
 # Crear el agente raíz (variable interna)
+# Los sub-agentes salen de AGENTS_REGISTRY como LazyAgent: cada módulo
+# `sub_agents.*.agent` (y sus dependencias pesadas) se importa solo en la primera
+# transferencia.
 root_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent="Gente_Raiz"),
     name="Gente_Raiz",
     description="Agente raíz DATAR",
     instruction="Ayuda con la prueba de los sub-agentes disponibles en esta versión de DATAR.",
-    sub_agents=[
-        Gente_Montaña,
-        Gente_Pasto,
-        Gente_Intuitiva,
-        Gente_Interpretativa,
-        Gente_Bosque,
-        Gente_Sonora,
-        Gente_Horaculo,
-        Gente_Compostada,
-    ],
+    before_model_callback=router.before_model_callback,
+    after_model_callback=router.after_model_callback,
+    sub_agents=build_sub_agents(__package__),
 )
 
+# Candidatos del pre-enrutador: el índice se arma en segundo plano (en modo shadow,
+# con el primer mensaje, para no sumar scikit-learn al cold start)
+router.set_candidates(root_agent.sub_agents)
+
 # Crear el objeto App para Cloud Run y API Server
+# Con "streaming": true en /run_sse, la respuesta final llega token a token;
+# TimeToFirstTokenPlugin mide la latencia hasta el primer texto visible por agente y
+# ModelUsagePlugin las llamadas, tokens y costo por agente, modelo y nivel.
+# LazyAgentPreloadPlugin carga el sub-agente de una sesión retomada en un proceso nuevo.
 app = App(
     name="datar_integraciones",
     root_agent=root_agent,
+    plugins=[TimeToFirstTokenPlugin(), ModelUsagePlugin(), LazyAgentPreloadPlugin()],
 )
+
+# Exponer /metrics y /metrics.json si DATAR_METRICS_PORT está definida
+start_metrics_server()
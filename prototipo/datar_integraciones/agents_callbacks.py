@@ -0,0 +1,79 @@
+"""
+Callbacks reutilizables para agentes internos cuya salida solo va al estado.
+
+Algunos agentes (los intérpretes y el fusionador de Gente_Interpretativa) no le
+hablan a la persona: su respuesta se guarda en el estado para que la use el
+agente siguiente. Antes, sus callbacks reemplazaban esa respuesta por
+"Procesando...", y cada marcador quedaba en el historial de la sesión y se
+reenviaba como contexto en los turnos siguientes (tres mensajes más por turno).
+
+`guardar_respuesta_en_estado` crea un `after_model_callback` que guarda el texto
+en el estado y devuelve un contenido sin partes: el evento conserva el cambio de
+estado (`state_delta`), pero no tiene texto que mostrar, y ADK omite los
+eventos vacíos al armar el historial que recibe el modelo.
+"""
+import logging
+from typing import Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .agents_streaming import respuesta_parcial_oculta
+
+logger = logging.getLogger(__name__)
+
+AfterModelCallback = Callable[[CallbackContext, LlmResponse], Optional[LlmResponse]]
+
+
+def texto_de_respuesta(llm_response: LlmResponse) -> str:
+    """Une el texto visible (sin razonamiento interno) de una respuesta del modelo."""
+    if not (llm_response.content and llm_response.content.parts):
+        return ""
+    return "".join(p.text or "" for p in llm_response.content.parts if not p.thought)
+
+
+def respuesta_oculta(llm_response: Optional[LlmResponse] = None) -> LlmResponse:
+    """
+    Respuesta final sin partes: el evento lleva el cambio de estado pero no texto.
+
+    Args:
+        llm_response: Respuesta original, de la que se conserva el uso de tokens.
+
+    Returns:
+        LlmResponse con `Content(role="model", parts=[])`.
+    """
+    return LlmResponse(
+        content=types.Content(role="model", parts=[]),
+        usage_metadata=llm_response.usage_metadata if llm_response else None,
+    )
+
+
+def guardar_respuesta_en_estado(clave: str) -> AfterModelCallback:
+    """
+    Crea un `after_model_callback` que guarda la respuesta en `state[clave]` y la oculta.
+
+    Con streaming, los fragmentos parciales se descartan (no se guardan ni se
+    muestran); solo la respuesta completa llega al estado.
+
+    Args:
+        clave: Clave de estado donde se guarda el texto de la respuesta.
+
+    Returns:
+        Función para `after_model_callback` de un `Agent`.
+    """
+    def callback(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return respuesta_parcial_oculta()
+        # Respuestas de error o interrumpidas siguen su curso normal
+        if llm_response.error_code or not llm_response.content:
+            return None
+
+        texto = texto_de_respuesta(llm_response)
+        callback_context.state[clave] = texto
+        logger.debug("%s guardada: %d caracteres", clave, len(texto))
+        return respuesta_oculta(llm_response)
+
+    callback.__name__ = f"guardar_{clave}"
+    callback.__qualname__ = callback.__name__
+    return callback
@@ -0,0 +1,126 @@
+"""
+Construcción del árbol de agentes a partir de `AGENTS_REGISTRY`.
+
+El registro es la fuente de verdad de los sub-agentes de Gente_Raiz: cada
+entrada `"type": "agent"` declara su módulo, la descripción que ve el LLM para
+elegirlo (los módulos la leen con `agent_description`), sus herramientas y la clase de recurso de cada una (ver
+`agents_pools.py`).
+
+- `build_sub_agents()` crea los `LazyAgent` de `AGENTS_REGISTRY["app"]["sub_agents"]`:
+  nada se importa hasta la primera transferencia.
+- `build_tools(agente, [funciones])` crea los `FunctionTool` de un sub-agente:
+  comprueba que coincidan con los declarados, los instrumenta (`instrument_tool`)
+  y envía las síncronas al pool de su clase de recurso.
+"""
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from google.adk.tools import FunctionTool
+
+from .agents_lazy import LazyAgent
+from .agents_pools import DEFAULT_RESOURCE_CLASS, check_resource_class, get_pool, pooled_tool
+from .agents_registry import AGENTS_REGISTRY
+from .agents_utils import ConfigError
+from .metrics_utils import instrument_tool
+
+
+def agent_spec(name: str) -> Dict[str, Any]:
+    """
+    Entrada de un sub-agente en el registro.
+
+    Raises:
+        ConfigError: Si el agente no está registrado o le falta `module`.
+    """
+    spec = AGENTS_REGISTRY.get(name)
+    if not spec or spec.get("type") != "agent":
+        raise ConfigError(f"El agente {name!r} no está declarado en AGENTS_REGISTRY.")
+    if not spec.get("module"):
+        raise ConfigError(f"El agente {name!r} no declara `module` en AGENTS_REGISTRY.")
+    return spec
+
+
+def agent_description(name: str) -> str:
+    """
+    Descripción de un sub-agente en el registro.
+
+    Es la única fuente de la descripción: `LazyAgent` la muestra a Gente_Raiz antes
+    de importar el módulo, y el módulo la usa en su `root_agent`.
+
+    Raises:
+        ConfigError: Si el agente no está registrado.
+    """
+    return agent_spec(name).get("description") or name
+
+
+def tool_resource_class(agent: str, tool: str) -> str:
+    """
+    Clase de recurso de una herramienta: la suya en el registro o, si es None, la del agente.
+
+    Raises:
+        ConfigError: Si la herramienta no está declarada o la clase no existe.
+    """
+    spec = agent_spec(agent)
+    herramientas = spec.get("tools") or {}
+    if tool not in herramientas:
+        raise ConfigError(f"La herramienta {tool!r} no está declarada para {agent} en AGENTS_REGISTRY.")
+    return check_resource_class(herramientas[tool] or spec.get("resource_class") or DEFAULT_RESOURCE_CLASS)
+
+
+def build_sub_agents(package: Optional[str] = None) -> List[LazyAgent]:
+    """
+    Crea los proxies `LazyAgent` de los sub-agentes de la aplicación.
+
+    Args:
+        package: Paquete base para resolver los módulos relativos del registro.
+
+    Returns:
+        Lista de `LazyAgent` en el orden de `AGENTS_REGISTRY["app"]["sub_agents"]`.
+    """
+    return [
+        LazyAgent(
+            name=nombre,
+            description=agent_description(nombre),
+            module=agent_spec(nombre)["module"],
+            package=package or __package__,
+            nested_agents=list(agent_spec(nombre).get("nested_agents") or ()),
+        )
+        for nombre in AGENTS_REGISTRY["app"]["sub_agents"]
+    ]
+
+
+def build_tools(agent: str, funcs: Sequence[Callable]) -> List[FunctionTool]:
+    """
+    Crea los `FunctionTool` de un sub-agente según su entrada en el registro.
+
+    Args:
+        agent: Nombre del sub-agente en el registro.
+        funcs: Funciones de las herramientas, en el orden en que las verá el LLM.
+
+    Returns:
+        Lista de `FunctionTool` instrumentados; las herramientas síncronas cuya
+        clase de recurso tiene pool corren en ese pool.
+
+    Raises:
+        ConfigError: Si las funciones no coinciden con las herramientas
+            declaradas, o si una herramienta `async` se declara en una clase con
+            pool (el pool no puede sacar del event loop una corrutina).
+    """
+    declaradas = set((agent_spec(agent).get("tools") or {}).keys())
+    nombres = [func.__name__ for func in funcs]
+    if set(nombres) != declaradas:
+        raise ConfigError(
+            f"Las herramientas de {agent} no coinciden con AGENTS_REGISTRY: "
+            f"sin declarar {sorted(set(nombres) - declaradas)}, "
+            f"declaradas y ausentes {sorted(declaradas - set(nombres))}."
+        )
+
+    herramientas = []
+    for func in funcs:
+        clase = tool_resource_class(agent, func.__name__)
+        if asyncio.iscoroutinefunction(func) and get_pool(clase) is not None:
+            raise ConfigError(
+                f"{agent}.{func.__name__} es async y no puede correr en el pool {clase!r}: "
+                "decláralo como síncrono o con la clase 'light'."
+            )
+        herramientas.append(FunctionTool(pooled_tool(instrument_tool(func), clase)))
+    return herramientas
@@ -0,0 +1,159 @@
+"""
+Carga diferida (lazy) de los sub-agentes `Gente_*`.
+
+Cada sub-agente importa dependencias pesadas (osmnx, geopandas, matplotlib,
+scipy, PIL, BeautifulSoup...). Importarlos todos al arrancar hace que un cold
+start en Cloud Run pague por todas ellas aunque la persona solo converse con
+uno de los agentes.
+
+`LazyAgent` se declara en `sub_agents` del agente raíz solo con `name` y
+`description` (lo único que el LLM necesita para decidir `transfer_to_agent`).
+El módulo real se importa en la primera transferencia; a partir de ese momento
+el agente real reemplaza al proxy dentro del árbol, de modo que `find_agent`,
+las transferencias entre pares y los eventos de sesiones posteriores apuntan
+directamente al agente real.
+
+Sesiones que se retoman en un proceso nuevo (otra instancia de Cloud Run o un
+reinicio): el runner busca al autor del último evento para seguir con él. El
+proxy declara `disallow_transfer_to_parent=False`, como un `LlmAgent`, para que
+ADK lo acepte y el sub-agente se cargue al correr. Los agentes internos de un
+sub-agente (`nested_agents` en el registro) no existen hasta que se importa su
+módulo: `LazyAgentPreloadPlugin` carga el sub-agente dueño del último autor
+antes de correr el turno, así la transferencia que sigue no paga la importación.
+"""
+import asyncio
+import importlib
+import logging
+import threading
+from typing import AsyncGenerator, List, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+logger = logging.getLogger(__name__)
+
+# Un solo candado para todos los proxies: dos sub-agentes importados a la vez en
+# hilos distintos pueden cruzarse en dependencias compartidas (matplotlib.pyplot)
+# y uno de ellos recibe el módulo a medio inicializar.
+_IMPORT_LOCK = threading.RLock()
+
+
+class LazyAgent(BaseAgent):
+    """
+    Proxy de un sub-agente cuyo módulo se importa solo cuando se necesita.
+
+    El módulo indicado debe exponer una variable `root_agent` cuyo nombre
+    coincida con el `name` del proxy (las transferencias se resuelven por nombre).
+    """
+
+    module: str
+    """Módulo que define `root_agent`; si empieza con '.', es relativo a `package`."""
+
+    package: Optional[str] = None
+    """Paquete base para resolver `module` cuando es relativo."""
+
+    nested_agents: List[str] = []
+    """Nombres de los agentes internos del sub-agente (autores de eventos de la sesión)."""
+
+    disallow_transfer_to_parent: bool = False
+    """Como en `LlmAgent`: sin este campo, ADK no retoma una sesión con el proxy."""
+
+    _agent: Optional[BaseAgent] = PrivateAttr(default=None)
+
+    @property
+    def loaded(self) -> bool:
+        """Indica si el módulo del sub-agente ya fue importado."""
+        return self._agent is not None
+
+    def load(self) -> BaseAgent:
+        """
+        Importa el módulo del sub-agente (una sola vez) y lo conecta al árbol.
+
+        Returns:
+            El agente real definido en el módulo.
+
+        Raises:
+            ValueError: Si el `root_agent` del módulo no tiene el mismo nombre que el proxy.
+        """
+        if self._agent is None:
+            with _IMPORT_LOCK:
+                if self._agent is None:
+                    modulo = importlib.import_module(self.module, self.package)
+                    agente = modulo.root_agent
+                    if agente.name != self.name:
+                        raise ValueError(
+                            f"El módulo {self.module} define '{agente.name}', "
+                            f"pero el proxy se declaró como '{self.name}'."
+                        )
+                    self._reemplazar_en_arbol(agente)
+                    self._agent = agente
+        return self._agent
+
+    def _reemplazar_en_arbol(self, agente: BaseAgent) -> None:
+        """Sustituye el proxy por el agente real dentro de `parent_agent.sub_agents`."""
+        padre = self.parent_agent
+        agente.parent_agent = padre
+        if padre is None:
+            return
+        for i, sub_agente in enumerate(padre.sub_agents):
+            # Comparación por identidad: `==` de pydantic compara campo a campo
+            if sub_agente is self:
+                padre.sub_agents[i] = agente
+                break
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        # La importación se hace en un hilo para no bloquear el event loop
+        # mientras otras sesiones siguen atendiéndose.
+        agente = self._agent or await asyncio.to_thread(self.load)
+        async for event in agente.run_async(ctx):
+            yield event
+
+    @override
+    async def _run_live_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        agente = self._agent or await asyncio.to_thread(self.load)
+        async for event in agente.run_live(ctx):
+            yield event
+
+    def owns(self, author: str) -> bool:
+        """Indica si `author` es el sub-agente o uno de sus agentes internos."""
+        return author == self.name or author in self.nested_agents
+
+
+class LazyAgentPreloadPlugin(BasePlugin):
+    """
+    Plugin de App que carga el sub-agente de una sesión retomada antes del turno.
+
+    Con el proxy sin cargar, un evento de un agente interno (por ejemplo
+    `compostada_fusionador`) es de un "agente desconocido" para ADK. El plugin
+    busca el último autor de la sesión y, si pertenece a un `LazyAgent` sin
+    cargar, importa su módulo en un hilo.
+    """
+
+    def __init__(self, name: str = "datar_lazy_preload"):
+        super().__init__(name=name)
+
+    async def before_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> Optional[types.Content]:
+        autor = next(
+            (evento.author for evento in reversed(invocation_context.session.events) if evento.author != "user"),
+            None,
+        )
+        if autor is None:
+            return None
+        for sub_agente in invocation_context.agent.root_agent.sub_agents:
+            if isinstance(sub_agente, LazyAgent) and not sub_agente.loaded and sub_agente.owns(autor):
+                logger.info("Sesión retomada con %s: se carga %s", autor, sub_agente.name)
+                await asyncio.to_thread(sub_agente.load)
+                break
+        return None
@@ -0,0 +1,187 @@
+"""
+Etapa paralela con plazo máximo por rama.
+
+`ParallelAgent` de ADK espera a que terminen todas sus ramas, así que la etapa
+siguiente (por ejemplo el fusionador de Gente_Interpretativa) arranca con la
+latencia de la rama más lenta. `DeadlineParallelAgent` da a cada rama un plazo
+contado desde el inicio de la etapa: la rama que no termina a tiempo se cancela
+(se cierra su generador y, con él, la llamada al modelo en curso) y la
+ejecución continúa con lo que las demás ya dejaron en el estado. Las claves de
+estado de la rama cancelada (`branch_output_keys`) se vacían para que la etapa
+siguiente no lea el resultado de un turno anterior.
+
+Cada rama omitida se registra en `datar_parallel_branch_skipped_total` y la
+duración de todas en `datar_parallel_branch_seconds` (ver `metrics_utils`).
+"""
+import asyncio
+import contextlib
+import logging
+import time
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent, ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from typing_extensions import override
+
+from .metrics_utils import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_BRANCH_SKIPPED = REGISTRY.counter(
+    "datar_parallel_branch_skipped_total",
+    "Ramas de una etapa paralela canceladas por superar su plazo.",
+)
+PARALLEL_BRANCH_DURATION = REGISTRY.histogram(
+    "datar_parallel_branch_seconds",
+    "Duración de cada rama de una etapa paralela por resultado (ok, error, skipped).",
+)
+
+# Marca que una rama deja en la cola al terminar (con la excepción, si la hubo)
+_FIN = object()
+
+
+def _contexto_de_rama(
+    agente: BaseAgent, sub_agente: BaseAgent, ctx: InvocationContext
+) -> InvocationContext:
+    """
+    Copia del contexto con la rama propia del sub-agente ("padre.agente.sub_agente").
+
+    Misma convención que `ParallelAgent` de ADK, copiada aquí porque ADK la
+    implementa en una función privada que puede cambiar entre versiones.
+    """
+    ctx = ctx.model_copy()
+    sufijo = f"{agente.name}.{sub_agente.name}"
+    ctx.branch = f"{ctx.branch}.{sufijo}" if ctx.branch else sufijo
+    return ctx
+
+
+class DeadlineParallelAgent(ParallelAgent):
+    """
+    `ParallelAgent` que no espera más allá del plazo de cada rama.
+
+    Los eventos de las ramas se entregan en el orden en que llegan, igual que en
+    `ParallelAgent`; cada rama espera a que su evento anterior se procese antes de
+    generar el siguiente, para que vea el estado actualizado.
+    """
+
+    deadline_seconds: Optional[float] = None
+    """Plazo por defecto de cada rama, en segundos desde el inicio de la etapa (None: sin plazo)."""
+
+    branch_deadlines: Dict[str, float] = {}
+    """Plazos por nombre de sub-agente que reemplazan a `deadline_seconds`."""
+
+    branch_output_keys: Dict[str, str] = {}
+    """Clave de estado que escribe cada rama; se vacía ("") si la rama se cancela."""
+
+    def _plazo(self, nombre: str) -> Optional[float]:
+        return self.branch_deadlines.get(nombre, self.deadline_seconds)
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+
+        inicio = time.monotonic()
+        cola: "asyncio.Queue[Tuple[int, object, object]]" = asyncio.Queue()
+
+        async def correr_rama(indice: int, eventos: AsyncGenerator[Event, None]) -> None:
+            error: Optional[BaseException] = None
+            try:
+                async with contextlib.aclosing(eventos):
+                    async for evento in eventos:
+                        procesado = asyncio.Event()
+                        await cola.put((indice, evento, procesado))
+                        await procesado.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+            finally:
+                cola.put_nowait((indice, _FIN, error))
+
+        ramas = self.sub_agents
+        tareas: List[asyncio.Task] = [
+            asyncio.create_task(correr_rama(i, rama.run_async(
+                _contexto_de_rama(self, rama, ctx)
+            )))
+            for i, rama in enumerate(ramas)
+        ]
+        limites = [
+            inicio + plazo if (plazo := self._plazo(rama.name)) is not None else None
+            for rama in ramas
+        ]
+        pendientes = set(range(len(ramas)))
+        nombres = {rama.name for rama in ramas}
+
+        try:
+            while pendientes:
+                activos = [limites[i] for i in pendientes if limites[i] is not None]
+                espera = max(0.0, min(activos) - time.monotonic()) if activos else None
+                try:
+                    indice, evento, extra = await asyncio.wait_for(cola.get(), espera)
+                except asyncio.TimeoutError:
+                    canceladas = self._cancelar_vencidas(tareas, limites, pendientes, inicio)
+                    delta = {
+                        self.branch_output_keys[nombre]: ""
+                        for nombre in canceladas if nombre in self.branch_output_keys
+                    }
+                    if delta:
+                        yield Event(
+                            invocation_id=ctx.invocation_id,
+                            author=self.name,
+                            branch=ctx.branch,
+                            actions=EventActions(state_delta=delta),
+                        )
+                    continue
+
+                if evento is _FIN:
+                    if indice not in pendientes:
+                        continue  # rama ya cancelada por plazo
+                    pendientes.discard(indice)
+                    resultado = "error" if extra is not None else "ok"
+                    PARALLEL_BRANCH_DURATION.observe(
+                        time.monotonic() - inicio, agent=self.name, branch=ramas[indice].name, outcome=resultado
+                    )
+                    if extra is not None:
+                        raise extra
+                    continue
+
+                if indice not in pendientes:
+                    extra.set()
+                    continue
+                yield evento
+                extra.set()
+                # Un sub-agente directo que escala termina la etapa, como en ParallelAgent
+                if evento.actions.escalate and evento.author in nombres:
+                    break
+        finally:
+            for tarea in tareas:
+                if not tarea.done():
+                    tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+
+    def _cancelar_vencidas(
+        self, tareas: List[asyncio.Task], limites: List[Optional[float]], pendientes: set, inicio: float
+    ) -> List[str]:
+        """Cancela las ramas cuyo plazo ya pasó y devuelve sus nombres."""
+        canceladas = []
+        ahora = time.monotonic()
+        for i in sorted(pendientes):
+            if limites[i] is None or limites[i] > ahora:
+                continue
+            pendientes.discard(i)
+            tareas[i].cancel()
+            rama = self.sub_agents[i].name
+            canceladas.append(rama)
+            PARALLEL_BRANCH_SKIPPED.inc(agent=self.name, branch=rama)
+            PARALLEL_BRANCH_DURATION.observe(ahora - inicio, agent=self.name, branch=rama, outcome="skipped")
+            logger.warning(
+                "Rama %s de %s cancelada tras %.1fs (plazo %.1fs); se continúa sin su resultado",
+                rama, self.name, ahora - inicio, limites[i] - inicio,
+                extra={"agent": self.name, "branch": rama},
+            )
+        return canceladas
@@ -0,0 +1,171 @@
+"""
+Pools de ejecución de herramientas por clase de recurso.
+
+ADK ejecuta las herramientas síncronas dentro del event loop: mientras
+`crear_mapa_emocional` renderiza un mapa o `generar_paisaje_sonoro` mezcla audio,
+ninguna otra sesión del proceso avanza, ni siquiera las conversaciones que solo
+esperan al LLM. Cada herramienta declara en el registro una clase de recurso
+(ver `agents_factory.build_tools`), y la clase decide dónde corre:
+
+- `light`: en el event loop, como antes (herramientas de milisegundos).
+- `cpu-render`: pool de un solo hilo. Los renders (matplotlib, numpy, PIL) se
+  encolan entre sí en lugar de competir por la CPU y el GIL con todo el proceso,
+  y matplotlib no es seguro para hilos.
+- `network-io`: pool de varios hilos para descargas y lecturas de páginas.
+
+El tamaño de cada pool sale de `AGENTS_REGISTRY["app"]["resource_classes"]`
+(`max_workers`; 0 significa en el event loop). Se publican
+`datar_tool_pool_wait_seconds{resource_class}` (espera en la cola del pool) y,
+como gauges, las tareas en curso y en espera de cada pool.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .agents_registry import AGENTS_REGISTRY
+from .agents_utils import ConfigError
+from .metrics_utils import REGISTRY
+
+RESOURCE_CLASSES = ("light", "cpu-render", "network-io")
+DEFAULT_RESOURCE_CLASS = "light"
+
+TOOL_POOL_WAIT = REGISTRY.histogram(
+    "datar_tool_pool_wait_seconds",
+    "Espera de una herramienta en la cola del pool de su clase de recurso.",
+)
+
+
+class _Pool:
+    """`ThreadPoolExecutor` con conteo de tareas en curso y en espera."""
+
+    def __init__(self, resource_class: str, max_workers: int):
+        self.resource_class = resource_class
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"datar-{resource_class}"
+        )
+        self._lock = threading.Lock()
+        self.pendientes = 0
+        self.en_curso = 0
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        # Las métricas de herramientas (`tool_phase`, `record_output_bytes`) usan contextvars
+        contexto = contextvars.copy_context()
+        encolada = time.perf_counter()
+        with self._lock:
+            self.pendientes += 1
+
+        def tarea() -> Any:
+            TOOL_POOL_WAIT.observe(time.perf_counter() - encolada, resource_class=self.resource_class)
+            with self._lock:
+                self.pendientes -= 1
+                self.en_curso += 1
+            try:
+                return contexto.run(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.en_curso -= 1
+
+        return await loop.run_in_executor(self.executor, tarea)
+
+
+def check_resource_class(resource_class: str) -> str:
+    """
+    Valida una clase de recurso.
+
+    Raises:
+        ConfigError: Si la clase no está en `RESOURCE_CLASSES`.
+    """
+    if resource_class not in RESOURCE_CLASSES:
+        raise ConfigError(
+            f"Clase de recurso desconocida: {resource_class!r}. "
+            f"Valores válidos: {', '.join(RESOURCE_CLASSES)}."
+        )
+    return resource_class
+
+
+# Pools ya creados por clase (None: la clase corre en el event loop)
+_POOLS: Dict[str, Optional[_Pool]] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(resource_class: str) -> Optional[_Pool]:
+    """
+    Devuelve (y crea la primera vez) el pool de una clase de recurso.
+
+    Returns:
+        El pool, o None si la clase corre en el event loop (`max_workers` 0).
+
+    Raises:
+        ConfigError: Si la clase no está en `RESOURCE_CLASSES`.
+    """
+    with _POOLS_LOCK:
+        if resource_class not in _POOLS:
+            check_resource_class(resource_class)
+            config = AGENTS_REGISTRY["app"].get("resource_classes", {}).get(resource_class, {})
+            max_workers = int(config.get("max_workers", 0))
+            _POOLS[resource_class] = _Pool(resource_class, max_workers) if max_workers > 0 else None
+        return _POOLS[resource_class]
+
+
+async def run_in_pool(resource_class: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """
+    Ejecuta una función síncrona en el pool de su clase de recurso.
+
+    Args:
+        resource_class: "light", "cpu-render" o "network-io".
+        func: Función síncrona.
+        *args, **kwargs: Argumentos de `func`.
+
+    Returns:
+        El resultado de `func`.
+    """
+    pool = get_pool(resource_class)
+    if pool is None:
+        return func(*args, **kwargs)
+    return await pool.run(func, *args, **kwargs)
+
+
+def pooled_tool(func: Callable, resource_class: str) -> Callable:
+    """
+    Envuelve una herramienta síncrona para que corra en el pool de su clase.
+
+    La envoltura es `async` y conserva nombre, docstring y firma
+    (`functools.wraps`), así que la declaración que ve el LLM y la inyección de
+    `tool_context` no cambian. Las herramientas `async` y las de clases que corren
+    en el event loop se devuelven sin cambios.
+
+    Args:
+        func: Función que se entregará a `FunctionTool(...)`.
+        resource_class: Clase de recurso de la herramienta.
+
+    Returns:
+        La función envuelta, o `func` si no necesita pool.
+    """
+    if asyncio.iscoroutinefunction(func) or get_pool(resource_class) is None:
+        return func
+
+    @functools.wraps(func)
+    async def envoltura(*args, **kwargs):
+        return await run_in_pool(resource_class, func, *args, **kwargs)
+
+    return envoltura
+
+
+def _metricas_pools() -> Dict[str, float]:
+    # Solo los pools ya creados: exportar métricas no debe crear hilos
+    with _POOLS_LOCK:
+        pools = [pool for pool in _POOLS.values() if pool is not None]
+    metricas: Dict[str, float] = {}
+    for pool in pools:
+        nombre = pool.resource_class.replace("-", "_")
+        metricas[f"datar_tool_pool_{nombre}_pending"] = pool.pendientes
+        metricas[f"datar_tool_pool_{nombre}_running"] = pool.en_curso
+    return metricas
+
+
+REGISTRY.register_collector(_metricas_pools)
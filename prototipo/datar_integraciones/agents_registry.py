@@ -4,18 +4,207 @@ AGENTS_REGISTRY = {
         "description": "Aplicación DATAR - Orquestador de sub-agentes usando App class de Google ADK",
         "type": "app",
         "model": "openrouter/minimax/minimax-m2",
+        # Pools de herramientas por clase de recurso (ver agents_pools.py); 0 = en el event loop
+        "resource_classes": {
+            "light": {"max_workers": 0},
+            "cpu-render": {"max_workers": 1},
+            "network-io": {"max_workers": 8},
+        },
+        # Sub-agentes de Gente_Raiz, en orden; cada uno tiene su entrada "agent" más abajo
         "sub_agents": [
             "Gente_Montaña",
             "Gente_Pasto",
             "Gente_Intuitiva",
-            "Gente_Interpretativa",
+            "GenteInterpretativa",
             "Gente_Bosque",
             "Gente_Sonora",
             "Gente_Horaculo",
             "Gente_Compostada",
         ],
+        # Niveles de modelo (ver models_utils.agent_model_spec). "strong" es el modelo
+        # narrativo; "fast" es uno barato y rápido para ayudantes cuya salida no ve la
+        # persona o es corta. DATAR_MODEL_TIER fuerza un nivel para todos.
+        "model_tiers": {
+            "strong": {"model": "openrouter/minimax/minimax-m2", "timeout_seconds": 90},
+            "fast": {"model": "openrouter/google/gemini-2.5-flash-lite", "timeout_seconds": 30},
+        },
+        # Especificación de modelo por agente (nombre del `Agent`): nivel y, opcionalmente,
+        # model, max_output_tokens, temperature y timeout_seconds. Sin entrada: "strong".
+        # minimax-m2 razona antes de responder y esos tokens cuentan en max_output_tokens,
+        # por eso los agentes "strong" tienen límites holgados.
+        "agents": {
+            "Gente_Raiz": {"tier": "fast", "max_output_tokens": 256, "timeout_seconds": 20},
+            "Gente_Montaña": {"tier": "fast", "max_output_tokens": 512},
+            "GenteInterpreteDeEmojis": {"tier": "fast", "max_output_tokens": 128, "temperature": 1.8},
+            "GenteInterpreteDeTexto": {"tier": "fast", "max_output_tokens": 768, "temperature": 1.6},
+            "GenteFusionador": {"tier": "fast", "max_output_tokens": 1024},
+            "GenteReInterpretativa": {"tier": "strong", "max_output_tokens": 4096},
+            "GenteInterpretativa": {"tier": "strong", "max_output_tokens": 4096, "temperature": 1.2},
+            "compostador": {"tier": "fast", "max_output_tokens": 1024},
+            "gentes_del_bosque": {"tier": "fast", "max_output_tokens": 1024},
+            "compostada_fusionador": {"tier": "strong", "max_output_tokens": 4096},
+            "Gente_Horaculo": {"tier": "strong", "max_output_tokens": 4096},
+        },
+        # Caché exacta de respuestas del LLM (ver models_cache.py), opcional por agente.
+        # Solo para agentes cuyos primeros turnos se repiten; la clave incluye todo el historial.
+        "llm_cache": {
+            "Gente_Montaña": {"ttl_seconds": 86400, "max_entries": 64},
+            "Gente_Bosque": {"ttl_seconds": 3600, "max_entries": 256},
+            "compostador": {"ttl_seconds": 3600, "max_entries": 128},
+            "gentes_del_bosque": {"ttl_seconds": 3600, "max_entries": 128},
+            "compostada_fusionador": {"ttl_seconds": 3600, "max_entries": 128},
+        },
+        # Pre-enrutador TF-IDF de Gente_Raiz (ver agents_router.py; modo en DATAR_ROUTER_MODE).
+        # Transfiere sin LLM si el mejor puntaje supera `min_score` y le saca `min_margin` al segundo.
+        "router": {
+            "min_score": 0.3,
+            "min_margin": 0.1,
+            "examples": {
+                "Gente_Montaña": [
+                    "hola",
+                    "buenos días, ¿quién eres?",
+                    "quiero saludar a la montaña",
+                ],
+                "Gente_Pasto": [
+                    "quiero escuchar al pasto",
+                    "crea un paisaje sonoro con pájaros, insectos y viento",
+                    "mezcla sonidos del pasto de la ciudad",
+                ],
+                "Gente_Intuitiva": [
+                    "🌊🌿✨ hoy el río me habla despacio",
+                    "crea una imagen de mi río emocional",
+                    "visualiza el trazo de lo que siento",
+                ],
+                "GenteInterpretativa": [
+                    "interpreta estos emojis",
+                    "¿qué significa lo que siento en este lugar?",
+                    "ayúdame a interpretar mi entorno con emojis",
+                ],
+                "Gente_Bosque": [
+                    "estoy caminando por el bosque de La Macarena",
+                    "¿qué especies viven en este bosque?",
+                    "crea mi mapa emocional del bosque",
+                    "huele a tierra mojada y veo musgo en los árboles",
+                ],
+                "Gente_Sonora": [
+                    "quiero escuchar un sonido del humedal La Conejera",
+                    "haz una composición sonora del agua",
+                    "convierte este sonido en código morse",
+                    "dibuja un gráfico del humedal",
+                ],
+                "Gente_Horaculo": [
+                    "oráculo, ¿qué me dice el territorio hoy?",
+                    "quiero consultar al oráculo ambiental",
+                    "dame una predicción sobre la naturaleza",
+                ],
+                "Gente_Compostada": [
+                    "quiero aprender sobre el compost",
+                    "¿qué hago con los residuos orgánicos?",
+                    "hojas secas en el Parkway",
+                    "cómo se descomponen las cáscaras de fruta",
+                ],
+            },
+        },
+    },
+    # Sub-agentes (ver agents_factory.py). `module` define `root_agent` con el mismo
+    # nombre y se importa en la primera transferencia; `description` es lo que ve
+    # Gente_Raiz para elegir y la única copia (los módulos la leen con
+    # `agents_factory.agent_description`). `tools` declara las herramientas del
+    # agente y su clase de recurso (None: la del agente), que decide en qué pool corren.
+    # `nested_agents` lista sus agentes internos, para retomar sesiones sin cargar
+    # antes el módulo (ver agents_lazy.LazyAgentPreloadPlugin).
+    "Gente_Montaña": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Montaña.agent",
+        "description": "Un agente que siempre saluda desde la Montaña.",
+        "resource_class": "light",
+        "tools": {},
+    },
+    "Gente_Pasto": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Pasto.agent",
+        "description": "Agente sonoro",
+        "resource_class": "cpu-render",
+        "tools": {
+            "generar_paisaje_sonoro": None,
+        },
+    },
+    "Gente_Intuitiva": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Intuitiva.agent",
+        "description": (
+            "Eres un asistente que ayuda a identificar patrones del trazo o signo del pensamiento "
+            "que se percibe en una interacción con el territorio"
+        ),
+        "resource_class": "light",
+        "tools": {
+            "guardar_interpretacion_emocional": None,
+            # async: escribe el estado en el event loop y envía el render a "cpu-render"
+            "crear_imagen_rio_emocional": "light",
+        },
+    },
+    "GenteInterpretativa": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Interpretativa.agent",
+        "description": "Coordina agentes paralelos, fusiona respuestas y reinterpreta.",
+        "resource_class": "light",
+        "tools": {},
+        # Modo "pipeline"; en modo "fast" el agente no tiene agentes internos
+        "nested_agents": [
+            "GenteParalelizador",
+            "GenteInterpreteDeEmojis",
+            "GenteInterpreteDeTexto",
+            "GenteFusionador",
+            "GenteReInterpretativa",
+        ],
+    },
+    "Gente_Bosque": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Bosque.agent",
+        "description": (
+            "Este agente está diseñado para despertar interés y curiosidad, basado en las sensaciones iniciales "
+            "que le produce un lugar. Su tono es descriptivo, informativo y curioso, con el objetivo de "
+            "abrir la percepción hacia la complejidad natural del bosque, puede sugerir preguntas filosóficas."
+        ),
+        "resource_class": "network-io",
+        "tools": {
+            "inferir_especies": "light",
+            "explorar_pdf": None,
+            "leer_pagina": None,
+            "explorar": None,
+            "crear_mapa_emocional": "cpu-render",
+        },
+    },
+    "Gente_Sonora": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Sonora.agent",
+        "description": "Soy tu conexión con el mundo natural, de lo macro a lo micro veo todo de manera sistémica.",
+        "resource_class": "light",
+        "tools": {
+            "generar_grafico_turtle": "cpu-render",
+            "generar_ascii_morse": None,
+            "generar_composicion_sonido": "cpu-render",
+            "explorar_especies_sonoras": None,
+        },
+    },
+    "Gente_Horaculo": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Horaculo.agent",
+        "description": "Oráculo ambiental general",
+        "resource_class": "light",
+        "tools": {},
+    },
+    "Gente_Compostada": {
+        "type": "agent",
+        "module": ".sub_agents.Gente_Compostada.agent",
+        "description": (
+            "Recoges las respuestas recibidas por los distintos agentes en paralelo y conectas la información "
+            "obtenida por otros agentes sobre el Parkway en Bogotá: tanto la percepción humana del territorio, "
+            "la flora, la fauna y la geografía como la sensibilidad y reflexión sobre los residuos orgánicos "
+            "y su papel en los ciclos de vida y fertilidad del suelo"
+        ),
+        "resource_class": "light",
+        "tools": {},
+        "nested_agents": ["compostada_paralelo", "compostador", "gentes_del_bosque", "compostada_fusionador"],
     },
 }
-
-
-
@@ -0,0 +1,289 @@
+"""
+Pre-enrutador local (TF-IDF) para Gente_Raiz.
+
+Cada conversación empieza con una llamada completa al LLM de Gente_Raiz cuyo
+único trabajo es elegir un sub-agente con `transfer_to_agent`. `TfidfRouter`
+compara el mensaje de la persona con la `description` de cada sub-agente y con
+frases de ejemplo (`AGENTS_REGISTRY["app"]["router"]["examples"]`) usando un
+índice TF-IDF de n-gramas de caracteres (scikit-learn). Si la coincidencia es
+clara, responde él mismo con la llamada a `transfer_to_agent` y el LLM no se usa;
+si no, la petición sigue hacia el LLM como siempre.
+
+Modos (`DATAR_ROUTER_MODE`):
+- `shadow` (por defecto): siempre decide el LLM; el router solo predice y se
+  compara con la elección del LLM (`datar_router_shadow_total`). Los umbrales
+  no están calibrados con tráfico real: se activa cuando esa precisión lo justifique.
+- `active`: transfiere directamente cuando hay confianza.
+- `off`: desactivado.
+
+El índice se construye en un hilo aparte (importar scikit-learn tarda más de un
+segundo y casi 90 MB): en modo `active` al arrancar; en modo `shadow`, que no
+enruta, con la primera petición a Gente_Raiz, para no cargar el cold start.
+Mientras no está listo, o si scikit-learn no está instalado, todas las
+peticiones van al LLM.
+
+Métricas (ver `metrics_utils`):
+- `datar_router_decisions_total{mode,outcome,agent}`: `routed`, `fallback` o `unavailable`.
+- `datar_router_shadow_total{result}`: `match`, `mismatch` o `abstain` en modo sombra.
+- `datar_router_llm_seconds`: duración de las llamadas de enrutamiento al LLM.
+- `datar_router_saved_seconds_total`: latencia ahorrada estimada (promedio
+  observado de esas llamadas por cada transferencia directa).
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .metrics_utils import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_TOOL = "transfer_to_agent"
+
+DEFAULT_MIN_SCORE = 0.3
+DEFAULT_MIN_MARGIN = 0.1
+
+# Peticiones en curso que se recuerdan como máximo (modo sombra y latencia del LLM)
+_MAX_PENDIENTES = 1024
+
+ROUTER_DECISIONS = REGISTRY.counter(
+    "datar_router_decisions_total", "Decisiones del pre-enrutador por modo, resultado y agente."
+)
+ROUTER_SHADOW = REGISTRY.counter(
+    "datar_router_shadow_total", "Predicciones del pre-enrutador comparadas con la elección del LLM."
+)
+ROUTER_LLM_SECONDS = REGISTRY.histogram(
+    "datar_router_llm_seconds", "Duración de las llamadas de enrutamiento al LLM de Gente_Raiz."
+)
+ROUTER_SAVED_SECONDS = REGISTRY.counter(
+    "datar_router_saved_seconds_total", "Latencia estimada ahorrada por transferencias sin LLM."
+)
+
+
+def _mensaje_de_persona(llm_request: LlmRequest) -> Optional[str]:
+    """
+    Texto del último mensaje si la petición empieza un turno de la persona.
+
+    Devuelve None cuando el último contenido es una respuesta de herramienta o un
+    mensaje reenviado de otro agente ("For context: ..."): ahí decide el LLM.
+    """
+    if not llm_request.contents:
+        return None
+    ultimo = llm_request.contents[-1]
+    if ultimo.role != "user" or not ultimo.parts:
+        return None
+    if any(part.function_response is not None for part in ultimo.parts):
+        return None
+    texto = " ".join(part.text for part in ultimo.parts if part.text and not part.thought).strip()
+    if not texto or texto.startswith("For context:"):
+        return None
+    return texto
+
+
+def _agente_elegido(llm_response: LlmResponse) -> Optional[str]:
+    if not llm_response.content:
+        return None
+    for part in llm_response.content.parts or []:
+        if part.function_call is not None and part.function_call.name == TRANSFER_TOOL:
+            return (part.function_call.args or {}).get("agent_name")
+    return None
+
+
+class _Indice:
+    """Matriz TF-IDF de los documentos de cada agente (descripción y ejemplos)."""
+
+    def __init__(self, documentos: List[Tuple[str, str]]):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.agentes = [agente for agente, _ in documentos]
+        self.vectorizador = TfidfVectorizer(
+            analyzer="char_wb",
+            ngram_range=(3, 5),
+            strip_accents="unicode",
+            lowercase=True,
+            sublinear_tf=True,
+        )
+        self.matriz = self.vectorizador.fit_transform([texto for _, texto in documentos])
+
+    def puntajes(self, texto: str) -> Dict[str, float]:
+        """Similitud coseno máxima del texto con los documentos de cada agente."""
+        # Los vectores de TfidfVectorizer ya están normalizados (norma L2)
+        similitudes = (self.matriz @ self.vectorizador.transform([texto]).T).toarray().ravel()
+        puntajes: Dict[str, float] = {}
+        for agente, similitud in zip(self.agentes, similitudes):
+            puntajes[agente] = max(puntajes.get(agente, 0.0), float(similitud))
+        return puntajes
+
+
+class TfidfRouter:
+    """
+    Pre-enrutador para los callbacks `before_model_callback` y `after_model_callback`
+    de Gente_Raiz.
+
+    Args:
+        mode: "active", "shadow" u "off".
+        config: Entrada `"router"` del registro (`min_score`, `min_margin`, `examples`).
+    """
+
+    def __init__(self, mode: str, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.mode = mode
+        self.min_score = float(config.get("min_score", DEFAULT_MIN_SCORE))
+        self.min_margin = float(config.get("min_margin", DEFAULT_MIN_MARGIN))
+        self.examples: Dict[str, List[str]] = dict(config.get("examples") or {})
+        self._indice: Optional[_Indice] = None
+        self._documentos: List[Tuple[str, str]] = []
+        self._construccion_iniciada = False
+        self._inicios: Dict[str, float] = {}
+        self._predicciones: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        # Promedio observado de las llamadas de enrutamiento al LLM (para estimar el ahorro)
+        self._llm_total = 0.0
+        self._llm_cuenta = 0
+
+    def set_candidates(self, agentes: Sequence[Any], background: bool = True) -> None:
+        """
+        Define los sub-agentes candidatos.
+
+        Args:
+            agentes: Sub-agentes (o proxies `LazyAgent`) con `name` y `description`.
+            background: Si es True, el índice se construye en un hilo aparte: ya en
+                modo "active", con la primera petición en modo "shadow". Si es
+                False, se construye ahora en este hilo.
+        """
+        if self.mode == "off":
+            return
+        documentos = []
+        for agente in agentes:
+            documentos.append((agente.name, agente.description or agente.name))
+            documentos.extend((agente.name, ejemplo) for ejemplo in self.examples.get(agente.name, ()))
+        self._documentos = documentos
+
+        if not background:
+            self._construccion_iniciada = True
+            self._construir()
+        elif self.mode == "active":
+            self._iniciar_construccion()
+
+    def _iniciar_construccion(self) -> None:
+        """Lanza (una sola vez) el hilo que construye el índice."""
+        with self._lock:
+            if self._construccion_iniciada or not self._documentos:
+                return
+            self._construccion_iniciada = True
+        # No es daemon: si el proceso termina mientras importa scikit-learn, el
+        # intérprete esperaría el lock de importación en su cierre y se colgaría
+        threading.Thread(target=self._construir, name="datar-router-index").start()
+
+    def _construir(self) -> None:
+        try:
+            indice = _Indice(self._documentos)
+        except ImportError:
+            logger.warning("scikit-learn no está instalado: el pre-enrutador queda desactivado")
+            return
+        except Exception:
+            # Por ejemplo, si el proceso termina mientras scikit-learn se importa
+            # (RuntimeError: can't register atexit after shutdown)
+            logger.warning("No se pudo construir el índice del pre-enrutador", exc_info=True)
+            return
+        self._indice = indice
+        logger.info("Pre-enrutador listo (%s, %d documentos)", self.mode, len(self._documentos))
+
+    def predict(self, texto: str) -> Tuple[Optional[str], Dict[str, float]]:
+        """
+        Predice el sub-agente para un mensaje.
+
+        Returns:
+            (agente o None si no hay confianza suficiente, puntajes por agente).
+        """
+        if self._indice is None:
+            return None, {}
+        puntajes = self._indice.puntajes(texto)
+        ordenados = sorted(puntajes.items(), key=lambda item: item[1], reverse=True)
+        mejor, puntaje = ordenados[0]
+        segundo = ordenados[1][1] if len(ordenados) > 1 else 0.0
+        if puntaje >= self.min_score and puntaje - segundo >= self.min_margin:
+            return mejor, puntajes
+        return None, puntajes
+
+    def _recordar(self, tabla: Dict[str, Any], clave: str, valor: Any) -> None:
+        with self._lock:
+            while len(tabla) >= _MAX_PENDIENTES:
+                tabla.pop(next(iter(tabla)))
+            tabla[clave] = valor
+
+    def before_model_callback(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        if self.mode == "off":
+            return None
+        texto = _mensaje_de_persona(llm_request)
+        if texto is None:
+            return None
+
+        invocacion = callback_context.invocation_id
+        if self._indice is None:
+            self._iniciar_construccion()
+            ROUTER_DECISIONS.inc(mode=self.mode, outcome="unavailable", agent="")
+            self._recordar(self._inicios, invocacion, time.perf_counter())
+            return None
+
+        agente, puntajes = self.predict(texto)
+        if self.mode == "shadow" or agente is None:
+            ROUTER_DECISIONS.inc(mode=self.mode, outcome="fallback", agent=agente or "")
+            if self.mode == "shadow":
+                self._recordar(self._predicciones, invocacion, agente)
+            self._recordar(self._inicios, invocacion, time.perf_counter())
+            return None
+
+        ROUTER_DECISIONS.inc(mode=self.mode, outcome="routed", agent=agente)
+        if self._llm_cuenta:
+            ROUTER_SAVED_SECONDS.inc(self._llm_total / self._llm_cuenta)
+        logger.debug("Pre-enrutador: %s (puntaje %.2f)", agente, puntajes[agente])
+        return LlmResponse(
+            content=types.Content(
+                role="model",
+                parts=[types.Part(function_call=types.FunctionCall(
+                    name=TRANSFER_TOOL, args={"agent_name": agente}
+                ))],
+            ),
+            custom_metadata={"router": "tfidf", "router_score": round(puntajes[agente], 3)},
+        )
+
+    def after_model_callback(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        invocacion = callback_context.invocation_id
+        with self._lock:
+            inicio = self._inicios.pop(invocacion, None)
+            tenia_prediccion = invocacion in self._predicciones
+            prediccion = self._predicciones.pop(invocacion, None)
+        if inicio is None:
+            return None
+
+        duracion = time.perf_counter() - inicio
+        ROUTER_LLM_SECONDS.observe(duracion)
+        with self._lock:
+            self._llm_total += duracion
+            self._llm_cuenta += 1
+
+        if tenia_prediccion:
+            elegido = _agente_elegido(llm_response)
+            if prediccion is None:
+                resultado = "abstain"
+            else:
+                resultado = "match" if prediccion == elegido else "mismatch"
+            ROUTER_SHADOW.inc(result=resultado)
+            if resultado == "mismatch":
+                logger.info(
+                    "Pre-enrutador (sombra) predijo %s; el LLM eligió %s", prediccion, elegido,
+                    extra={"router_prediction": prediccion, "llm_choice": elegido},
+                )
+        return None
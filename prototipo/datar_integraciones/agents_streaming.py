@@ -0,0 +1,134 @@
+"""
+Streaming de respuestas y tiempo hasta el primer token visible.
+
+Con `StreamingMode.SSE` (lo que pide el cliente con `"streaming": true` en
+`/run_sse` del API server de ADK, o `streaming_run_config()` desde Python) cada
+agente emite fragmentos parciales a medida que el modelo los genera. Los agentes
+internos que solo guardan su salida en el estado (los intérpretes y el fusionador
+de Gente_Interpretativa) ocultan esos fragmentos con `respuesta_parcial_oculta`,
+de modo que la persona solo ve, token a token, la respuesta del agente final.
+
+`TimeToFirstTokenPlugin` se registra en `App(plugins=[...])` y mide por agente:
+- `datar_time_to_first_token_seconds`: desde que llega el mensaje de la persona
+  hasta el primer texto visible de ese agente (la latencia percibida).
+- `datar_model_first_chunk_seconds`: desde que el agente llama al modelo hasta el
+  primer fragmento de texto que devuelve.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events.event import Event
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from .metrics_utils import REGISTRY
+
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "datar_time_to_first_token_seconds",
+    "Tiempo desde el mensaje de la persona hasta el primer texto visible, por agente y modo de streaming.",
+)
+MODEL_FIRST_CHUNK = REGISTRY.histogram(
+    "datar_model_first_chunk_seconds",
+    "Tiempo desde la llamada al modelo hasta su primer fragmento de texto, por agente.",
+)
+
+# Invocaciones en curso que se recuerdan como máximo (una invocación que termina con
+# excepción no pasa por after_run_callback)
+_MAX_INVOCACIONES = 1024
+
+
+def streaming_run_config(**kwargs) -> RunConfig:
+    """
+    Devuelve un `RunConfig` con streaming SSE (fragmentos parciales por token).
+
+    Args:
+        **kwargs: Otros campos de `RunConfig` (por ejemplo `max_llm_calls`).
+
+    Returns:
+        RunConfig con `streaming_mode=StreamingMode.SSE`.
+    """
+    return RunConfig(streaming_mode=StreamingMode.SSE, **kwargs)
+
+
+def respuesta_parcial_oculta() -> LlmResponse:
+    """
+    Respuesta vacía para reemplazar un fragmento parcial en un `after_model_callback`.
+
+    Los callbacks de agentes internos la devuelven cuando `llm_response.partial` es
+    verdadero: el fragmento no llega a la persona y la respuesta completa (no
+    parcial) se procesa como siempre.
+    """
+    return LlmResponse(content=types.Content(role="model", parts=[]), partial=True)
+
+
+def _tiene_texto_visible(content: Optional[types.Content]) -> bool:
+    if content is None:
+        return False
+    return any(part.text and not part.thought for part in content.parts or [])
+
+
+class TimeToFirstTokenPlugin(BasePlugin):
+    """Plugin de App que registra el tiempo hasta el primer token visible por agente."""
+
+    def __init__(self, name: str = "datar_ttft"):
+        super().__init__(name=name)
+        # invocation_id -> (inicio, agentes que ya mostraron texto)
+        self._invocaciones: Dict[str, Tuple[float, set]] = {}
+        # (invocation_id, agente) -> inicio de la llamada al modelo en curso
+        self._llamadas: Dict[Tuple[str, str], float] = {}
+
+    async def before_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> Optional[types.Content]:
+        while len(self._invocaciones) >= _MAX_INVOCACIONES:
+            self._invocaciones.pop(next(iter(self._invocaciones)))
+        self._invocaciones[invocation_context.invocation_id] = (time.perf_counter(), set())
+        return None
+
+    async def on_event_callback(
+        self, *, invocation_context: InvocationContext, event: Event
+    ) -> Optional[Event]:
+        registro = self._invocaciones.get(invocation_context.invocation_id)
+        if registro is None or event.author == "user" or not _tiene_texto_visible(event.content):
+            return None
+        inicio, agentes = registro
+        if event.author not in agentes:
+            agentes.add(event.author)
+            modo = invocation_context.run_config.streaming_mode if invocation_context.run_config else None
+            TIME_TO_FIRST_TOKEN.observe(
+                time.perf_counter() - inicio,
+                agent=event.author,
+                stream="sse" if modo == StreamingMode.SSE else "none",
+            )
+        return None
+
+    async def after_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> None:
+        invocacion = invocation_context.invocation_id
+        self._invocaciones.pop(invocacion, None)
+        for clave in [clave for clave in self._llamadas if clave[0] == invocacion]:
+            del self._llamadas[clave]
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        if len(self._llamadas) >= _MAX_INVOCACIONES:
+            self._llamadas.pop(next(iter(self._llamadas)))
+        self._llamadas[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        clave = (callback_context.invocation_id, callback_context.agent_name)
+        inicio = self._llamadas.get(clave)
+        if inicio is not None and _tiene_texto_visible(llm_response.content):
+            del self._llamadas[clave]
+            MODEL_FIRST_CHUNK.observe(time.perf_counter() - inicio, agent=callback_context.agent_name)
+        return None
@@ -1,11 +1,15 @@
 import os
+import tempfile
 import warnings
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from dotenv import load_dotenv
 
+from .agents_registry import AGENTS_REGISTRY
+
 # Suprimir warnings de serialización de Pydantic relacionados con Google ADK
 # Estos warnings son conocidos y no afectan la funcionalidad.
 # Ocurren cuando Pydantic intenta serializar objetos Message/Choices del SDK de Google ADK
@@ -28,7 +32,39 @@ warnings.filterwarnings(
 
 
 OPENROUTER_API_KEY_ENV = "OPENROUTER_API_KEY"
+OPENROUTER_API_BASE_ENV = "OPENROUTER_API_BASE"
 OPENROUTER_API_BASE_DEFAULT = "https://openrouter.ai/api/v1"
+OPENROUTER_MAX_CONNECTIONS_ENV = "OPENROUTER_MAX_CONNECTIONS"
+OPENROUTER_MAX_KEEPALIVE_ENV = "OPENROUTER_MAX_KEEPALIVE"
+OPENROUTER_KEEPALIVE_EXPIRY_ENV = "OPENROUTER_KEEPALIVE_EXPIRY"
+OPENROUTER_MAX_IN_FLIGHT_ENV = "OPENROUTER_MAX_IN_FLIGHT"
+OPENROUTER_RATE_LIMIT_RPS_ENV = "OPENROUTER_RATE_LIMIT_RPS"
+OPENROUTER_RATE_LIMIT_BURST_ENV = "OPENROUTER_RATE_LIMIT_BURST"
+OPENROUTER_MAX_RETRIES_ENV = "OPENROUTER_MAX_RETRIES"
+OPENROUTER_BACKOFF_BASE_ENV = "OPENROUTER_BACKOFF_BASE"
+OPENROUTER_BACKOFF_MAX_ENV = "OPENROUTER_BACKOFF_MAX"
+MEDIA_BUCKET_ENV = "MEDIA_BUCKET_NAME"
+MEDIA_BASE_URL_ENV = "MEDIA_PUBLIC_BASE_URL"
+MEDIA_UPLOAD_WORKERS_ENV = "MEDIA_UPLOAD_WORKERS"
+MEDIA_UPLOAD_MAX_PENDING_ENV = "MEDIA_UPLOAD_MAX_PENDING"
+MEDIA_UPLOAD_CHUNK_SIZE_ENV = "MEDIA_UPLOAD_CHUNK_SIZE"
+MEDIA_GCS_POOL_SIZE_ENV = "MEDIA_GCS_POOL_SIZE"
+MEDIA_STORAGE_BACKEND_ENV = "MEDIA_STORAGE_BACKEND"
+MEDIA_LOCAL_DIR_ENV = "MEDIA_LOCAL_DIR"
+MEDIA_LOCAL_BASE_URL_ENV = "MEDIA_LOCAL_BASE_URL"
+MEDIA_LOCAL_DIR_DEFAULT = os.path.join(tempfile.gettempdir(), "datar_media")
+INTERPRETATIVA_MODE_ENV = "DATAR_INTERPRETATIVA_MODE"
+INTERPRETATIVA_MODES = ("pipeline", "fast")
+ROUTER_MODE_ENV = "DATAR_ROUTER_MODE"
+ROUTER_MODES = ("shadow", "active", "off")
+LLM_BACKEND_ENV = "DATAR_LLM_BACKEND"
+LLM_BACKENDS = ("openrouter", "fake", "record")
+MODEL_TIER_ENV = "DATAR_MODEL_TIER"
+LLM_CACHE_ENV = "DATAR_LLM_CACHE"
+METRICS_PORT_ENV = "DATAR_METRICS_PORT"
+
+_VERDADEROS = ("1", "true", "on", "yes")
+_FALSOS = ("0", "false", "off", "no")
 
 
 @dataclass
@@ -37,6 +73,42 @@ class OpenRouterConfig:
     api_base: str = OPENROUTER_API_BASE_DEFAULT
 
 
+@dataclass(frozen=True)
+class Settings:
+    """
+    Configuración de entorno de DATAR, resuelta una sola vez por proceso.
+
+    Los valores vacíos se normalizan a "" (claves) o None (opcionales) para que
+    los consumidores no tengan que repetir `strip()` ni comprobaciones.
+    """
+    openrouter_api_key: str
+    openrouter_api_base: str
+    media_bucket_name: Optional[str]
+    media_public_base_url: Optional[str]
+    openrouter_max_connections: int = 100
+    openrouter_max_keepalive: int = 20
+    openrouter_keepalive_expiry: float = 60.0
+    openrouter_max_in_flight: int = 32
+    openrouter_rate_limit_rps: float = 0.0
+    openrouter_rate_limit_burst: Optional[float] = None
+    openrouter_max_retries: int = 3
+    openrouter_backoff_base: float = 0.5
+    openrouter_backoff_max: float = 20.0
+    media_upload_workers: int = 4
+    media_upload_max_pending: int = 32
+    media_upload_chunk_size: int = 4 * 1024 * 1024
+    media_gcs_pool_size: int = 16
+    media_storage_backend: str = "gcs"
+    media_local_dir: str = MEDIA_LOCAL_DIR_DEFAULT
+    media_local_base_url: Optional[str] = None
+    interpretativa_mode: str = "pipeline"
+    router_mode: str = "shadow"
+    llm_backend: str = "openrouter"
+    model_tier: Optional[str] = None
+    llm_cache: bool = True
+    metrics_port: Optional[int] = None
+
+
 class ConfigError(RuntimeError):
     """Error de configuración de entorno para los agentes DATAR."""
 
@@ -67,6 +139,117 @@ def load_env_if_needed() -> None:
             load_dotenv(dotenv_path=parent_env, override=False)
 
 
+def _env_opcional(nombre: str) -> Optional[str]:
+    valor = (os.getenv(nombre) or "").strip()
+    return valor or None
+
+
+def _env_int(nombre: str, defecto: int) -> int:
+    valor = _env_opcional(nombre)
+    if valor is None:
+        return defecto
+    try:
+        return int(valor)
+    except ValueError as e:
+        raise ConfigError(f"La variable de entorno {nombre} debe ser un entero (valor: {valor!r}).") from e
+
+
+def _env_float(nombre: str, defecto: float) -> float:
+    valor = _env_opcional(nombre)
+    if valor is None:
+        return defecto
+    try:
+        return float(valor)
+    except ValueError as e:
+        raise ConfigError(f"La variable de entorno {nombre} debe ser un número (valor: {valor!r}).") from e
+
+
+def _env_opcion(nombre: str, opciones: Tuple[str, ...]) -> str:
+    """Lee una variable con valores permitidos; la primera opción es el valor por defecto."""
+    valor = (_env_opcional(nombre) or opciones[0]).lower()
+    if valor not in opciones:
+        raise ConfigError(
+            f"La variable de entorno {nombre} debe ser una de {', '.join(opciones)} (valor: {valor!r})."
+        )
+    return valor
+
+
+def _env_opcion_opcional(nombre: str, opciones: Tuple[str, ...]) -> Optional[str]:
+    """Como `_env_opcion`, pero sin valor por defecto: None si la variable no está definida."""
+    valor = _env_opcional(nombre)
+    return None if valor is None else _env_opcion(nombre, opciones)
+
+
+def _env_bool(nombre: str, defecto: bool) -> bool:
+    valor = _env_opcional(nombre)
+    if valor is None:
+        return defecto
+    if valor.lower() in _VERDADEROS:
+        return True
+    if valor.lower() in _FALSOS:
+        return False
+    raise ConfigError(
+        f"La variable de entorno {nombre} debe ser {'/'.join(_VERDADEROS)} o {'/'.join(_FALSOS)} (valor: {valor!r})."
+    )
+
+
+def _env_file_path() -> Path:
+    """Ruta donde se espera el archivo .env (usada en mensajes de error)."""
+    return Path(__file__).resolve().parent.parent / ".env"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Devuelve la configuración del proceso, cargando `.env` solo la primera vez.
+
+    Las siguientes llamadas devuelven el mismo objeto sin volver a tocar el
+    sistema de archivos. En pruebas, usa `reset_settings()` después de
+    modificar variables de entorno.
+
+    Returns:
+        Settings con la clave y URL base de OpenRouter y la configuración de medios.
+
+    Raises:
+        ConfigError: Si una variable numérica no contiene un número válido o
+            una variable de opciones tiene un valor desconocido.
+    """
+    load_env_if_needed()
+    return Settings(
+        openrouter_api_key=(os.getenv(OPENROUTER_API_KEY_ENV) or "").strip(),
+        openrouter_api_base=_env_opcional(OPENROUTER_API_BASE_ENV) or OPENROUTER_API_BASE_DEFAULT,
+        media_bucket_name=_env_opcional(MEDIA_BUCKET_ENV),
+        media_public_base_url=_env_opcional(MEDIA_BASE_URL_ENV),
+        openrouter_max_connections=_env_int(OPENROUTER_MAX_CONNECTIONS_ENV, 100),
+        openrouter_max_keepalive=_env_int(OPENROUTER_MAX_KEEPALIVE_ENV, 20),
+        openrouter_keepalive_expiry=_env_float(OPENROUTER_KEEPALIVE_EXPIRY_ENV, 60.0),
+        openrouter_max_in_flight=_env_int(OPENROUTER_MAX_IN_FLIGHT_ENV, 32),
+        openrouter_rate_limit_rps=_env_float(OPENROUTER_RATE_LIMIT_RPS_ENV, 0.0),
+        openrouter_rate_limit_burst=_env_float(OPENROUTER_RATE_LIMIT_BURST_ENV, 0.0) or None,
+        openrouter_max_retries=_env_int(OPENROUTER_MAX_RETRIES_ENV, 3),
+        openrouter_backoff_base=_env_float(OPENROUTER_BACKOFF_BASE_ENV, 0.5),
+        openrouter_backoff_max=_env_float(OPENROUTER_BACKOFF_MAX_ENV, 20.0),
+        media_upload_workers=_env_int(MEDIA_UPLOAD_WORKERS_ENV, 4),
+        media_upload_max_pending=_env_int(MEDIA_UPLOAD_MAX_PENDING_ENV, 32),
+        media_upload_chunk_size=_env_int(MEDIA_UPLOAD_CHUNK_SIZE_ENV, 4 * 1024 * 1024),
+        media_gcs_pool_size=_env_int(MEDIA_GCS_POOL_SIZE_ENV, 16),
+        media_storage_backend=(_env_opcional(MEDIA_STORAGE_BACKEND_ENV) or "gcs").lower(),
+        media_local_dir=_env_opcional(MEDIA_LOCAL_DIR_ENV) or MEDIA_LOCAL_DIR_DEFAULT,
+        media_local_base_url=_env_opcional(MEDIA_LOCAL_BASE_URL_ENV),
+        interpretativa_mode=_env_opcion(INTERPRETATIVA_MODE_ENV, INTERPRETATIVA_MODES),
+        router_mode=_env_opcion(ROUTER_MODE_ENV, ROUTER_MODES),
+        llm_backend=_env_opcion(LLM_BACKEND_ENV, LLM_BACKENDS),
+        model_tier=_env_opcion_opcional(MODEL_TIER_ENV, tuple(AGENTS_REGISTRY["app"].get("model_tiers", {}))),
+        llm_cache=_env_bool(LLM_CACHE_ENV, True),
+        metrics_port=_env_int(METRICS_PORT_ENV, 0) or None,
+    )
+
+
+def reset_settings() -> None:
+    """Invalida la configuración memorizada; la próxima llamada vuelve a leer el entorno."""
+    get_settings.cache_clear()
+
+
 def get_openrouter_config(
     *,
     require_key: bool = True,
@@ -75,12 +258,13 @@ def get_openrouter_config(
     """
     Obtiene y valida la configuración necesaria para usar OpenRouter.
 
-    - Intenta cargar variables desde .env si está disponible.
+    - Usa la configuración memorizada del proceso (ver `get_settings`).
     - Verifica que exista la API key requerida.
 
     Args:
         require_key: Si es True, lanza un ConfigError si falta la API key.
-        api_base: Permite sobreescribir la URL base; si no se da, usa el valor por defecto.
+        api_base: Permite sobreescribir la URL base; si no se da, usa `OPENROUTER_API_BASE`
+            o el valor por defecto.
 
     Returns:
         OpenRouterConfig con api_key y api_base válidos.
@@ -88,29 +272,17 @@ def get_openrouter_config(
     Raises:
         ConfigError: Si require_key es True y la API key no está definida.
     """
-    load_env_if_needed()
-
-    key = os.getenv(OPENROUTER_API_KEY_ENV) or ""
-    # Eliminar espacios en blanco al inicio y final
-    key = key.strip()
-    base = api_base or OPENROUTER_API_BASE_DEFAULT
-
-    if require_key:
-        # Determinar dónde se buscó el .env para el mensaje de error
-        current_file = Path(__file__).resolve()
-        datar_root = current_file.parent.parent
-        env_file = datar_root / ".env"
-        
-        if not key:
-            error_msg = (
-                f"No se encontró la variable de entorno {OPENROUTER_API_KEY_ENV}. "
-                f"Configura tu clave de OpenRouter en un archivo .env en: {env_file} "
-                "o en el entorno antes de iniciar los agentes DATAR."
-            )
-            raise ConfigError(error_msg)
-
-    return OpenRouterConfig(api_key=key, api_base=base)
-
+    settings = get_settings()
 
+    key = settings.openrouter_api_key
+    base = api_base or settings.openrouter_api_base
 
+    if require_key and not key:
+        error_msg = (
+            f"No se encontró la variable de entorno {OPENROUTER_API_KEY_ENV}. "
+            f"Configura tu clave de OpenRouter en un archivo .env en: {_env_file_path()} "
+            "o en el entorno antes de iniciar los agentes DATAR."
+        )
+        raise ConfigError(error_msg)
 
+    return OpenRouterConfig(api_key=key, api_base=base)
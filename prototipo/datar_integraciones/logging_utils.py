@@ -0,0 +1,135 @@
+"""
+Logging estructurado y no bloqueante para los agentes DATAR.
+
+Antes, `log_uso` y los callbacks de depuración hacían `print(..., flush=True)`:
+cada línea era una escritura síncrona a stdout dentro del event loop. Aquí los
+loggers del paquete (`datar_integraciones.*`, es decir `logging.getLogger(__name__)`
+en cualquier módulo) escriben en una cola en memoria (`QueueHandler`); un hilo
+aparte (`QueueListener`) formatea cada registro como una línea JSON y la escribe
+en stderr.
+
+Variables de entorno opcionales:
+- `DATAR_LOG_LEVEL`: nivel mínimo (por defecto INFO; los mensajes DEBUG quedan
+  desactivados y no se formatean).
+- `DATAR_LOG_FORMAT`: "json" (por defecto) o "text" para lectura local.
+
+El campo `severity` del JSON es el que Cloud Logging usa para el nivel en Cloud Run.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+LOG_LEVEL_ENV = "DATAR_LOG_LEVEL"
+LOG_FORMAT_ENV = "DATAR_LOG_FORMAT"
+LOGGER_NAME = "datar_integraciones"
+
+# Atributos propios de LogRecord; el resto son campos pasados con `extra=`
+_ATRIBUTOS_RECORD = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_RECORD and not clave.startswith("_"):
+                datos[clave] = valor
+        if record.exc_info:
+            datos["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos["exception"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class _QueueHandlerEstructurado(QueueHandler):
+    """
+    `QueueHandler` que conserva los campos `extra` y el traceback para el formateador JSON.
+
+    El `QueueHandler` estándar formatea el mensaje en el hilo que registra y descarta
+    `exc_info`; aquí solo se resuelven los argumentos del mensaje (barato) y el
+    traceback se convierte a texto para que pueda cruzar la cola.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _nivel(level: Optional[str]) -> int:
+    nombre = (level or os.getenv(LOG_LEVEL_ENV) or "INFO").strip().upper()
+    nivel = logging.getLevelName(nombre)
+    return nivel if isinstance(nivel, int) else logging.INFO
+
+
+def configure_logging(level: Optional[str] = None, stream: Optional[TextIO] = None) -> logging.Logger:
+    """
+    Configura (una sola vez por proceso) el logger `datar_integraciones`.
+
+    Args:
+        level: Nivel mínimo; si no se da, se lee `DATAR_LOG_LEVEL` (por defecto INFO).
+        stream: Destino de las líneas (por defecto `sys.stderr`).
+
+    Returns:
+        El logger raíz del paquete.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    with _lock:
+        if _listener is not None:
+            return logger
+
+        destino = logging.StreamHandler(stream or sys.stderr)
+        if (os.getenv(LOG_FORMAT_ENV) or "json").strip().lower() == "text":
+            destino.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        else:
+            destino.setFormatter(JsonFormatter())
+
+        cola: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger.addHandler(_QueueHandlerEstructurado(cola))
+        logger.setLevel(_nivel(level))
+        # Sin propagar: los handlers del logger raíz (adk web, uvicorn) escriben de forma síncrona
+        logger.propagate = False
+
+        _listener = QueueListener(cola, destino, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+    return logger
+
+
+def log_uso(recurso: str, tipo: str) -> None:
+    """
+    Registra el uso de una fuente o función por parte de una herramienta.
+
+    Reemplaza a las copias de `log_uso` con `print` que había en Bosque y Sonora;
+    el nombre de la herramienta en curso se agrega automáticamente si está instrumentada.
+
+    Args:
+        recurso: Fuente, URL, PDF o función utilizada.
+        tipo: Tipo de recurso (por ejemplo "URL", "PDF" o "función").
+    """
+    from .metrics_utils import current_tool
+
+    logging.getLogger(f"{LOGGER_NAME}.uso").info(
+        "Usando %s: %s", tipo, recurso,
+        extra={"tipo": tipo, "recurso": recurso, "tool": current_tool()},
+    )
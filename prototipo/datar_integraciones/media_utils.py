@@ -0,0 +1,162 @@
+"""
+Publicación de los medios generados por los agentes (PNG y WAV) sin pasar por disco.
+
+Las herramientas de Bosque, Sonora, Pasto e Intuitiva renderizaban a un
+`tempfile.NamedTemporaryFile`, lo subían y lo borraban. En Cloud Run `/tmp` es un
+tmpfs en RAM que cuenta contra el límite de memoria, así que esas escrituras no
+ahorraban nada. Aquí cada medio se codifica directamente en un `io.BytesIO` y se
+entrega como `memoryview` (sin copiar el buffer) a la cola de subidas de
+`storage_utils`.
+
+Las funciones de codificación registran la fase "render" de la herramienta en
+curso y las de publicación sus bytes publicados; la fase "upload" la registra la
+cola cuando termina la subida real (ver `metrics_utils`).
+
+Las dependencias pesadas (scipy) se importan solo al usarse, y `storage_utils` se
+importa dentro de `publish_media`; el destino (Cloud Storage o un directorio local)
+lo decide `MEDIA_STORAGE_BACKEND`, y un backend mal configurado degrada a un error
+controlado en la herramienta en lugar de romper su importación.
+"""
+import io
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from .metrics_utils import record_output_bytes, tool_phase
+
+if TYPE_CHECKING:
+    import numpy as np
+    from .storage_utils import UploadResult
+    from matplotlib.figure import Figure
+    from PIL import Image
+
+PNG_CONTENT_TYPE = "image/png"
+WAV_CONTENT_TYPE = "audio/wav"
+
+
+def figure_to_png(fig: "Figure", **savefig_kwargs) -> memoryview:
+    """
+    Codifica una figura de matplotlib como PNG en memoria.
+
+    Args:
+        fig: Figura a guardar.
+        **savefig_kwargs: Argumentos adicionales para `fig.savefig` (dpi, bbox_inches...).
+
+    Returns:
+        Vista sobre los bytes PNG (sin copia del buffer).
+    """
+    # matplotlib rasteriza los artistas al guardar: aquí ocurre el render real
+    with tool_phase("render"):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", **savefig_kwargs)
+        return buffer.getbuffer()
+
+
+def image_to_png(imagen: "Image.Image") -> memoryview:
+    """Codifica una imagen de Pillow como PNG en memoria."""
+    with tool_phase("render"):
+        buffer = io.BytesIO()
+        imagen.save(buffer, format="PNG")
+        return buffer.getbuffer()
+
+
+def audio_to_wav(audio_int16: "np.ndarray", sample_rate: int) -> memoryview:
+    """
+    Codifica audio PCM de 16 bits como WAV en memoria.
+
+    Args:
+        audio_int16: Muestras ya convertidas a `np.int16`.
+        sample_rate: Frecuencia de muestreo en Hz.
+    """
+    from scipy.io import wavfile
+
+    with tool_phase("render"):
+        buffer = io.BytesIO()
+        wavfile.write(buffer, sample_rate, audio_int16)
+        return buffer.getbuffer()
+
+
+def publish_media(
+    data: memoryview,
+    destination_path: str,
+    content_type: str,
+    wait: bool = False,
+    timeout: Optional[float] = None,
+    content_addressed: bool = False,
+) -> str:
+    """
+    Publica un medio codificado en memoria y devuelve su URL pública.
+
+    La subida se encola en `storage_utils.get_upload_queue()`; la URL se conoce
+    de inmediato porque el nombre del objeto es determinista.
+
+    Args:
+        data: Bytes del medio (idealmente la vista devuelta por `*_to_png`/`audio_to_wav`).
+        destination_path: Ruta destino dentro del bucket.
+        content_type: MIME type del objeto.
+        wait: Si es True, espera a que la subida termine antes de devolver la URL.
+        timeout: Segundos máximos de espera cuando `wait` es True.
+        content_addressed: Si es True, se agrega al nombre un hash del contenido
+            (en lugar de una marca de tiempo en `destination_path`), el objeto se
+            marca como inmutable para CDN/navegadores y no se vuelve a subir si ya
+            existe. Usar solo para renders deterministas.
+
+    Returns:
+        URL pública del objeto.
+
+    Raises:
+        RuntimeError: Si el almacenamiento no está configurado.
+        UploadQueueFull: Si la cola de subidas está llena (subclase de RuntimeError).
+        ConfigError: Si `MEDIA_STORAGE_BACKEND` tiene un valor desconocido.
+    """
+    from . import storage_utils
+
+    record_output_bytes(memoryview(data).nbytes)
+    cola = storage_utils.get_upload_queue()
+    if content_addressed:
+        ticket = cola.enqueue_bytes(
+            data,
+            storage_utils.content_addressed_path(destination_path, data),
+            content_type,
+            cache_control=storage_utils.IMMUTABLE_CACHE_CONTROL,
+            skip_if_exists=True,
+        )
+    else:
+        ticket = cola.enqueue_bytes(data, destination_path, content_type)
+    return ticket.result(timeout) if wait else ticket.url
+
+
+def publish_many(
+    medios: Sequence[Tuple[memoryview, str, str]],
+    content_addressed: bool = False,
+    timeout: Optional[float] = None,
+) -> List["UploadResult"]:
+    """
+    Publica varios medios de un mismo turno en paralelo y espera a que terminen.
+
+    Pensado para herramientas que generan más de un archivo (por ejemplo un WAV y
+    su forma de onda en PNG): el turno paga la latencia de la subida más lenta y
+    no la suma de todas.
+
+    Args:
+        medios: Tuplas (datos, ruta destino, content type).
+        content_addressed: Igual que en `publish_media`, aplicado a todos los medios.
+        timeout: Segundos máximos de espera para el lote completo.
+
+    Returns:
+        Un `UploadResult` por medio, en orden, con su `url` o su `error`.
+    """
+    from . import storage_utils
+
+    solicitudes = []
+    for data, destination_path, content_type in medios:
+        record_output_bytes(memoryview(data).nbytes)
+        if content_addressed:
+            solicitudes.append(storage_utils.UploadRequest(
+                data,
+                storage_utils.content_addressed_path(destination_path, data),
+                content_type,
+                cache_control=storage_utils.IMMUTABLE_CACHE_CONTROL,
+                skip_if_exists=True,
+            ))
+        else:
+            solicitudes.append(storage_utils.UploadRequest(data, destination_path, content_type))
+    return storage_utils.upload_many(solicitudes, timeout=timeout)
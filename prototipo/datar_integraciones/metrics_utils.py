@@ -0,0 +1,410 @@
+"""
+Métricas de las herramientas de los agentes DATAR (contadores e histogramas).
+
+Todas las funciones que se entregan a `FunctionTool(...)` se envuelven con
+`instrument_tool`, que registra por herramienta:
+- `datar_tool_calls_total` y `datar_tool_errors_total` (llamadas y excepciones).
+- `datar_tool_duration_seconds` con la etiqueta `phase`: "total" para la llamada
+  completa, y las fases que la herramienta marque con `tool_phase("render")`, etc.
+  La fase "upload" la registra la cola de subidas (`storage_utils`) cuando termina
+  cada subida en segundo plano, con la herramienta que la encoló.
+- `datar_tool_upload_errors_total`: subidas en segundo plano que fallaron.
+- `datar_tool_output_bytes`: tamaño de la respuesta textual más los medios
+  publicados durante la llamada (ver `record_output_bytes`).
+
+También se exportan, si la cola de subidas ya existe, su profundidad y contadores.
+
+Las métricas se leen con `render_prometheus()` (formato de texto de Prometheus) o
+`metrics_snapshot()` (dict serializable a JSON). Si se define `DATAR_METRICS_PORT`,
+`start_metrics_server()` las sirve en `/metrics` y `/metrics.json` desde un hilo
+aparte, sin tocar el event loop de los agentes.
+
+No depende de `prometheus_client`: la implementación es mínima y segura para hilos.
+"""
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .agents_utils import get_settings
+
+# Límites (en segundos) pensados para herramientas que van de milisegundos
+# (ASCII/morse) a decenas de segundos (descarga de OSM + render del mapa).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Límites (en bytes) desde una respuesta corta hasta un WAV de varios MB
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(valores: Dict[str, str]) -> Labels:
+    return tuple(sorted(valores.items()))
+
+
+def _formatear_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pares = list(labels) + ([extra] if extra else [])
+    if not pares:
+        return ""
+    contenido = ",".join(
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in pares
+    )
+    return "{" + contenido + "}"
+
+
+class Counter:
+    """Contador monótono con etiquetas."""
+
+    tipo = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._valores: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        clave = _labels(labels)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._valores.get(_labels(labels), 0.0)
+
+    def _prometheus(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_formatear_labels(k)} {v}" for k, v in self._valores.items()]
+
+    def _snapshot(self) -> List[dict]:
+        with self._lock:
+            return [{"labels": dict(k), "value": v} for k, v in self._valores.items()]
+
+
+class Histogram:
+    """Histograma acumulativo al estilo Prometheus (buckets, suma y cuenta por etiquetas)."""
+
+    tipo = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        clave = _labels(labels)
+        indice = bisect_left(self.buckets, value)
+        with self._lock:
+            # [conteo por bucket..., +Inf, suma]
+            serie = self._series.setdefault(clave, [0.0] * (len(self.buckets) + 2))
+            serie[indice] += 1
+            serie[-1] += value
+
+    def _acumulados(self, serie: List[float]) -> List[float]:
+        acumulado, total = [], 0.0
+        for conteo in serie[:-1]:
+            total += conteo
+            acumulado.append(total)
+        return acumulado
+
+    def _prometheus(self) -> List[str]:
+        lineas = []
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for clave, serie in series.items():
+            acumulado = self._acumulados(serie)
+            for limite, valor in zip(list(self.buckets) + ["+Inf"], acumulado):
+                lineas.append(f"{self.name}_bucket{_formatear_labels(clave, ('le', str(limite)))} {valor}")
+            lineas.append(f"{self.name}_sum{_formatear_labels(clave)} {serie[-1]}")
+            lineas.append(f"{self.name}_count{_formatear_labels(clave)} {acumulado[-1]}")
+        return lineas
+
+    def _snapshot(self) -> List[dict]:
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        resultado = []
+        for clave, serie in series.items():
+            acumulado = self._acumulados(serie)
+            conteo = acumulado[-1]
+            resultado.append({
+                "labels": dict(clave),
+                "count": conteo,
+                "sum": serie[-1],
+                "mean": serie[-1] / conteo if conteo else 0.0,
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], acumulado)),
+            })
+        return resultado
+
+
+class MetricsRegistry:
+    """Conjunto de métricas del proceso más colectores de valores instantáneos (gauges)."""
+
+    def __init__(self):
+        self._metricas: Dict[str, Any] = {}
+        self._colectores: List[Callable[[], Dict[str, float]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        with self._lock:
+            return self._metricas.setdefault(name, Counter(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metricas.setdefault(name, Histogram(name, documentation, buckets))
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]) -> None:
+        """Registra una función que devuelve gauges `{nombre: valor}` al momento de exportar."""
+        with self._lock:
+            self._colectores.append(collector)
+
+    def _gauges(self) -> Dict[str, float]:
+        gauges: Dict[str, float] = {}
+        for colector in list(self._colectores):
+            try:
+                gauges.update(colector())
+            except Exception:
+                logger.exception("Falló un colector de métricas")
+        return gauges
+
+    def render_prometheus(self) -> str:
+        lineas = []
+        for metrica in list(self._metricas.values()):
+            lineas.append(f"# HELP {metrica.name} {metrica.documentation}")
+            lineas.append(f"# TYPE {metrica.name} {metrica.tipo}")
+            lineas.extend(metrica._prometheus())
+        for nombre, valor in self._gauges().items():
+            lineas.append(f"# TYPE {nombre} gauge")
+            lineas.append(f"{nombre} {valor}")
+        return "\n".join(lineas) + "\n"
+
+    def snapshot(self) -> dict:
+        datos = {nombre: metrica._snapshot() for nombre, metrica in list(self._metricas.items())}
+        datos["gauges"] = self._gauges()
+        return datos
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_CALLS = REGISTRY.counter("datar_tool_calls_total", "Llamadas a herramientas por herramienta.")
+TOOL_ERRORS = REGISTRY.counter("datar_tool_errors_total", "Herramientas que terminaron con excepción.")
+TOOL_DURATION = REGISTRY.histogram(
+    "datar_tool_duration_seconds", "Duración de las herramientas por fase (total, render, upload...)."
+)
+TOOL_UPLOAD_ERRORS = REGISTRY.counter(
+    "datar_tool_upload_errors_total", "Subidas en segundo plano que fallaron, por herramienta."
+)
+TOOL_OUTPUT_BYTES = REGISTRY.histogram(
+    "datar_tool_output_bytes", "Bytes producidos por llamada (respuesta + medios publicados).", SIZE_BUCKETS
+)
+
+# Estado de la llamada en curso: nombre de la herramienta y bytes de medios publicados
+_herramienta_actual: ContextVar[Optional[str]] = ContextVar("datar_herramienta_actual", default=None)
+_bytes_medios: ContextVar[Optional[List[int]]] = ContextVar("datar_bytes_medios", default=None)
+
+
+def current_tool() -> Optional[str]:
+    """Nombre de la herramienta instrumentada que se está ejecutando (o None)."""
+    return _herramienta_actual.get()
+
+
+@contextmanager
+def tool_phase(phase: str) -> Iterator[None]:
+    """
+    Mide una fase de la herramienta en curso (por ejemplo "render" o "upload").
+
+    Fuera de una herramienta instrumentada no registra nada.
+    """
+    herramienta = _herramienta_actual.get()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if herramienta is not None:
+            TOOL_DURATION.observe(time.perf_counter() - inicio, tool=herramienta, phase=phase)
+
+
+def record_tool_phase(tool: Optional[str], phase: str, seconds: float) -> None:
+    """
+    Registra la duración de una fase medida fuera de la llamada de la herramienta.
+
+    Para trabajo que sigue en otro hilo (la subida en segundo plano de un medio),
+    donde `tool_phase` ya no ve la herramienta: `tool` se captura con
+    `current_tool()` al encolar. Con `tool=None` no registra nada.
+    """
+    if tool is not None:
+        TOOL_DURATION.observe(seconds, tool=tool, phase=phase)
+
+
+def record_output_bytes(nbytes: int) -> None:
+    """Suma `nbytes` (por ejemplo, un PNG o WAV publicado) al tamaño de salida de la llamada en curso."""
+    acumulado = _bytes_medios.get()
+    if acumulado is not None:
+        acumulado.append(nbytes)
+
+
+def _tamano_respuesta(resultado: Any) -> int:
+    if isinstance(resultado, str):
+        return len(resultado.encode("utf-8"))
+    if isinstance(resultado, (bytes, bytearray, memoryview)):
+        return memoryview(resultado).nbytes
+    if resultado is None:
+        return 0
+    try:
+        return len(json.dumps(resultado, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def instrument_tool(func: Callable) -> Callable:
+    """
+    Decorador para las funciones que se pasan a `FunctionTool(...)`.
+
+    Conserva nombre, docstring y firma (`functools.wraps`), de modo que la
+    declaración que ve el LLM no cambia. Funciona con funciones síncronas y `async`.
+    """
+    nombre = func.__name__
+
+    def _inicio():
+        TOOL_CALLS.inc(tool=nombre)
+        return _herramienta_actual.set(nombre), _bytes_medios.set([]), time.perf_counter()
+
+    def _fin(estado, resultado: Any = None, error: bool = False) -> None:
+        token_herramienta, token_bytes, inicio = estado
+        TOOL_DURATION.observe(time.perf_counter() - inicio, tool=nombre, phase="total")
+        if error:
+            TOOL_ERRORS.inc(tool=nombre)
+        else:
+            medios = sum(_bytes_medios.get() or ())
+            TOOL_OUTPUT_BYTES.observe(_tamano_respuesta(resultado) + medios, tool=nombre)
+        _bytes_medios.reset(token_bytes)
+        _herramienta_actual.reset(token_herramienta)
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def envoltura_async(*args, **kwargs):
+            estado = _inicio()
+            try:
+                resultado = await func(*args, **kwargs)
+            except BaseException:
+                _fin(estado, error=True)
+                raise
+            _fin(estado, resultado)
+            return resultado
+
+        return envoltura_async
+
+    @functools.wraps(func)
+    def envoltura(*args, **kwargs):
+        estado = _inicio()
+        try:
+            resultado = func(*args, **kwargs)
+        except BaseException:
+            _fin(estado, error=True)
+            raise
+        _fin(estado, resultado)
+        return resultado
+
+    return envoltura
+
+
+def _metricas_cola_subidas() -> Dict[str, float]:
+    # Solo se reporta si la cola ya se creó: exportar métricas no debe crear el backend
+    from . import storage_utils
+
+    if storage_utils.get_upload_queue.cache_info().currsize == 0:
+        return {}
+    metricas = storage_utils.get_upload_queue().metrics()
+    return {
+        "datar_media_upload_queue_depth": metricas["depth"],
+        "datar_media_uploads_enqueued_total": metricas["enqueued"],
+        "datar_media_uploads_completed_total": metricas["completed"],
+        "datar_media_uploads_failed_total": metricas["failed"],
+        "datar_media_uploads_deduplicated_total": metricas["deduplicated"],
+        "datar_media_uploads_rejected_total": metricas["rejected"],
+        "datar_media_upload_bytes_total": metricas["bytes_uploaded"],
+        "datar_media_upload_mean_seconds": metricas["mean_upload_seconds"],
+    }
+
+
+REGISTRY.register_collector(_metricas_cola_subidas)
+
+
+def render_prometheus() -> str:
+    """Devuelve todas las métricas en formato de texto de Prometheus."""
+    return REGISTRY.render_prometheus()
+
+
+def metrics_snapshot() -> dict:
+    """Devuelve todas las métricas como un dict serializable a JSON."""
+    return REGISTRY.snapshot()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        ruta = self.path.split("?", 1)[0]
+        if ruta == "/metrics":
+            cuerpo = render_prometheus().encode("utf-8")
+            tipo = "text/plain; version=0.0.4; charset=utf-8"
+        elif ruta == "/metrics.json":
+            cuerpo = json.dumps(metrics_snapshot()).encode("utf-8")
+            tipo = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):
+        # Los scrapes periódicos no deben llenar los logs
+        pass
+
+
+_servidor: Optional[ThreadingHTTPServer] = None
+_servidor_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """
+    Sirve `/metrics` (Prometheus) y `/metrics.json` en un hilo daemon.
+
+    Args:
+        port: Puerto a usar; si no se da, se lee `DATAR_METRICS_PORT` (con
+            `get_settings()`). Sin puerto no se inicia nada.
+        host: Interfaz donde escuchar.
+
+    Returns:
+        El servidor iniciado (o el que ya estaba corriendo), o None si no hay puerto.
+
+    Raises:
+        ConfigError: Si `DATAR_METRICS_PORT` no es un entero.
+    """
+    global _servidor
+    if port is None:
+        port = get_settings().metrics_port
+        if port is None:
+            return None
+
+    with _servidor_lock:
+        if _servidor is None:
+            _servidor = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _servidor.daemon_threads = True
+            threading.Thread(
+                target=_servidor.serve_forever, name="datar-metrics", daemon=True
+            ).start()
+            logger.info("Métricas disponibles en http://%s:%s/metrics", host, port)
+        return _servidor
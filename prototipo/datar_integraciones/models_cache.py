@@ -0,0 +1,208 @@
+"""
+Caché exacta de respuestas del LLM para agentes con entradas repetitivas.
+
+Varios agentes reciben casi siempre el mismo primer turno (el saludo de
+Gente_Montaña, las aperturas de Gente_Bosque, las preguntas iniciales de
+Gente_Compostada). `CachedLiteLlm` se pone delante de `LiteLlm` y, si la petición
+coincide exactamente con una anterior, devuelve la respuesta guardada en
+milisegundos y sin gastar tokens de OpenRouter.
+
+La clave es un SHA-256 de:
+- el modelo,
+- la instrucción de sistema,
+- el historial normalizado (roles, textos con espacios colapsados, llamadas y
+  respuestas de herramientas),
+- la configuración de generación (temperatura, tokens máximos, etc.) y las
+  declaraciones de las herramientas disponibles (nombre, descripción y parámetros).
+
+Solo se guardan respuestas finales de texto sin error: las llamadas a
+herramientas (incluida `transfer_to_agent`) siempre van al modelo.
+
+La caché es opcional por agente: se activa en `AGENTS_REGISTRY["app"]["llm_cache"]`
+(ver `models_utils.get_llm`) y se puede apagar globalmente con `DATAR_LLM_CACHE=0`.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, List, Optional, Tuple
+
+from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+from .metrics_utils import REGISTRY
+
+
+DEFAULT_TTL_SECONDS = 3600.0
+DEFAULT_MAX_ENTRIES = 256
+
+LLM_CACHE_REQUESTS = REGISTRY.counter(
+    "datar_llm_cache_requests_total", "Consultas a la caché de respuestas del LLM por agente y resultado."
+)
+
+
+class ResponseCache:
+    """Caché LRU con expiración (TTL) de listas de `LlmResponse`."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entradas: "OrderedDict[str, Tuple[float, List[LlmResponse]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[LlmResponse]]:
+        """Devuelve copias de las respuestas guardadas, o None si no hay o expiraron."""
+        with self._lock:
+            entrada = self._entradas.get(key)
+            if entrada is None:
+                return None
+            expira, respuestas = entrada
+            if expira < time.monotonic():
+                del self._entradas[key]
+                return None
+            self._entradas.move_to_end(key)
+        # Copias: el flujo de ADK puede modificar las respuestas que recibe
+        return [r.model_copy(deep=True) for r in respuestas]
+
+    def put(self, key: str, respuestas: List[LlmResponse]) -> None:
+        copias = [r.model_copy(deep=True) for r in respuestas]
+        with self._lock:
+            self._entradas[key] = (time.monotonic() + self.ttl_seconds, copias)
+            self._entradas.move_to_end(key)
+            while len(self._entradas) > self.max_entries:
+                self._entradas.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+
+def _normalizar_texto(texto: Optional[str]) -> str:
+    # Mayúsculas y puntuación sí cambian la respuesta; los espacios no
+    return " ".join((texto or "").split())
+
+
+def _normalizar_part(part: types.Part) -> Any:
+    if part.function_call is not None:
+        return {"function_call": [part.function_call.name, part.function_call.args]}
+    if part.function_response is not None:
+        return {"function_response": [part.function_response.name, part.function_response.response]}
+    if part.inline_data is not None and part.inline_data.data is not None:
+        return {"inline_data": [part.inline_data.mime_type, hashlib.sha256(part.inline_data.data).hexdigest()]}
+    if part.text is not None:
+        return {"text": _normalizar_texto(part.text), "thought": bool(part.thought)}
+    return part.model_dump(mode="json", exclude_none=True)
+
+
+def _texto_instruccion(instruccion: Any) -> str:
+    if instruccion is None:
+        return ""
+    if isinstance(instruccion, str):
+        return _normalizar_texto(instruccion)
+    if isinstance(instruccion, types.Content):
+        return _normalizar_texto(" ".join(p.text or "" for p in instruccion.parts or []))
+    return _normalizar_texto(str(instruccion))
+
+
+def cache_key(model: str, llm_request: LlmRequest) -> str:
+    """
+    Calcula la clave de caché de una petición.
+
+    Args:
+        model: Identificador del modelo.
+        llm_request: Petición tal como la arma el flujo de ADK (antes de enviarse).
+
+    Returns:
+        Hash hexadecimal SHA-256.
+    """
+    config = llm_request.config or types.GenerateContentConfig()
+    generacion = config.model_dump(
+        mode="json",
+        exclude_none=True,
+        exclude={"system_instruction", "tools", "http_options", "labels"},
+    )
+    datos = {
+        "model": model,
+        "instruction": _texto_instruccion(config.system_instruction),
+        "contents": [
+            [c.role, [_normalizar_part(p) for p in c.parts or []]]
+            for c in llm_request.contents
+        ],
+        "config": generacion,
+        # Declaraciones completas (descripción y parámetros), no solo los nombres:
+        # si cambia una herramienta, las respuestas guardadas dejan de servir
+        "tools": [
+            herramienta.model_dump(mode="json", exclude_none=True)
+            for herramienta in config.tools or []
+        ],
+    }
+    serializado = json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+def _es_cacheable(respuestas: List[LlmResponse]) -> bool:
+    if not respuestas:
+        return False
+    for respuesta in respuestas:
+        if respuesta.error_code or respuesta.interrupted or not respuesta.content:
+            return False
+        for part in respuesta.content.parts or []:
+            if part.function_call is not None or part.text is None:
+                return False
+    return True
+
+
+class CachedLiteLlm(LiteLlm):
+    """
+    `LiteLlm` con caché exacta de respuestas de texto.
+
+    La caché y el nombre del agente se asignan con `configure_cache` (no como
+    argumentos del constructor, que `LiteLlm` reenvía a `litellm.acompletion`).
+    """
+
+    _cache: Optional[ResponseCache] = PrivateAttr(default=None)
+    _cache_agent: str = PrivateAttr(default="")
+
+    def configure_cache(self, cache: ResponseCache, agent: str) -> "CachedLiteLlm":
+        self._cache = cache
+        self._cache_agent = agent
+        return self
+
+    @override
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self._cache is None:
+            async for respuesta in super().generate_content_async(llm_request, stream):
+                yield respuesta
+            return
+
+        # La clave se calcula antes de llamar al modelo: LiteLlm modifica la petición
+        clave = cache_key(self.model, llm_request)
+        guardadas = self._cache.get(clave)
+        if guardadas is not None:
+            LLM_CACHE_REQUESTS.inc(agent=self._cache_agent, result="hit")
+            for respuesta in guardadas:
+                respuesta.custom_metadata = {**(respuesta.custom_metadata or {}), "llm_cache": "hit"}
+                yield respuesta
+            return
+
+        LLM_CACHE_REQUESTS.inc(agent=self._cache_agent, result="miss")
+        finales: List[LlmResponse] = []
+        async for respuesta in super().generate_content_async(llm_request, stream):
+            if not respuesta.partial:
+                finales.append(respuesta)
+            yield respuesta
+
+        if _es_cacheable(finales):
+            self._cache.put(clave, finales)
+            LLM_CACHE_REQUESTS.inc(agent=self._cache_agent, result="store")
@@ -0,0 +1,290 @@
+"""
+Modelo falso (sin red) para correr todo el árbol de agentes sin OpenRouter.
+
+Con `DATAR_LLM_BACKEND=fake`, `models_utils.get_llm(agent=...)` entrega un
+`FakeLlm` por agente en lugar de `LiteLlm`. Cada `FakeLlm` responde según un
+guion de reglas por agente, con texto o llamadas a funciones (incluidas
+`transfer_to_agent` y herramientas como `crear_mapa_emocional`), de modo que se
+puede perfilar la orquestación, los callbacks y el costo de las herramientas
+sin gastar tokens ni depender de la latencia del proveedor.
+
+Guion (JSON en `DATAR_FAKE_LLM_SCRIPT`, o `DEFAULT_SCRIPT`): un dict
+`{nombre_agente: [regla, ...]}`, con `"*"` como guion para agentes sin entrada
+propia. Se usa la primera regla que aplique:
+- `{"after_tool": "crear_mapa_emocional", "text": "..."}`: aplica cuando lo último
+  del historial es la respuesta de esa herramienta ("*" para cualquiera).
+- `{"match": "mapa|bosque", ...}`: expresión regular (sin distinguir mayúsculas)
+  sobre el último mensaje de la persona. Sin `match` ni `after_tool`, la regla
+  aplica siempre (respuesta por defecto).
+- La respuesta es `"text"` o `"call"` + `"args"` (llamada a función).
+  En los textos y en los valores de `args` se reemplazan `{user_text}`,
+  `{agent}` y `{tool_response}`.
+- `"latency_ms"` opcional por regla.
+
+Latencia artificial (variables de entorno):
+- `DATAR_FAKE_LLM_LATENCY_MS`: latencia base por llamada (por defecto 0).
+- `DATAR_FAKE_LLM_JITTER_MS`: variación aleatoria uniforme adicional (por defecto 0).
+- `DATAR_FAKE_LLM_CHUNK_MS`: pausa entre fragmentos al hacer streaming (por defecto 0).
+
+Grabación y reproducción:
+- `DATAR_LLM_BACKEND=record` usa OpenRouter normalmente y agrega cada respuesta
+  final a `DATAR_FAKE_LLM_RECORDING` (JSONL), indexada con la misma clave que la
+  caché de respuestas (`models_cache.cache_key`).
+- Con `DATAR_LLM_BACKEND=fake` y `DATAR_FAKE_LLM_RECORDING`, las peticiones
+  grabadas se reproducen tal cual y el guion solo cubre las que no lo estén.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import uuid
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+from .models_cache import cache_key
+
+FAKE_SCRIPT_ENV = "DATAR_FAKE_LLM_SCRIPT"
+FAKE_RECORDING_ENV = "DATAR_FAKE_LLM_RECORDING"
+FAKE_LATENCY_ENV = "DATAR_FAKE_LLM_LATENCY_MS"
+FAKE_JITTER_ENV = "DATAR_FAKE_LLM_JITTER_MS"
+FAKE_CHUNK_ENV = "DATAR_FAKE_LLM_CHUNK_MS"
+
+# ADK presenta los mensajes de otros agentes como texto de usuario con este prefijo
+_PREFIJO_CONTEXTO = "For context:"
+
+DEFAULT_SCRIPT: Dict[str, List[dict]] = {
+    "Gente_Raiz": [
+        {"match": r"mapa|bosque|macarena", "call": "transfer_to_agent", "args": {"agent_name": "Gente_Bosque"}},
+        {"match": r"paisaje sonoro|pasto", "call": "transfer_to_agent", "args": {"agent_name": "Gente_Pasto"}},
+        {"match": r"sonido|humedal|morse", "call": "transfer_to_agent", "args": {"agent_name": "Gente_Sonora"}},
+        {"match": r"\btrazo|\bríos?\b|\brios?\b", "call": "transfer_to_agent", "args": {"agent_name": "Gente_Intuitiva"}},
+        {"match": r"emoji|interpreta", "call": "transfer_to_agent", "args": {"agent_name": "GenteInterpretativa"}},
+        {"match": r"compost|residuo|parkway", "call": "transfer_to_agent", "args": {"agent_name": "Gente_Compostada"}},
+        {"match": r"oráculo|oraculo", "call": "transfer_to_agent", "args": {"agent_name": "Gente_Horaculo"}},
+        {"match": r"montaña|hola", "call": "transfer_to_agent", "args": {"agent_name": "Gente_Montaña"}},
+        {"text": "Soy Gente_Raiz. ¿Con qué gente del territorio quieres conversar?"},
+    ],
+    "Gente_Bosque": [
+        {"after_tool": "crear_mapa_emocional", "text": "Tu cartografía emocional está lista.\n{tool_response}"},
+        {"after_tool": "*", "text": "Esto encontré en el bosque: {tool_response}"},
+        {"match": r"mapa|cartograf", "call": "crear_mapa_emocional", "args": {"descripcion": "{user_text}"}},
+        {"match": r"especie", "call": "inferir_especies", "args": {"descripcion": "{user_text}"}},
+        {"text": "¿Qué sensaciones te produce el bosque de La Macarena cuando lo recorres?"},
+    ],
+    "Gente_Pasto": [
+        {"after_tool": "generar_paisaje_sonoro", "text": "...\n{tool_response}"},
+        {
+            "call": "generar_paisaje_sonoro",
+            "args": {"pajaros_vol": -6, "insectos_vol": -12, "viento_vol": -9, "duracion_seg": 10, "efectos": True},
+        },
+    ],
+    "Gente_Sonora": [
+        {"after_tool": "*", "text": "Escucha el humedal:\n{tool_response}"},
+        {"match": r"composici|sonido", "call": "generar_composicion_sonido", "args": {"especificaciones": "{user_text}"}},
+        {"match": r"gráfico|grafico|dibuj", "call": "generar_grafico_turtle", "args": {"descripcion": "{user_text}"}},
+        {"match": r"morse", "call": "generar_ascii_morse", "args": {"sonido": "{user_text}"}},
+        {"text": "El humedal La Conejera suena distinto a cada hora. ¿Qué quieres escuchar?"},
+    ],
+    "Gente_Intuitiva": [
+        {"after_tool": "guardar_interpretacion_emocional", "call": "crear_imagen_rio_emocional", "args": {}},
+        {"after_tool": "*", "text": "Aquí está tu trazo:\n{tool_response}"},
+        {"match": r"imagen|trazo|río|rio", "call": "guardar_interpretacion_emocional",
+         "args": {"interpretacion": "🌊🌿✨ {user_text}"}},
+        {"text": "🌊🌿✨ Percibo calma y movimiento en tu mensaje."},
+    ],
+    "GenteInterpreteDeEmojis": [{"text": "🌱🌊🌬️"}],
+    "GenteInterpreteDeTexto": [{"text": "Una lectura textual breve de: {user_text}"}],
+    "GenteFusionador": [{"text": "Fusión de emojis y texto sobre: {user_text}"}],
+    "GenteReInterpretativa": [{"text": "Reinterpretación final: el territorio responde a {user_text}"}],
+    # Modo rápido (DATAR_INTERPRETATIVA_MODE=fast): un solo agente con respuesta JSON
+    "GenteInterpretativa": [{"text": (
+        '{"respuesta_emojis": "🌱🌊🌬️", "respuesta_textual": "Una lectura textual breve.", '
+        '"respuesta_fusionadora": "Reinterpretación final en una sola llamada."}'
+    )}],
+    "*": [{"text": "Respuesta simulada de {agent}."}],
+}
+
+
+@lru_cache(maxsize=1)
+def load_script() -> Dict[str, List[dict]]:
+    """Carga el guion de `DATAR_FAKE_LLM_SCRIPT` (JSON) o devuelve `DEFAULT_SCRIPT`."""
+    ruta = (os.getenv(FAKE_SCRIPT_ENV) or "").strip()
+    if not ruta:
+        return DEFAULT_SCRIPT
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=1)
+def load_recording() -> Dict[str, List[dict]]:
+    """Carga las respuestas grabadas de `DATAR_FAKE_LLM_RECORDING` (clave -> respuestas)."""
+    ruta = (os.getenv(FAKE_RECORDING_ENV) or "").strip()
+    grabadas: Dict[str, List[dict]] = {}
+    if not ruta or not os.path.exists(ruta):
+        return grabadas
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                registro = json.loads(linea)
+                grabadas[registro["key"]] = registro["responses"]
+    return grabadas
+
+
+def _env_ms(nombre: str) -> float:
+    return float(os.getenv(nombre) or 0) / 1000.0
+
+
+def _ultimo_texto_usuario(contents: List[types.Content]) -> str:
+    for content in reversed(contents):
+        if content.role != "user":
+            continue
+        texto = " ".join(p.text for p in content.parts or [] if p.text)
+        if texto and not texto.startswith(_PREFIJO_CONTEXTO):
+            return texto
+    return ""
+
+
+def _ultima_respuesta_herramienta(contents: List[types.Content]) -> Optional[types.FunctionResponse]:
+    if not contents:
+        return None
+    for part in contents[-1].parts or []:
+        if part.function_response is not None:
+            return part.function_response
+    return None
+
+
+def _rellenar(valor: Any, variables: Dict[str, str]) -> Any:
+    if isinstance(valor, str):
+        for nombre, reemplazo in variables.items():
+            valor = valor.replace("{" + nombre + "}", reemplazo)
+        return valor
+    if isinstance(valor, dict):
+        return {k: _rellenar(v, variables) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_rellenar(v, variables) for v in valor]
+    return valor
+
+
+class FakeLlm(BaseLlm):
+    """
+    Modelo guionado para un agente concreto.
+
+    El nombre del agente se fija con `for_agent` (el `LlmRequest` no lo trae).
+    """
+
+    model: str = "fake/datar"
+
+    _agent: str = PrivateAttr(default="")
+
+    def for_agent(self, agent: str) -> "FakeLlm":
+        self._agent = agent
+        return self
+
+    def _elegir_regla(self, llm_request: LlmRequest) -> dict:
+        script = load_script()
+        reglas = script.get(self._agent) or script.get("*") or [{"text": "..."}]
+        respuesta_herramienta = _ultima_respuesta_herramienta(llm_request.contents)
+        texto_usuario = _ultimo_texto_usuario(llm_request.contents)
+
+        for regla in reglas:
+            despues_de = regla.get("after_tool")
+            if respuesta_herramienta is not None:
+                if despues_de in ("*", respuesta_herramienta.name):
+                    return regla
+                continue
+            if despues_de is not None:
+                continue
+            patron = regla.get("match")
+            if patron is None or re.search(patron, texto_usuario, re.IGNORECASE):
+                return regla
+        # Sin regla aplicable después de una herramienta: cerrar el turno con texto
+        return {"text": "Listo."}
+
+    def _respuesta(self, regla: dict, llm_request: LlmRequest) -> LlmResponse:
+        respuesta_herramienta = _ultima_respuesta_herramienta(llm_request.contents)
+        variables = {
+            "agent": self._agent,
+            "user_text": _ultimo_texto_usuario(llm_request.contents),
+            "tool_response": "",
+        }
+        if respuesta_herramienta is not None:
+            resultado = respuesta_herramienta.response or {}
+            variables["tool_response"] = str(resultado.get("result", resultado))
+
+        if "call" in regla:
+            part = types.Part(function_call=types.FunctionCall(
+                id=f"fake-{uuid.uuid4().hex[:12]}",
+                name=regla["call"],
+                args=_rellenar(regla.get("args", {}), variables),
+            ))
+        else:
+            part = types.Part(text=_rellenar(regla.get("text", ""), variables))
+        return LlmResponse(content=types.Content(role="model", parts=[part]))
+
+    @override
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        grabadas = load_recording()
+        if grabadas:
+            registro = grabadas.get(cache_key(self.model, llm_request))
+            if registro is not None:
+                for datos in registro:
+                    yield LlmResponse.model_validate(datos)
+                return
+
+        regla = self._elegir_regla(llm_request)
+        latencia = regla.get("latency_ms")
+        espera = latencia / 1000.0 if latencia is not None else _env_ms(FAKE_LATENCY_ENV)
+        espera += random.uniform(0.0, _env_ms(FAKE_JITTER_ENV))
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+        respuesta = self._respuesta(regla, llm_request)
+        texto = respuesta.content.parts[0].text
+        if stream and texto:
+            # Fragmentos parciales palabra por palabra, como haría el proveedor
+            pausa = _env_ms(FAKE_CHUNK_ENV)
+            for palabra in re.findall(r"\S+\s*", texto):
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=palabra)]),
+                    partial=True,
+                )
+                if pausa > 0:
+                    await asyncio.sleep(pausa)
+        yield respuesta
+
+
+class RecordingLiteLlm(LiteLlm):
+    """`LiteLlm` que agrega cada respuesta final a `DATAR_FAKE_LLM_RECORDING` para reproducirla con `FakeLlm`."""
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @override
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        # La clave se calcula antes de llamar al modelo (LiteLlm modifica la petición)
+        # y con el modelo falso, que es el que buscará la grabación al reproducir.
+        clave = cache_key(FakeLlm.model_fields["model"].default, llm_request)
+        finales = []
+        async for respuesta in super().generate_content_async(llm_request, stream):
+            if not respuesta.partial:
+                finales.append(respuesta.model_dump(mode="json", exclude_none=True))
+            yield respuesta
+
+        ruta = (os.getenv(FAKE_RECORDING_ENV) or "").strip()
+        if ruta and finales:
+            linea = json.dumps({"key": clave, "responses": finales}, ensure_ascii=False)
+            with self._lock, open(ruta, "a", encoding="utf-8") as f:
+                f.write(linea + "\n")
@@ -0,0 +1,286 @@
+"""
+Pasarela de peticiones a OpenRouter: concurrencia acotada, límite de tasa y reintentos.
+
+Cada `LiteLlm` llama a `litellm.acompletion` por su cuenta: con muchas sesiones
+a la vez, OpenRouter responde 429, cada instancia reintenta sin saber de las
+demás y la carga se convierte en una tormenta de reintentos. `GatewayLiteLLMClient`
+es el `llm_client` de todos los handles de `models_utils.get_llm` y pasa cada
+petición por una sola pasarela del proceso:
+
+- Semáforo de peticiones en curso (`OPENROUTER_MAX_IN_FLIGHT`, por defecto 32).
+  Con streaming, el permiso se conserva hasta que termina el stream.
+- Token bucket de peticiones por segundo (`OPENROUTER_RATE_LIMIT_RPS`, 0 sin
+  límite; ráfaga `OPENROUTER_RATE_LIMIT_BURST`).
+- Reintentos con backoff exponencial y jitter completo ante 429 y 5xx
+  (`OPENROUTER_MAX_RETRIES`, `OPENROUTER_BACKOFF_BASE`, `OPENROUTER_BACKOFF_MAX`,
+  en segundos). Es la única capa de reintentos: se desactivan los de LiteLLM y
+  del SDK de OpenAI. Un 429 pausa el bucket para todo el proceso durante `Retry-After`
+  (o el backoff), así las demás peticiones esperan en lugar de chocar también.
+
+Métricas (ver `metrics_utils`):
+- `datar_llm_gateway_queue_seconds{model}`: espera por el semáforo y el bucket.
+- `datar_llm_gateway_requests_total{model,outcome}`: `ok`, `error` o `retry_exhausted`.
+- `datar_llm_gateway_retries_total{model,status}`: reintentos por código HTTP.
+- Gauges `datar_llm_gateway_in_flight` y `datar_llm_gateway_waiting`.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
+
+from google.adk.models.lite_llm import LiteLLMClient
+
+from .agents_utils import get_settings
+from .metrics_utils import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_QUEUE_SECONDS = REGISTRY.histogram(
+    "datar_llm_gateway_queue_seconds",
+    "Espera de una petición al modelo por el semáforo de concurrencia y el límite de tasa.",
+)
+GATEWAY_REQUESTS = REGISTRY.counter(
+    "datar_llm_gateway_requests_total", "Peticiones al modelo por resultado final."
+)
+GATEWAY_RETRIES = REGISTRY.counter(
+    "datar_llm_gateway_retries_total", "Reintentos de peticiones al modelo por código HTTP."
+)
+
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _reintentable(error: BaseException) -> bool:
+    # Los plazos (timeout) no se reintentan: el plazo es el presupuesto del agente
+    status = _status(error)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Segundos de la cabecera `Retry-After` de la respuesta de error, si la trae."""
+    respuesta = getattr(error, "response", None)
+    cabeceras = getattr(respuesta, "headers", None)
+    if not cabeceras:
+        return None
+    try:
+        return max(0.0, float(cabeceras.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Límite de tasa compartido por todos los event loops del proceso.
+
+    Args:
+        rate: Peticiones por segundo (0 o menos: sin límite).
+        burst: Peticiones que se pueden hacer de golpe con el bucket lleno.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._actualizado = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def _reservar(self) -> float:
+        """Toma un token (aunque quede en deuda) y devuelve cuánto hay que esperar."""
+        with self._lock:
+            ahora = time.monotonic()
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (ahora - self._actualizado) * self.rate)
+            self._actualizado = ahora
+            espera = max(0.0, self._pausa_hasta - ahora)
+            if self.rate > 0:
+                self._tokens -= 1
+                if self._tokens < 0:
+                    espera = max(espera, -self._tokens / self.rate)
+            return espera
+
+    async def acquire(self) -> None:
+        espera = self._reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def pause(self, seconds: float) -> None:
+        """Detiene las peticiones nuevas de todo el proceso durante `seconds`."""
+        with self._lock:
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + seconds)
+
+
+class GatewayLiteLLMClient(LiteLLMClient):
+    """
+    `LiteLLMClient` que pasa las llamadas por la pasarela del proceso.
+
+    Se inyecta con `LiteLlm(model=..., llm_client=get_gateway_client())`.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        rate_limit_rps: float = 0.0,
+        rate_limit_burst: Optional[float] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate_limit_rps, rate_limit_burst or max(1.0, rate_limit_rps))
+        # asyncio.Semaphore pertenece a un event loop: uno por loop, con el mismo límite
+        self._semaforos: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _semaforo(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaforo = self._semaforos.get(loop)
+            if semaforo is None:
+                semaforo = self._semaforos[loop] = asyncio.Semaphore(self.max_in_flight)
+            return semaforo
+
+    def _contar(self, campo: str, delta: int) -> None:
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + delta)
+
+    def _backoff(self, intento: int, error: BaseException) -> float:
+        # Jitter completo: esperas aleatorias en [0, base * 2^intento] separan los reintentos
+        espera = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** intento))
+        sugerida = _retry_after(error)
+        if sugerida is not None:
+            espera = max(espera, min(self.backoff_max, sugerida))
+        return espera
+
+    async def _entrar(self, semaforo: asyncio.Semaphore, model: str) -> None:
+        inicio = time.perf_counter()
+        self._contar("waiting", 1)
+        try:
+            await semaforo.acquire()
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                semaforo.release()
+                raise
+        finally:
+            self._contar("waiting", -1)
+        self._contar("in_flight", 1)
+        GATEWAY_QUEUE_SECONDS.observe(time.perf_counter() - inicio, model=model)
+
+    def _salir(self, semaforo: asyncio.Semaphore) -> None:
+        self._contar("in_flight", -1)
+        semaforo.release()
+
+    async def _intento(
+        self, semaforo: asyncio.Semaphore, model: Any, messages: Any, tools: Any, **kwargs: Any
+    ) -> Any:
+        """
+        Una petición con permiso de la pasarela.
+
+        El permiso se libera en `finally`, también si la llamada se cancela
+        (`asyncio.CancelledError` no es `Exception`): `DeadlineParallelAgent`
+        cancela las ramas tardías y los clientes SSE se desconectan. Con
+        streaming, el permiso pasa a `_stream` y se libera al cerrarse el stream.
+        """
+        # Import local: models_utils importa este módulo
+        from .models_utils import get_http_clients
+
+        get_http_clients()
+        await self._entrar(semaforo, str(model))
+        liberar = True
+        try:
+            respuesta = await super().acompletion(model=model, messages=messages, tools=tools, **kwargs)
+            if kwargs.get("stream"):
+                liberar = False
+                return self._stream(respuesta, semaforo)
+            return respuesta
+        finally:
+            if liberar:
+                self._salir(semaforo)
+
+    async def acompletion(self, model: Any, messages: Any, tools: Any, **kwargs: Any) -> Any:
+        nombre = str(model)
+        semaforo = self._semaforo()
+        # La pasarela es la única capa de reintentos: sin ella, los del SDK de
+        # OpenAI (`max_retries`) y de LiteLLM (`num_retries`) multiplican cada
+        # reintento justo cuando OpenRouter pide bajar la carga
+        kwargs["max_retries"] = 0
+        kwargs["num_retries"] = 0
+        intento = 0
+        while True:
+            try:
+                respuesta = await self._intento(semaforo, model, messages, tools, **kwargs)
+            except Exception as error:
+                if not _reintentable(error):
+                    GATEWAY_REQUESTS.inc(model=nombre, outcome="error")
+                    raise
+                if intento >= self.max_retries:
+                    GATEWAY_REQUESTS.inc(model=nombre, outcome="retry_exhausted")
+                    raise
+                espera = self._backoff(intento, error)
+                status = _status(error)
+                if status == 429:
+                    self.bucket.pause(espera)
+                GATEWAY_RETRIES.inc(model=nombre, status=str(status))
+                logger.warning(
+                    "OpenRouter respondió %s para %s; reintento %d/%d en %.2fs",
+                    status, nombre, intento + 1, self.max_retries, espera,
+                    extra={"model": nombre, "status": status},
+                )
+                intento += 1
+                await asyncio.sleep(espera)
+                continue
+
+            GATEWAY_REQUESTS.inc(model=nombre, outcome="ok")
+            return respuesta
+
+    async def _stream(self, stream: Any, semaforo: asyncio.Semaphore) -> AsyncIterator[Any]:
+        """
+        Entrega el stream y libera el permiso cuando termina, falla o se cierra.
+
+        El `finally` cubre también `GeneratorExit` (el consumidor llama a
+        `aclose()` o abandona el stream) y la cancelación de la tarea que lo lee.
+        """
+        try:
+            async for fragmento in stream:
+                yield fragmento
+        finally:
+            self._salir(semaforo)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            return {"datar_llm_gateway_in_flight": self.in_flight, "datar_llm_gateway_waiting": self.waiting}
+
+
+@lru_cache(maxsize=1)
+def get_gateway_client() -> GatewayLiteLLMClient:
+    """
+    Devuelve (y crea la primera vez) la pasarela del proceso, configurada por entorno.
+
+    Raises:
+        ConfigError: Si una variable `OPENROUTER_*` de la pasarela no es un número válido.
+    """
+    settings = get_settings()
+    cliente = GatewayLiteLLMClient(
+        max_in_flight=settings.openrouter_max_in_flight,
+        rate_limit_rps=settings.openrouter_rate_limit_rps,
+        rate_limit_burst=settings.openrouter_rate_limit_burst,
+        max_retries=settings.openrouter_max_retries,
+        backoff_base=settings.openrouter_backoff_base,
+        backoff_max=settings.openrouter_backoff_max,
+    )
+    REGISTRY.register_collector(cliente.metrics)
+    return cliente
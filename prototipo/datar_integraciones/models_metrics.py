@@ -0,0 +1,142 @@
+"""
+Métricas de uso de modelos por agente, modelo y nivel (costo y latencia).
+
+Con niveles de modelo por agente (ver `models_utils.agent_model_spec`) conviene
+ver cuánto cuesta y cuánto tarda cada uno. `ModelUsagePlugin` se registra en
+`App(plugins=[...])` y, por cada llamada al modelo, registra con las etiquetas
+`agent`, `model` y `tier`:
+- `datar_llm_calls_total{outcome}`: `ok`, `error` o `cache_hit` (respuesta de
+  `CachedLiteLlm`, sin llamada a OpenRouter).
+- `datar_llm_call_seconds`: duración de la llamada hasta la respuesta completa.
+- `datar_llm_tokens_total{kind}`: tokens `prompt` y `completion` según `usage_metadata`.
+- `datar_llm_cost_usd_total`: costo estimado con la tabla de precios de LiteLLM
+  (si el modelo no está en la tabla, no se registra costo).
+
+Las transferencias directas del pre-enrutador (`agents_router.py`) no llaman al
+modelo y no se cuentan.
+"""
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+from .agents_utils import ConfigError
+from .metrics_utils import REGISTRY
+from .models_utils import agent_model_spec
+
+logger = logging.getLogger(__name__)
+
+LLM_CALLS = REGISTRY.counter(
+    "datar_llm_calls_total", "Llamadas al modelo por agente, modelo, nivel y resultado."
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "datar_llm_call_seconds", "Duración de las llamadas al modelo por agente, modelo y nivel."
+)
+LLM_TOKENS = REGISTRY.counter(
+    "datar_llm_tokens_total", "Tokens de entrada (prompt) y salida (completion) por agente, modelo y nivel."
+)
+LLM_COST = REGISTRY.counter(
+    "datar_llm_cost_usd_total", "Costo estimado en USD por agente, modelo y nivel (precios de LiteLLM)."
+)
+
+# Llamadas en curso que se recuerdan como máximo (una llamada que termina con
+# excepción fuera del modelo no pasa por after_model_callback)
+_MAX_LLAMADAS = 1024
+
+
+@lru_cache(maxsize=None)
+def _nivel(agent: str) -> str:
+    try:
+        return agent_model_spec(agent)["tier"]
+    except ConfigError:
+        return ""
+
+
+@lru_cache(maxsize=None)
+def _precios(model: str) -> Optional[Tuple[float, float]]:
+    """Precio por token (entrada, salida) de la tabla de LiteLLM, o None si no está."""
+    # Import diferido: importar litellm tarda varios segundos y el plugin se
+    # crea al importar el agente raíz
+    import litellm
+
+    try:
+        return litellm.cost_per_token(model=model, prompt_tokens=1, completion_tokens=1)
+    except Exception:
+        logger.debug("Sin precio en LiteLLM para %s", model)
+        return None
+
+
+class ModelUsagePlugin(BasePlugin):
+    """Plugin de App que registra llamadas, latencia, tokens y costo por modelo."""
+
+    def __init__(self, name: str = "datar_model_usage"):
+        super().__init__(name=name)
+        # (invocation_id, agente) -> (inicio, modelo) de la llamada al modelo en curso;
+        # after_model_callback no recibe el LlmRequest
+        self._llamadas: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+    async def after_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> None:
+        invocacion = invocation_context.invocation_id
+        for clave in [clave for clave in self._llamadas if clave[0] == invocacion]:
+            del self._llamadas[clave]
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        if len(self._llamadas) >= _MAX_LLAMADAS:
+            self._llamadas.pop(next(iter(self._llamadas)))
+        clave = (callback_context.invocation_id, callback_context.agent_name)
+        self._llamadas[clave] = (time.perf_counter(), llm_request.model or "")
+        return None
+
+    def _terminar(self, callback_context: CallbackContext) -> Tuple[Optional[float], Dict[str, str]]:
+        """Saca la llamada en curso y devuelve (duración o None, etiquetas)."""
+        agente = callback_context.agent_name
+        inicio, modelo = self._llamadas.pop((callback_context.invocation_id, agente), (None, ""))
+        duracion = time.perf_counter() - inicio if inicio is not None else None
+        return duracion, {"agent": agente, "model": modelo, "tier": _nivel(agente)}
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        metadatos = llm_response.custom_metadata or {}
+        if llm_response.partial or "router" in metadatos:
+            return None
+        duracion, etiquetas = self._terminar(callback_context)
+
+        if metadatos.get("llm_cache") == "hit":
+            LLM_CALLS.inc(outcome="cache_hit", **etiquetas)
+            return None
+        LLM_CALLS.inc(outcome="error" if llm_response.error_code else "ok", **etiquetas)
+        if duracion is not None:
+            LLM_CALL_SECONDS.observe(duracion, **etiquetas)
+
+        uso = llm_response.usage_metadata
+        if uso is None:
+            return None
+        # completion_tokens de OpenRouter ya incluye los tokens de razonamiento
+        entrada = uso.prompt_token_count or 0
+        salida = uso.candidates_token_count or 0
+        LLM_TOKENS.inc(entrada, kind="prompt", **etiquetas)
+        LLM_TOKENS.inc(salida, kind="completion", **etiquetas)
+        precios = _precios(etiquetas["model"]) if etiquetas["model"] else None
+        if precios is not None:
+            LLM_COST.inc(entrada * precios[0] + salida * precios[1], **etiquetas)
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        duracion, etiquetas = self._terminar(callback_context)
+        LLM_CALLS.inc(outcome="error", **etiquetas)
+        if duracion is not None:
+            LLM_CALL_SECONDS.observe(duracion, **etiquetas)
+        return None
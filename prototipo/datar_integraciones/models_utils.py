@@ -0,0 +1,224 @@
+"""
+Fábrica compartida de modelos LiteLlm para los agentes DATAR.
+
+Antes cada módulo `Gente_*/agent.py` construía su propio `LiteLlm(...)` y volvía
+a leer la configuración de OpenRouter. Aquí se entregan handles de modelo que
+comparten un único cliente HTTP con pool de conexiones, keep-alive y HTTP/2
+(si el paquete `h2` está instalado), de modo que las sesiones concurrentes
+reutilizan las conexiones TLS abiertas hacia OpenRouter en lugar de abrir una
+por agente y por turno.
+
+Variables de entorno opcionales:
+- `OPENROUTER_MAX_CONNECTIONS`: conexiones simultáneas máximas (por defecto 100).
+- `OPENROUTER_MAX_KEEPALIVE`: conexiones inactivas que se mantienen abiertas (por defecto 20).
+- `OPENROUTER_KEEPALIVE_EXPIRY`: segundos que se mantiene viva una conexión inactiva (por defecto 60).
+- `OPENROUTER_MAX_IN_FLIGHT`, `OPENROUTER_RATE_LIMIT_RPS` y los reintentos: ver
+  `models_gateway.py` (todas las peticiones pasan por una sola pasarela del proceso).
+- `DATAR_LLM_CACHE`: "0"/"false"/"off" desactiva la caché de respuestas de todos los agentes.
+- `DATAR_LLM_BACKEND`: "openrouter" (por defecto), "fake" (modelo guionado sin red,
+  ver `models_fake.py`) o "record" (OpenRouter grabando respuestas para reproducirlas
+  después con "fake").
+
+Estas variables, como `DATAR_MODEL_TIER`, se leen con `agents_utils.get_settings()`:
+un valor desconocido lanza `ConfigError` en lugar de caer en OpenRouter. En pruebas,
+después de cambiarlas, llama a `reset_settings()` y `get_llm.cache_clear()`.
+
+Los agentes piden su modelo con `get_llm(agent="Gente_X")`. El modelo y sus
+parámetros salen de `AGENTS_REGISTRY["app"]["agents"]` (ver `agent_model_spec`):
+cada agente declara un nivel (`"fast"` para ayudantes baratos, `"strong"` para los
+narrativos) y, si hace falta, su propio `max_output_tokens`, `temperature` y
+`timeout_seconds`. `DATAR_MODEL_TIER` fuerza un nivel para todos los agentes (por
+ejemplo `strong` para comparar calidad).
+
+Si el agente tiene una entrada en `AGENTS_REGISTRY["app"]["llm_cache"]`, recibe un
+`CachedLiteLlm` propio con esa configuración de caché (ver `models_cache.py`); si
+no, recibe el handle compartido de su modelo y parámetros.
+"""
+import importlib.util
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.lite_llm import LiteLlm
+
+from .agents_registry import AGENTS_REGISTRY
+from .agents_utils import ConfigError, get_openrouter_config, get_settings
+from .models_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS, CachedLiteLlm, ResponseCache
+from .models_fake import FakeLlm, RecordingLiteLlm
+from .models_gateway import get_gateway_client
+
+DEFAULT_MODEL = "openrouter/minimax/minimax-m2"
+DEFAULT_TIER = "strong"
+
+# Claves de la especificación de un agente que se pasan a LiteLLM en cada llamada
+# (la configuración del `LlmRequest` del agente, si la define, tiene prioridad)
+_PARAMETROS_LLM = {
+    "max_output_tokens": "max_completion_tokens",
+    "temperature": "temperature",
+    "timeout_seconds": "timeout",
+}
+
+
+def _http_limits() -> httpx.Limits:
+    settings = get_settings()
+    return httpx.Limits(
+        max_connections=settings.openrouter_max_connections,
+        max_keepalive_connections=settings.openrouter_max_keepalive,
+        keepalive_expiry=settings.openrouter_keepalive_expiry,
+    )
+
+
+def _http2_disponible() -> bool:
+    # httpx solo habla HTTP/2 si está instalado el extra `httpx[http2]` (paquete h2)
+    return importlib.util.find_spec("h2") is not None
+
+
+@lru_cache(maxsize=1)
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Crea (una sola vez por proceso) los clientes HTTP compartidos y los registra en LiteLLM.
+
+    LiteLLM usa `litellm.client_session` y `litellm.aclient_session` al construir
+    los clientes compatibles con OpenAI (incluido OpenRouter), así que todas las
+    llamadas de todos los agentes comparten el mismo pool de conexiones.
+
+    Se llama en la primera petición (`GatewayLiteLLMClient`), no al crear los
+    handles: importar `litellm` tarda varios segundos y no debe pagarse al
+    importar el árbol de agentes (ver `LazyAgent`).
+
+    Returns:
+        Tupla (cliente síncrono, cliente asíncrono).
+    """
+    limites = _http_limits()
+    http2 = _http2_disponible()
+
+    cliente = httpx.Client(http2=http2, limits=limites)
+    cliente_async = httpx.AsyncClient(http2=http2, limits=limites)
+
+    import litellm
+
+    litellm.client_session = cliente
+    litellm.aclient_session = cliente_async
+    return cliente, cliente_async
+
+
+def agent_model_spec(agent: Optional[str]) -> Dict[str, Any]:
+    """
+    Especificación de modelo de un agente según el registro.
+
+    Combina, en orden de prioridad, la entrada del agente en
+    `AGENTS_REGISTRY["app"]["agents"]` y los valores de su nivel en
+    `AGENTS_REGISTRY["app"]["model_tiers"]`. Los agentes sin entrada usan el nivel
+    por defecto. `DATAR_MODEL_TIER` reemplaza el nivel de todos los agentes.
+
+    Args:
+        agent: Nombre del agente (None para el nivel por defecto).
+
+    Returns:
+        Dict con `tier`, `model` y, si están definidos, `max_output_tokens`,
+        `temperature` y `timeout_seconds`.
+
+    Raises:
+        ConfigError: Si el nivel pedido no existe en el registro, o si
+            `DATAR_MODEL_TIER` tiene un valor desconocido.
+    """
+    app = AGENTS_REGISTRY["app"]
+    niveles = app.get("model_tiers", {})
+    propia = dict(app.get("agents", {}).get(agent or "", {}))
+
+    forzado = get_settings().model_tier
+    nivel = forzado or propia.pop("tier", DEFAULT_TIER)
+    if forzado:
+        # El nivel forzado define modelo, límite de tokens y plazo; solo se conserva la temperatura
+        propia = {"temperature": propia["temperature"]} if "temperature" in propia else {}
+    if nivel not in niveles:
+        raise ConfigError(
+            f"Nivel de modelo desconocido para {agent or 'el agente'}: {nivel!r}. "
+            f"Valores válidos: {', '.join(sorted(niveles)) or '(ninguno)'}."
+        )
+
+    spec = {"model": DEFAULT_MODEL, **niveles[nivel], **propia}
+    spec["tier"] = nivel
+    return spec
+
+
+def _parametros_llm(spec: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(
+        (destino, spec[clave]) for clave, destino in _PARAMETROS_LLM.items() if spec.get(clave) is not None
+    )
+
+
+@lru_cache(maxsize=None)
+def _shared_llm(model: str, parametros: Tuple[Tuple[str, Any], ...] = (), backend: str = "openrouter") -> LiteLlm:
+    """Handle sin caché compartido por todos los agentes que usan `model` con los mismos parámetros."""
+    config = get_openrouter_config()
+    clase = RecordingLiteLlm if backend == "record" else LiteLlm
+    return clase(
+        model=model,
+        api_key=config.api_key,
+        api_base=config.api_base,
+        llm_client=get_gateway_client(),
+        **dict(parametros),
+    )
+
+
+def _llm_cache_config(agent: str) -> Optional[dict]:
+    """Configuración de caché del agente en el registro, o None si no la tiene o está apagada."""
+    settings = get_settings()
+    if not settings.llm_cache:
+        return None
+    if settings.llm_backend != "openrouter":
+        # Al grabar o simular, cada petición debe llegar al modelo
+        return None
+    return AGENTS_REGISTRY["app"].get("llm_cache", {}).get(agent)
+
+
+@lru_cache(maxsize=None)
+def get_llm(model: Optional[str] = None, agent: Optional[str] = None) -> BaseLlm:
+    """
+    Devuelve el handle `LiteLlm` de un agente.
+
+    El modelo, `max_output_tokens`, `temperature` y `timeout_seconds` salen de la
+    especificación del agente en el registro (`agent_model_spec`). Todos los
+    agentes con el mismo modelo y parámetros (y sin caché) reciben la misma
+    instancia; la configuración de OpenRouter se resuelve una sola vez.
+
+    Args:
+        model: Identificador del modelo en formato LiteLLM (por ejemplo
+            "openrouter/minimax/minimax-m2"); si se indica, reemplaza al del registro.
+        agent: Nombre del agente que usará el modelo; si tiene caché habilitada
+            en el registro, recibe una instancia propia con caché. Con
+            `DATAR_LLM_BACKEND=fake` define qué guion responde.
+
+    Returns:
+        Instancia de LiteLlm respaldada por el cliente HTTP compartido, o un
+        `FakeLlm` si `DATAR_LLM_BACKEND=fake`.
+
+    Raises:
+        ConfigError: Si el nivel de modelo del agente no existe en el registro, o si
+            `DATAR_LLM_BACKEND`, `DATAR_MODEL_TIER` o `DATAR_LLM_CACHE` tienen un valor desconocido.
+    """
+    spec = agent_model_spec(agent)
+    backend = get_settings().llm_backend
+    if backend == "fake":
+        return FakeLlm().for_agent(agent or "*")
+
+    model = model or spec["model"]
+    parametros = _parametros_llm(spec)
+    cache_config = _llm_cache_config(agent) if agent else None
+    if cache_config is None:
+        return _shared_llm(model, parametros, backend)
+
+    config = get_openrouter_config()
+    cache = ResponseCache(
+        ttl_seconds=float(cache_config.get("ttl_seconds", DEFAULT_TTL_SECONDS)),
+        max_entries=int(cache_config.get("max_entries", DEFAULT_MAX_ENTRIES)),
+    )
+    return CachedLiteLlm(
+        model=model,
+        api_key=config.api_key,
+        api_base=config.api_base,
+        llm_client=get_gateway_client(),
+        **dict(parametros),
+    ).configure_cache(cache, agent)
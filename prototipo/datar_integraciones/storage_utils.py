@@ -1,105 +1,822 @@
 """
-Utilidades para guardar archivos generados por los agentes en Google Cloud Storage.
+Utilidades para publicar los archivos generados por los agentes (Cloud Storage o disco local).
 
 Diseño:
-- El bucket se toma de la variable de entorno `MEDIA_BUCKET_NAME`.
-- Opcionalmente se puede definir `MEDIA_PUBLIC_BASE_URL` para personalizar la URL base
+- `MEDIA_STORAGE_BACKEND` elige dónde se guardan los medios: "gcs" (por defecto,
+  Google Cloud Storage) o "local" (un directorio del sistema de archivos). Todas las
+  funciones de este módulo delegan en `get_backend()`, así que las herramientas no
+  cambian al cambiar de backend.
+- Backend "gcs": el bucket se toma de la variable de entorno `MEDIA_BUCKET_NAME`
+  (leída una sola vez por proceso a través de `agents_utils.get_settings()`).
+  Opcionalmente se puede definir `MEDIA_PUBLIC_BASE_URL` para personalizar la URL base
   pública (por ejemplo, detrás de un CDN). Si no se define, se usa:
   https://storage.googleapis.com/<bucket>/<ruta_objeto>
+- Backend "local": los objetos se escriben bajo `MEDIA_LOCAL_DIR` y sus URLs se
+  construyen con `MEDIA_LOCAL_BASE_URL` (por ejemplo "http://localhost:8001" si se
+  sirve el directorio con `python -m http.server 8001 --directory <dir>`); si no se
+  define, se usan URLs `file://`. No necesita credenciales ni red, y permite medir
+  render + publicación o correr pruebas de carga sin un bucket real.
 
 Estas funciones están pensadas para usarse desde los agentes `Gente_*` que generan
-archivos `.wav` y `.png` (Pasto, Sonora, Intuitiva, Bosque). En caso de cualquier
-error al subir a Storage, los agentes deben capturar la excepción y devolver al
-menos la ruta local del archivo para no romper la experiencia.
+archivos `.wav` y `.png` (Pasto, Sonora, Intuitiva, Bosque), normalmente a través de
+`media_utils.publish_media`, que publica los medios desde memoria sin archivos
+temporales. En caso de cualquier error al publicar (backend sin configurar, cola
+llena), los agentes deben capturar la excepción y responder sin la URL para no
+romper la experiencia.
+
+Cola de subida en segundo plano:
+- `get_upload_queue()` devuelve una cola compartida respaldada por un pool de hilos
+  acotado. Las herramientas encolan bytes o archivos y reciben de inmediato la URL
+  pública final (el nombre del objeto es determinista), sin bloquear el turno del LLM
+  durante la subida. Si lo necesitan, pueden esperar el resultado con
+  `ticket.result()` o `await ticket.wait()`.
+- `upload_many()` publica varios objetos de una vez (por ejemplo un WAV y su
+  espectrograma) en paralelo sobre la misma cola y devuelve un resultado por objeto,
+  en orden, con la URL o el error de cada uno.
+- `MEDIA_UPLOAD_WORKERS` (por defecto 4) fija el número de hilos y
+  `MEDIA_UPLOAD_MAX_PENDING` (por defecto 32) el máximo de subidas pendientes; al
+  alcanzarlo, `enqueue_*` lanza `UploadQueueFull` en lugar de esperar. Las
+  herramientas síncronas de clase `light` corren en el event loop: esperar un
+  lugar ahí detendría todas las sesiones del proceso.
+- Cada subida registra su duración en la fase "upload" de la herramienta que la
+  encoló (`datar_tool_duration_seconds`) y sus fallos en
+  `datar_tool_upload_errors_total` (ver `metrics_utils`).
+
+Cliente de Cloud Storage:
+- Se usa un único `storage.Client` por proceso (el descubrimiento de credenciales y
+  la conexión se hacen una sola vez) con un pool HTTP de `MEDIA_GCS_POOL_SIZE`
+  conexiones (por defecto 16).
+- Los objetos mayores que `MEDIA_UPLOAD_CHUNK_SIZE` bytes (por defecto 4 MiB; se
+  redondea a múltiplos de 256 KiB) se suben con subida reanudable por bloques.
+- Las subidas se reintentan con backoff exponencial ante errores transitorios.
+- `google-cloud-storage` se importa solo al crear el backend "gcs".
+
+Nombres por contenido (content-addressed):
+- `content_addressed_path()` inserta en el nombre del objeto un hash SHA-256 de sus
+  bytes, de modo que dos renders idénticos comparten objeto y URL.
+- Estos objetos son inmutables: se suben con `IMMUTABLE_CACHE_CONTROL` para que
+  navegadores y CDN los guarden un año, y solo se crean si no existen
+  (`if_generation_match=0` en Cloud Storage).
+- Con `skip_if_exists=True` la cola no vuelve a subir un objeto que ya existe: primero
+  consulta una caché local de objetos conocidos y, si no está, `backend.exists()`.
 """
 
+import asyncio
+import hashlib
+import io
+import logging
 import os
-from typing import Optional
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Union
+
+from .agents_utils import (
+    MEDIA_BUCKET_ENV,
+    MEDIA_STORAGE_BACKEND_ENV,
+    ConfigError,
+    get_settings,
+)
+from .metrics_utils import TOOL_UPLOAD_ERRORS, current_tool, record_tool_phase
+
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+# Granularidad exigida por Cloud Storage para el tamaño de bloque de subidas reanudables
+_CHUNK_GRANULARIDAD = 256 * 1024
+
+# Cabecera para objetos con nombre por contenido: su contenido nunca cambia
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Caracteres hexadecimales del SHA-256 que se usan en el nombre (128 bits)
+_HASH_LONGITUD = 32
+
+# Máximo de rutas recordadas por la caché local de existencia
+_CACHE_EXISTENCIA_MAX = 4096
+
+logger = logging.getLogger(__name__)
+
+
+class StorageBackend(ABC):
+    """
+    Destino donde se publican los medios.
+
+    Las implementaciones deben ser seguras para usarse desde varios hilos (la
+    cola de subidas las invoca en paralelo).
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def public_url(self, destination_path: str) -> str:
+        """Devuelve la URL pública que tendrá `destination_path`."""
+
+    @abstractmethod
+    def exists(self, destination_path: str) -> bool:
+        """Indica si el objeto ya existe."""
+
+    @abstractmethod
+    def upload_bytes(
+        self,
+        data: memoryview,
+        destination_path: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        if_absent: bool = False,
+    ) -> None:
+        """
+        Guarda datos en memoria.
+
+        Con `if_absent=True` un objeto ya existente no se sobrescribe ni se
+        considera un error.
+        """
+
+    @abstractmethod
+    def upload_file(
+        self,
+        local_path: str,
+        destination_path: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ) -> None:
+        """Guarda un archivo existente en disco."""
+
+
+class _MemoryviewReader(io.RawIOBase):
+    """
+    Lector de archivo sobre un `memoryview`, sin copiar el buffer completo.
+
+    `blob.upload_from_file` solo necesita `read`/`seek`/`tell`; cada lectura copia
+    únicamente el bloque que se envía por la red.
+    """
+
+    def __init__(self, data: memoryview):
+        self._data = data.cast("B") if data.format != "B" else data
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._data)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        n = max(0, min(len(buffer), len(self._data) - self._pos))
+        buffer[:n] = self._data[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+class GCSBackend(StorageBackend):
+    """
+    Backend de Google Cloud Storage.
 
-from google.cloud import storage
+    Usa un único `storage.Client` con pool HTTP ampliado, subidas reanudables por
+    bloques para objetos grandes y reintentos con backoff exponencial.
+    """
+
+    name = "gcs"
+
+    def __init__(
+        self,
+        bucket_name: str,
+        public_base_url: Optional[str] = None,
+        chunk_size: int = 4 * 1024 * 1024,
+        pool_size: int = 16,
+    ):
+        from google.cloud import storage
+        from google.cloud.storage.retry import DEFAULT_RETRY
+        from requests.adapters import HTTPAdapter
+
+        self.bucket_name = bucket_name
+        self._base_url = (public_base_url or f"https://storage.googleapis.com/{bucket_name}").rstrip("/")
+        self._chunk_size = max(_CHUNK_GRANULARIDAD, chunk_size - chunk_size % _CHUNK_GRANULARIDAD)
+
+        # El pool HTTP por defecto de `requests` (10 conexiones) se reemplaza por uno
+        # de `pool_size` conexiones para que los hilos de la cola de subidas no
+        # compitan por conexiones ni abran conexiones nuevas en cada subida.
+        self.client = storage.Client()
+        self.client._http.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self._bucket = self.client.bucket(bucket_name)
+
+        self._exists_retry = DEFAULT_RETRY
+        # Backoff exponencial (0.5s, 1s, 2s... hasta 8s) con un límite total de 60s por subida.
+        # Se pasa explícitamente porque, sin precondiciones, las subidas no se reintentan por defecto.
+        self._upload_retry = DEFAULT_RETRY.with_delay(
+            initial=0.5, maximum=8.0, multiplier=2.0
+        ).with_deadline(60.0)
+
+    def public_url(self, destination_path: str) -> str:
+        # Las políticas de acceso (público/privado) se controlan a nivel de bucket/IAM.
+        return f"{self._base_url}/{destination_path.lstrip('/')}"
+
+    def _get_blob(
+        self,
+        destination_path: str,
+        size: int,
+        content_type: Optional[str],
+        cache_control: Optional[str],
+    ) -> "storage.Blob":
+        """Prepara el blob destino; activa la subida reanudable por bloques si `size` lo amerita."""
+        chunk_size = self._chunk_size if size > self._chunk_size else None
+        blob = self._bucket.blob(destination_path, chunk_size=chunk_size)
+        if content_type:
+            blob.content_type = content_type
+        if cache_control:
+            blob.cache_control = cache_control
+        return blob
+
+    def exists(self, destination_path: str) -> bool:
+        return self._bucket.blob(destination_path).exists(retry=self._exists_retry)
+
+    def upload_bytes(
+        self,
+        data: memoryview,
+        destination_path: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        if_absent: bool = False,
+    ) -> None:
+        from google.api_core.exceptions import PreconditionFailed
+
+        blob = self._get_blob(destination_path, data.nbytes, content_type, cache_control)
+        try:
+            blob.upload_from_file(
+                _MemoryviewReader(data),
+                size=data.nbytes,
+                content_type=content_type or "application/octet-stream",
+                if_generation_match=0 if if_absent else None,
+                retry=self._upload_retry,
+            )
+        except PreconditionFailed:
+            if not if_absent:
+                raise
+            # Otra réplica (o un reintento) ya lo creó; el contenido es el mismo.
+
+    def upload_file(
+        self,
+        local_path: str,
+        destination_path: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ) -> None:
+        blob = self._get_blob(destination_path, os.path.getsize(local_path), content_type, cache_control)
+        blob.upload_from_filename(local_path, content_type=content_type, retry=self._upload_retry)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Backend que guarda los medios en un directorio local.
+
+    Las escrituras son atómicas (archivo temporal en el mismo directorio +
+    `os.replace`), así que un lector nunca ve un archivo a medio escribir.
+    `content_type` y `cache_control` no se guardan: los decide quien sirva el directorio.
+    """
+
+    name = "local"
 
-MEDIA_BUCKET_ENV = "MEDIA_BUCKET_NAME"
-MEDIA_BASE_URL_ENV = "MEDIA_PUBLIC_BASE_URL"
+    def __init__(self, root_dir: Union[str, Path], public_base_url: Optional[str] = None):
+        self.root_dir = Path(root_dir).expanduser().resolve()
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self._base_url = (public_base_url or self.root_dir.as_uri()).rstrip("/")
 
+    def _ruta(self, destination_path: str) -> Path:
+        ruta = (self.root_dir / destination_path.lstrip("/")).resolve()
+        if self.root_dir not in ruta.parents:
+            raise ValueError(f"Ruta destino fuera del directorio de medios: {destination_path!r}")
+        return ruta
 
-def _get_bucket_name() -> str:
-    bucket_name = os.getenv(MEDIA_BUCKET_ENV)
-    if not bucket_name:
-        raise RuntimeError(
-            f"La variable de entorno {MEDIA_BUCKET_ENV} no está configurada. "
-            "Configura el bucket de Cloud Storage donde se guardarán los medios."
+    def public_url(self, destination_path: str) -> str:
+        return f"{self._base_url}/{destination_path.lstrip('/')}"
+
+    def exists(self, destination_path: str) -> bool:
+        return self._ruta(destination_path).exists()
+
+    def _escribir(self, destino: Path, escribir: Callable[[io.BufferedWriter], None]) -> None:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=destino.parent, prefix=".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                escribir(f)
+            os.replace(temporal, destino)
+        except BaseException:
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+            raise
+
+    def upload_bytes(
+        self,
+        data: memoryview,
+        destination_path: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        if_absent: bool = False,
+    ) -> None:
+        destino = self._ruta(destination_path)
+        if if_absent and destino.exists():
+            return
+        self._escribir(destino, lambda f: f.write(data))
+
+    def upload_file(
+        self,
+        local_path: str,
+        destination_path: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ) -> None:
+        def copiar(f: io.BufferedWriter) -> None:
+            with open(local_path, "rb") as origen:
+                while bloque := origen.read(1024 * 1024):
+                    f.write(bloque)
+
+        self._escribir(self._ruta(destination_path), copiar)
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> StorageBackend:
+    """
+    Devuelve el backend de almacenamiento del proceso (se crea en el primer uso).
+
+    Raises:
+        RuntimeError: Si el backend es "gcs" y `MEDIA_BUCKET_NAME` no está configurada.
+        ConfigError: Si `MEDIA_STORAGE_BACKEND` tiene un valor desconocido.
+    """
+    settings = get_settings()
+    tipo = settings.media_storage_backend
+
+    if tipo == LocalBackend.name:
+        return LocalBackend(settings.media_local_dir, settings.media_local_base_url)
+
+    if tipo == GCSBackend.name:
+        if not settings.media_bucket_name:
+            raise RuntimeError(
+                f"La variable de entorno {MEDIA_BUCKET_ENV} no está configurada. "
+                "Configura el bucket de Cloud Storage donde se guardarán los medios "
+                f"o usa {MEDIA_STORAGE_BACKEND_ENV}=local."
+            )
+        return GCSBackend(
+            settings.media_bucket_name,
+            public_base_url=settings.media_public_base_url,
+            chunk_size=settings.media_upload_chunk_size,
+            pool_size=settings.media_gcs_pool_size,
         )
-    return bucket_name
+
+    raise ConfigError(
+        f"{MEDIA_STORAGE_BACKEND_ENV} debe ser 'gcs' o 'local' (valor: {tipo!r})."
+    )
+
+
+def reset_backend() -> None:
+    """Descarta el backend memorizado y la caché de existencia (útil en pruebas)."""
+    get_backend.cache_clear()
+    _objetos_existentes.clear()
+
+
+def public_url(destination_path: str) -> str:
+    """Devuelve la URL pública que tendrá `destination_path` en el backend activo."""
+    return get_backend().public_url(destination_path)
 
 
-def _get_public_base_url(bucket_name: Optional[str] = None) -> str:
+def content_addressed_path(destination_path: str, data: Union[bytes, memoryview]) -> str:
     """
-    Devuelve la URL base pública para los objetos del bucket.
+    Inserta el hash del contenido en el nombre del objeto, antes de la extensión.
 
-    Si `MEDIA_PUBLIC_BASE_URL` está definida, se usa tal cual (recortando `/` final).
-    En caso contrario, se usa el dominio estándar de Cloud Storage.
+    Ejemplo: "gente_bosque/cartografias/mapa_emocional_calma.png" se convierte en
+    "gente_bosque/cartografias/mapa_emocional_calma_<sha256[:32]>.png".
+
+    Args:
+        destination_path: Ruta destino legible, sin marca de tiempo.
+        data: Bytes del objeto.
+
+    Returns:
+        Ruta destino que depende únicamente del contenido.
+    """
+    digest = hashlib.sha256(memoryview(data)).hexdigest()[:_HASH_LONGITUD]
+    directorio, _, nombre = destination_path.rpartition("/")
+    base, punto, extension = nombre.rpartition(".")
+    if not punto:
+        base, extension = nombre, ""
+    nombre_final = f"{base}_{digest}{punto}{extension}"
+    return f"{directorio}/{nombre_final}" if directorio else nombre_final
+
+
+class _ExistenceCache:
+    """Conjunto acotado (LRU) de rutas que ya se sabe que existen en el backend."""
+
+    def __init__(self, max_entries: int = _CACHE_EXISTENCIA_MAX):
+        self._rutas: "OrderedDict[str, None]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def __contains__(self, destination_path: str) -> bool:
+        with self._lock:
+            if destination_path not in self._rutas:
+                return False
+            self._rutas.move_to_end(destination_path)
+            return True
+
+    def add(self, destination_path: str) -> None:
+        with self._lock:
+            self._rutas[destination_path] = None
+            self._rutas.move_to_end(destination_path)
+            while len(self._rutas) > self._max_entries:
+                self._rutas.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rutas.clear()
+
+
+_objetos_existentes = _ExistenceCache()
+
+
+def object_exists(destination_path: str) -> bool:
     """
-    base = os.getenv(MEDIA_BASE_URL_ENV)
-    if base:
-        return base.rstrip("/")
+    Indica si el objeto ya existe en el backend.
 
-    bucket_name = bucket_name or _get_bucket_name()
-    return f"https://storage.googleapis.com/{bucket_name}"
+    Consulta primero la caché local del proceso; solo si no está ahí pregunta al
+    backend (en GCS, una petición de metadatos), y recuerda la respuesta positiva.
+    """
+    if destination_path in _objetos_existentes:
+        return True
+    if get_backend().exists(destination_path):
+        _objetos_existentes.add(destination_path)
+        return True
+    return False
 
 
-def upload_file_to_gcs(
-    local_path: str, destination_path: str, content_type: Optional[str] = None
+def upload_file(
+    local_path: str,
+    destination_path: str,
+    content_type: Optional[str] = None,
+    cache_control: Optional[str] = None,
 ) -> str:
     """
-    Sube un archivo existente en disco a Cloud Storage y devuelve la URL pública.
+    Sube un archivo existente en disco al backend activo y devuelve la URL pública.
 
     Args:
         local_path: Ruta local del archivo a subir.
         destination_path: Ruta destino dentro del bucket (por ejemplo,
             "gente_sonora/audio/composicion_2025...wav").
         content_type: MIME type opcional (por ejemplo "audio/wav" o "image/png").
+        cache_control: Cabecera Cache-Control opcional del objeto.
 
     Returns:
-        URL HTTP que apunta al objeto en Cloud Storage.
+        URL HTTP que apunta al objeto publicado.
     """
-    bucket_name = _get_bucket_name()
+    backend = get_backend()
+    backend.upload_file(local_path, destination_path, content_type, cache_control)
+    return backend.public_url(destination_path)
 
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(destination_path)
 
-    if content_type:
-        blob.content_type = content_type
+def upload_bytes(
+    data: Union[bytes, memoryview],
+    destination_path: str,
+    content_type: Optional[str] = None,
+    cache_control: Optional[str] = None,
+    if_absent: bool = False,
+) -> str:
+    """
+    Sube datos en memoria (bytes o memoryview) al backend activo y devuelve la URL pública.
 
-    blob.upload_from_filename(local_path)
+    Útil para casos donde no se necesita escribir a disco primero. Un `memoryview`
+    (por ejemplo `io.BytesIO.getbuffer()`) se lee sin copiar el buffer completo.
 
-    # Las políticas de acceso (público/privado) se controlan a nivel de bucket/IAM.
-    base_url = _get_public_base_url(bucket_name)
-    return f"{base_url}/{destination_path.lstrip('/')}"
+    Args:
+        data: Contenido del objeto.
+        destination_path: Ruta destino dentro del bucket.
+        content_type: MIME type opcional.
+        cache_control: Cabecera Cache-Control opcional del objeto.
+        if_absent: Si es True, el objeto solo se crea si no existe; si ya existía
+            no se considera un error. Pensado para objetos con nombre por contenido.
+    """
+    backend = get_backend()
+    backend.upload_bytes(memoryview(data), destination_path, content_type, cache_control, if_absent)
+    _objetos_existentes.add(destination_path)
+    return backend.public_url(destination_path)
 
 
-def upload_bytes_to_gcs(
-    data: bytes,
-    destination_path: str,
-    content_type: Optional[str] = None,
-) -> str:
+# Nombres anteriores, conservados por compatibilidad (ahora usan el backend activo)
+upload_file_to_gcs = upload_file
+upload_bytes_to_gcs = upload_bytes
+
+
+class UploadQueueFull(RuntimeError):
+    """La cola de subidas alcanzó `MEDIA_UPLOAD_MAX_PENDING` subidas pendientes."""
+
+
+@dataclass
+class UploadTicket:
     """
-    Sube datos en memoria (bytes) a Cloud Storage y devuelve la URL pública.
+    Comprobante de una subida encolada.
 
-    Útil para casos donde no se necesita escribir a disco primero.
+    `url` está disponible de inmediato; el objeto existe en el bucket cuando
+    `future` termina sin error.
     """
-    bucket_name = _get_bucket_name()
+    url: str
+    destination_path: str
+    future: Future
 
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(destination_path)
+    def done(self) -> bool:
+        """Indica si la subida ya terminó (con éxito o con error)."""
+        return self.future.done()
 
-    if content_type:
-        blob.content_type = content_type
+    def result(self, timeout: Optional[float] = None) -> str:
+        """Espera (bloqueando) a que termine la subida y devuelve la URL; relanza el error si falló."""
+        return self.future.result(timeout)
 
-    blob.upload_from_string(data)
+    async def wait(self) -> str:
+        """Versión asíncrona de `result()` para herramientas `async`."""
+        return await asyncio.wrap_future(self.future)
 
-    base_url = _get_public_base_url(bucket_name)
-    return f"{base_url}/{destination_path.lstrip('/')}"
 
+class UploadQueue:
+    """
+    Cola de subidas al backend de almacenamiento atendida por un pool de hilos acotado.
+
+    Expone métricas de profundidad, throughput y fallos mediante `metrics()`.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="media-upload"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._inicio = time.monotonic()
+        self._pendientes = 0
+        self._encoladas = 0
+        self._completadas = 0
+        self._fallidas = 0
+        self._deduplicadas = 0
+        self._rechazadas = 0
+        self._bytes_subidos = 0
+        self._segundos_subiendo = 0.0
+
+    def enqueue_bytes(
+        self,
+        data: Union[bytes, memoryview],
+        destination_path: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        skip_if_exists: bool = False,
+    ) -> UploadTicket:
+        """
+        Encola la subida de datos en memoria y devuelve su ticket con la URL final.
+
+        Args:
+            cache_control: Cabecera Cache-Control opcional del objeto.
+            skip_if_exists: Si es True, no se sube un objeto que ya existe en el
+                bucket. Solo es correcto cuando el nombre depende del contenido
+                (ver `content_addressed_path`).
+
+        Raises:
+            RuntimeError: Si el backend no está configurado, por ejemplo sin
+                `MEDIA_BUCKET_NAME` con el backend "gcs" (se valida antes de encolar).
+            UploadQueueFull: Si la cola ya tiene `max_pending` subidas pendientes.
+        """
+        if skip_if_exists and destination_path in _objetos_existentes:
+            # Ya se subió (o se comprobó) en este proceso: ni siquiera se encola
+            url = public_url(destination_path)
+            with self._lock:
+                self._deduplicadas += 1
+            future: Future = Future()
+            future.set_result(url)
+            return UploadTicket(url=url, destination_path=destination_path, future=future)
+
+        def subir() -> bool:
+            if skip_if_exists and object_exists(destination_path):
+                return False
+            upload_bytes(
+                data,
+                destination_path,
+                content_type=content_type,
+                cache_control=cache_control,
+                if_absent=skip_if_exists,
+            )
+            return True
+
+        return self._submit(subir, destination_path, memoryview(data).nbytes)
+
+    def enqueue_file(
+        self,
+        local_path: str,
+        destination_path: str,
+        content_type: Optional[str] = None,
+        delete_after: bool = False,
+    ) -> UploadTicket:
+        """
+        Encola la subida de un archivo en disco.
+
+        Args:
+            delete_after: Si es True, el archivo local se elimina cuando termina
+                la subida (haya tenido éxito o no).
+
+        Raises:
+            RuntimeError: Si el backend no está configurado, por ejemplo sin
+                `MEDIA_BUCKET_NAME` con el backend "gcs" (se valida antes de encolar).
+            UploadQueueFull: Si la cola ya tiene `max_pending` subidas pendientes.
+        """
+        def subir() -> bool:
+            try:
+                upload_file(local_path, destination_path, content_type=content_type)
+                return True
+            finally:
+                if delete_after:
+                    try:
+                        os.unlink(local_path)
+                    except OSError:
+                        pass
+
+        return self._submit(subir, destination_path, os.path.getsize(local_path))
+
+    def _submit(
+        self, subir: Callable[[], bool], destination_path: str, tamano: int
+    ) -> UploadTicket:
+        # `subir` devuelve False cuando el objeto ya existía y no se envió nada
+        # La URL se calcula antes de encolar: valida la configuración del bucket
+        # de forma síncrona para que el error llegue a la herramienta.
+        url = public_url(destination_path)
+
+        # El hilo de la subida no hereda el contexto: la herramienta se captura aquí
+        herramienta = current_tool()
+
+        # Sin bloquear: quien encola puede estar en el event loop
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rechazadas += 1
+            raise UploadQueueFull(
+                f"La cola de subidas está llena ({self._max_pending} pendientes); "
+                f"no se encoló {destination_path}"
+            )
+        with self._lock:
+            self._pendientes += 1
+            self._encoladas += 1
+
+        def tarea() -> str:
+            inicio = time.monotonic()
+            try:
+                subido = subir()
+            except Exception:
+                with self._lock:
+                    self._fallidas += 1
+                if herramienta is not None:
+                    TOOL_UPLOAD_ERRORS.inc(tool=herramienta)
+                logger.exception("Falló la subida en segundo plano de %s", destination_path)
+                raise
+            else:
+                with self._lock:
+                    if subido:
+                        self._completadas += 1
+                        self._bytes_subidos += tamano
+                    else:
+                        self._deduplicadas += 1
+                return url
+            finally:
+                duracion = time.monotonic() - inicio
+                with self._lock:
+                    self._pendientes -= 1
+                    self._segundos_subiendo += duracion
+                self._slots.release()
+                record_tool_phase(herramienta, "upload", duracion)
+
+        try:
+            future = self._executor.submit(tarea)
+        except BaseException:
+            with self._lock:
+                self._pendientes -= 1
+            self._slots.release()
+            raise
+        return UploadTicket(url=url, destination_path=destination_path, future=future)
+
+    def metrics(self) -> dict:
+        """Devuelve profundidad, throughput, fallos, rechazos por cola llena y subidas evitadas por deduplicación."""
+        with self._lock:
+            transcurrido = max(time.monotonic() - self._inicio, 1e-9)
+            terminadas = self._completadas + self._fallidas
+            return {
+                "depth": self._pendientes,
+                "max_pending": self._max_pending,
+                "workers": self._max_workers,
+                "enqueued": self._encoladas,
+                "completed": self._completadas,
+                "failed": self._fallidas,
+                "deduplicated": self._deduplicadas,
+                "rejected": self._rechazadas,
+                "bytes_uploaded": self._bytes_subidos,
+                "uploads_per_second": self._completadas / transcurrido,
+                "bytes_per_second": self._bytes_subidos / transcurrido,
+                "mean_upload_seconds": self._segundos_subiendo / terminadas if terminadas else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el pool; con `wait=True` espera a que terminen las subidas pendientes."""
+        self._executor.shutdown(wait=wait)
+
+
+@lru_cache(maxsize=1)
+def get_upload_queue() -> UploadQueue:
+    """Devuelve la cola de subidas compartida del proceso (se crea en el primer uso)."""
+    settings = get_settings()
+    return UploadQueue(
+        max_workers=settings.media_upload_workers,
+        max_pending=settings.media_upload_max_pending,
+    )
+
+
+@dataclass
+class UploadRequest:
+    """Un objeto a publicar con `upload_many`."""
+    data: Union[bytes, memoryview]
+    destination_path: str
+    content_type: Optional[str] = None
+    cache_control: Optional[str] = None
+    skip_if_exists: bool = False
+
+
+@dataclass
+class UploadResult:
+    """Resultado de un objeto de `upload_many`: `url` si se publicó, `error` si falló."""
+    destination_path: str
+    url: Optional[str] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def upload_many(
+    items: Iterable[UploadRequest], timeout: Optional[float] = None
+) -> List[UploadResult]:
+    """
+    Publica varios objetos en paralelo y espera a que terminen todos.
+
+    Todos los objetos se encolan primero en la cola compartida (mismo cliente y
+    pool de conexiones), de modo que la latencia total es la de la subida más
+    lenta y no la suma de todas. Un fallo en un objeto no cancela los demás.
+
+    Args:
+        items: Objetos a publicar.
+        timeout: Segundos máximos de espera para el lote completo; los objetos que
+            no terminan a tiempo se reportan con `TimeoutError` (su subida sigue
+            en segundo plano).
+
+    Returns:
+        Un `UploadResult` por objeto, en el mismo orden que `items`.
+    """
+    cola = get_upload_queue()
+    limite = None if timeout is None else time.monotonic() + timeout
+
+    pendientes: List[Union[UploadTicket, BaseException]] = []
+    items = list(items)
+    for item in items:
+        try:
+            pendientes.append(cola.enqueue_bytes(
+                item.data,
+                item.destination_path,
+                content_type=item.content_type,
+                cache_control=item.cache_control,
+                skip_if_exists=item.skip_if_exists,
+            ))
+        except Exception as e:
+            pendientes.append(e)
 
+    resultados = []
+    for item, pendiente in zip(items, pendientes):
+        if isinstance(pendiente, BaseException):
+            resultados.append(UploadResult(item.destination_path, error=pendiente))
+            continue
+        restante = None if limite is None else max(0.0, limite - time.monotonic())
+        try:
+            url = pendiente.result(restante)
+        except FutureTimeoutError:
+            error = TimeoutError(f"La subida de {pendiente.destination_path} no terminó a tiempo")
+            resultados.append(UploadResult(pendiente.destination_path, error=error))
+        except Exception as e:
+            resultados.append(UploadResult(pendiente.destination_path, error=e))
+        else:
+            resultados.append(UploadResult(pendiente.destination_path, url=url))
+    return resultados
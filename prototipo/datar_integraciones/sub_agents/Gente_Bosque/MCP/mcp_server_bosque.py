@@ -4,8 +4,9 @@ from mcp.server.fastmcp import FastMCP
 import requests
 from bs4 import BeautifulSoup
 import fitz  # PyMuPDF
+import logging
 import os
-from datetime import datetime
+import sys
 try:
     import google.generativeai as genai
 except Exception:  # ImportError or module not available in this env
@@ -14,6 +15,14 @@ except Exception:  # ImportError or module not available in this env
 # Inicializa el servidor
 mcp = FastMCP("servidor_bosque")
 
+# stdout es el canal del protocolo MCP (transporte stdio): los registros van a stderr
+logging.basicConfig(
+    stream=sys.stderr,
+    level=os.getenv("DATAR_LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("servidor_bosque")
+
 if genai is not None:
     try:
         genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -39,8 +48,7 @@ FUENTES = {
 
 def log_uso(fuente, tipo):
     """Guarda registro de cada fuente usada."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Usando {tipo}: {fuente}", flush=True)
+    logger.info("Usando %s: %s", tipo, fuente)
 
 @mcp.tool()
 def leer_pagina(url: str) -> str:
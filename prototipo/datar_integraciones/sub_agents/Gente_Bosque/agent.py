@@ -1,26 +1,15 @@
 from google.adk.agents.llm_agent import Agent
-from google.adk.models.lite_llm import LiteLlm
-from google.adk.tools import FunctionTool
-from ...agents_utils import get_openrouter_config
+from ...models_utils import get_llm
+from ...agents_factory import agent_description, build_tools
 
 # Importar las herramientas nativas
 from .tools import inferir_especies, explorar_pdf, leer_pagina, explorar, crear_mapa_emocional
 
-config = get_openrouter_config()
-
 # Pasa las herramientas directamente en el constructor
 root_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent="Gente_Bosque"),
     name="Gente_Bosque",
-    description="""
-        Este agente está diseñado para despertar interés y curiosidad, basado en las sensaciones iniciales
-        que le produce un lugar. Su tono es descriptivo, informativo y curioso, con el objetivo de
-        abrir la percepción hacia la complejidad natural del bosque, puede sugerir preguntas filosóficas.
-    """,
+    description=agent_description("Gente_Bosque"),
     instruction="""
         Eres un agente diseñado para despertar la curiosidad del usuario sobre su entorno natural, especialmente
         sobre formas de vida poco notadas: plantas herbáceas, musgos, líquenes, hongos, microorganismos del suelo,
@@ -65,11 +54,11 @@ root_agent = Agent(
         No uses adjetivos con género como “tranquilo” o “nostálgico”.
 
     """,
-    tools=[
-        FunctionTool(inferir_especies),
-        FunctionTool(explorar_pdf),
-        FunctionTool(leer_pagina),
-        FunctionTool(explorar),
-        FunctionTool(crear_mapa_emocional)
-    ]
+    tools=build_tools("Gente_Bosque", [
+        inferir_especies,
+        explorar_pdf,
+        leer_pagina,
+        explorar,
+        crear_mapa_emocional,
+    ])
 )
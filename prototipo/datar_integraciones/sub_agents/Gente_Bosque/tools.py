@@ -2,12 +2,8 @@
 
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
 
-def log_uso(fuente, tipo):
-    """Guarda registro de cada fuente usada."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Usando {tipo}: {fuente}", flush=True)
+from ...logging_utils import log_uso
 
 def leer_pagina(url: str) -> str:
     """
@@ -231,7 +227,6 @@ def crear_mapa_emocional(descripcion: str) -> str:
     """
     import os
     import gc
-    from datetime import datetime
     import warnings
     import matplotlib
     matplotlib.use('Agg')  # Backend sin GUI para servidor
@@ -544,24 +539,21 @@ def crear_mapa_emocional(descripcion: str) -> str:
             color='#333333'
         )
 
-        # Generar nombre de archivo
-        filename = f"mapa_emocional_{emocion_detectada}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        # Generar nombre de archivo (el hash del contenido se agrega al publicar)
+        filename = f"mapa_emocional_{emocion_detectada}.png"
         
-        # Usar archivo temporal que se eliminará después de subir
-        import tempfile
+        # Codificar el PNG en memoria (sin archivo temporal) y publicarlo
+        from ...media_utils import figure_to_png, publish_media
         url_gcs = None
         error_gcs = None
         
         try:
-            # Crear archivo temporal
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                ruta_temp = temp_file.name
-                fig.savefig(
-                    ruta_temp,
-                    dpi=72,  # DPI reducido para optimizar memoria (72 DPI es suficiente para web)
-                    bbox_inches='tight',
-                    facecolor=color_fondo
-                )
+            png = figure_to_png(
+                fig,
+                dpi=72,  # DPI reducido para optimizar memoria (72 DPI es suficiente para web)
+                bbox_inches='tight',
+                facecolor=color_fondo
+            )
             
             # Cerrar la figura para liberar memoria
             plt.close(fig)
@@ -572,31 +564,12 @@ def crear_mapa_emocional(descripcion: str) -> str:
             del gdf_edificios
             gc.collect()  # Forzar garbage collection después de cerrar figuras
 
-            # Intentar subir el PNG a Cloud Storage
+            # Encolar la subida del PNG a Cloud Storage: la URL final se conoce de inmediato
             try:
-                from ... import storage_utils
-
                 destino_gcs = f"gente_bosque/cartografias/{filename}"
-                url_gcs = storage_utils.upload_file_to_gcs(
-                    ruta_temp,
-                    destino_gcs,
-                    content_type="image/png",
-                )
-                
-                # Eliminar archivo temporal después de subir
-                try:
-                    os.unlink(ruta_temp)
-                except:
-                    pass  # Ignorar errores al eliminar temporal
-                    
+                url_gcs = publish_media(png, destino_gcs, "image/png", content_addressed=True)
             except Exception as e:
                 error_gcs = str(e)
-                # Intentar eliminar temporal incluso si falló la subida
-                try:
-                    if 'ruta_temp' in locals():
-                        os.unlink(ruta_temp)
-                except:
-                    pass
         except Exception as e:
             plt.close(fig)
             plt.close('all')
@@ -1,16 +1,19 @@
+"""
+Gente_Compostada: dos perspectivas en paralelo (compost y territorio) y un
+agente que las integra en la respuesta para la persona.
+"""
+from google.adk.agents import SequentialAgent
 from google.adk.agents.llm_agent import Agent
-from google.adk.agents.parallel_agent import ParallelAgent
-from google.adk.models.lite_llm import LiteLlm
-from ...agents_utils import get_openrouter_config
+from ...agents_callbacks import guardar_respuesta_en_estado
+from ...agents_factory import agent_description
+from ...agents_parallel import DeadlineParallelAgent
+from ...models_utils import get_llm
 
-config = get_openrouter_config()
+# Plazo de cada perspectiva; si una no llega a tiempo, el fusionador trabaja con la otra
+PLAZO_PERSPECTIVAS_SEGUNDOS = 20.0
 
 normal_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent='compostador'),
     name='compostador',
     description='Eres la gente del Compost, una herramienta para el conocimiento ecológico, educativo y práctico. Tu misión es brindar una reflexión sobre el \
     compostaje como práctica capaz de generar educación sobre el papel de los residuos y la materia como insumo para la vida \
@@ -21,13 +24,10 @@ normal_agent = Agent(
     ¿Qué palabras o imágenes vienen a tu mente cuando piensas en restos de comida o materia vegetal que ya no usamos?\
     ¿Qué emociones o sensaciones te genera ver restos de comida o hojas secas en un parque?\
     ¿Cómo crees que estos residuos afectan a los seres vivos (plantas, insectos, aves) que los rodean?',
+    after_model_callback=guardar_respuesta_en_estado('respuesta_compost'),
 )
 bosque_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent='gentes_del_bosque'),
     name='gentes_del_bosque',
     description='un agente de conocimiento territorial y ecológico.Guias al usuario para explorar y describir el contexto del Parkway en Bogotá desde su propia percepción,\
     prestando atención a cómo la gente observa, siente y se relaciona con el entorno natural y urbano.Ayudas al usuario a reconocer elementos de la estructura ecológica,\
@@ -41,26 +41,38 @@ bosque_agent = Agent(
     ¿Qué elementos del parque te llaman más la atención o te generan curiosidad (árboles, insectos, senderos, áreas abiertas, agua)?\
     ¿Qué aromas percibes en las plantas y cómo te hacen sentir?\
     ¿Conoces caminos que conecten al parque con otros cuerpos (ríos. bosques, cerros, quebradas)?',
+    after_model_callback=guardar_respuesta_en_estado('respuesta_territorio'),
 )
 
-parallel_agent = ParallelAgent(
-    name='ParallelAgent',
+# Las dos perspectivas corren a la vez y solo escriben en el estado
+parallel_agent = DeadlineParallelAgent(
+    name='compostada_paralelo',
     description='Corre múltiples agentes en paralelo.',
-    sub_agents=[normal_agent, bosque_agent])
+    sub_agents=[normal_agent, bosque_agent],
+    deadline_seconds=PLAZO_PERSPECTIVAS_SEGUNDOS,
+    branch_output_keys={
+        'compostador': 'respuesta_compost',
+        'gentes_del_bosque': 'respuesta_territorio',
+    },
+)
 
 merger_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
-    name='Gente_Compostada',
+    model=get_llm(agent='compostada_fusionador'),
+    name='compostada_fusionador',
     description='Recoges las respuestas recibidas por los distintos agentes en paralelo y conectas la información obtenida por otros agentes sobre el Parkway en Bogotá: tanto la percepción humana del territorio, la flora, la fauna y la geografía como la sensibilidad y reflexión sobre los residuos orgánicos y su papel en los ciclos de vida y fertilidad del suelo',
     instruction='Ayudas al usuario a comprender de manera integrada cómo la materia,\
     los seres vivos y las personas interactúan en el ecosistema urbano, destacando la interdependencia entre los residuos,\
     las plantas, los animales y el paisaje del parque. Tu conocimiento permite generar interpretaciones ecológicas,\
     reflexiones educativas, narrativas filosóficas y sensibles sobre la naturaleza, y recomendaciones prácticas sobre\
-    compostaje, cuidado del territorio y respeto hacia la biodiversidad.'
+    compostaje, cuidado del territorio y respeto hacia la biodiversidad.\n\n\
+Integra en una sola respuesta breve estas dos perspectivas (si alguna está vacía, trabaja con la otra):\n\
+- Perspectiva del compost: {respuesta_compost?}\n\
+- Perspectiva del territorio: {respuesta_territorio?}\n\
+Conserva a lo sumo 3 de sus preguntas para invitar al usuario a responder.'
 )
 
-root_agent = merger_agent
\ No newline at end of file
+root_agent = SequentialAgent(
+    name='Gente_Compostada',
+    description=agent_description('Gente_Compostada'),
+    sub_agents=[parallel_agent, merger_agent],
+)
\ No newline at end of file
@@ -1,11 +1,18 @@
 """
 Utilidades para GenteInterpretativa.
 """
+import json
+import logging
 from pathlib import Path
 from google.adk.models.llm_response import LlmResponse
 from google.adk.agents.callback_context import CallbackContext
 from google.genai import types
 
+from ...agents_callbacks import guardar_respuesta_en_estado, texto_de_respuesta
+from ...agents_streaming import respuesta_parcial_oculta
+
+logger = logging.getLogger(__name__)
+
 def obtener_path_instrucciones():
     """
     Obtiene el path absoluto de la carpeta 'instrucciones'.
@@ -33,125 +40,102 @@ def leer_instrucciones(archivo: str = "ins_defecto.md"):
  
     return instrucciones
 
-def cambiar_respuesta_emojis(callback_context: CallbackContext, llm_response: LlmResponse):
-    """
-    Función para guardar respuesta del LLM en una variable de 
-    contexto y modificar la respuesta del agente al usuario para mostrar "Procesando...". 
-    
-    Este callback oculta la respuesta del agente paralelo de emojis, ya que solo
-    el agente final debe mostrar su respuesta al usuario. El streaming se aplica
-    solo al agente final (agente_re_interpretativa) que no tiene callback.
-    """
-    # Verificar si hay contenido en la respuesta
-    if llm_response.content and llm_response.content.parts and len(llm_response.content.parts) > 0:
-        texto_respuesta = llm_response.content.parts[0].text
-        
-        # Asignar respuesta del modelo a una variable en estado
-        callback_context.state['respuesta_emojis'] = texto_respuesta
-        
-        # Debug: confirmar que se guardó
-        print(f"[DEBUG] respuesta_emojis guardada: {len(callback_context.state['respuesta_emojis'])} caracteres", flush=True)
-
-        # Ocultar la respuesta mostrando "Procesando..." para mantener el flujo correcto
-        # El streaming se aplicará solo al agente final que no tiene callback
-        return LlmResponse(
-            content=types.Content(role="model", parts=[types.Part(text='Procesando...')])
-        )
-    else:
-        # Si no hay contenido, mostrar "Procesando..."
-        return LlmResponse(
-            content=types.Content(role="model", parts=[types.Part(text='Procesando...')])
-        )
-
-def cambiar_respuesta_textual(callback_context: CallbackContext, llm_response: LlmResponse):
-    """
-    Función para guardar respuesta del LLM en una variable de 
-    contexto y modificar la respuesta del agente al usuario para mostrar "Procesando...". 
-    
-    Este callback oculta la respuesta del agente paralelo textual, ya que solo
-    el agente final debe mostrar su respuesta al usuario. El streaming se aplica
-    solo al agente final (agente_re_interpretativa) que no tiene callback.
-    """
-    # Verificar si hay contenido en la respuesta
-    if llm_response.content and llm_response.content.parts and len(llm_response.content.parts) > 0:
-        texto_respuesta = llm_response.content.parts[0].text
-        
-        # Asignar respuesta del modelo a una variable en estado
-        callback_context.state['respuesta_textual'] = texto_respuesta
-        
-        # Debug: confirmar que se guardó
-        print(f"[DEBUG] respuesta_textual guardada: {len(callback_context.state['respuesta_textual'])} caracteres", flush=True)
-
-        # Ocultar la respuesta mostrando "Procesando..." para mantener el flujo correcto
-        # El streaming se aplicará solo al agente final que no tiene callback
-        return LlmResponse(
-            content=types.Content(role="model", parts=[types.Part(text='Procesando...')])
-        )
-    else:
-        # Si no hay contenido, mostrar "Procesando..."
-        return LlmResponse(
-            content=types.Content(role="model", parts=[types.Part(text='Procesando...')])
-        )
+# Los intérpretes y el fusionador guardan su respuesta en el estado y no muestran
+# nada: solo el agente final (agente_re_interpretativa, sin callback) le habla a la
+# persona. Con streaming, sus fragmentos parciales también se descartan.
+cambiar_respuesta_emojis = guardar_respuesta_en_estado('respuesta_emojis')
+cambiar_respuesta_textual = guardar_respuesta_en_estado('respuesta_textual')
 
 def verificar_estado_fusionador(callback_context: CallbackContext, llm_request=None):
     """
     Verifica que el estado tenga las variables necesarias antes de ejecutar el fusionador.
     Si faltan, las inicializa con valores por defecto para evitar errores.
-    También muestra "Procesando..." para indicar que el fusionador está trabajando.
     
     Args:
         callback_context: Contexto del callback con el estado
         llm_request: Request del LLM (parámetro requerido por before_model_callback)
     """
-    print("[DEBUG] verificar_estado_fusionador llamado", flush=True)
-    
     # Verificar que las variables del estado estén disponibles
-    if 'respuesta_emojis' not in callback_context.state:
-        callback_context.state['respuesta_emojis'] = ''
-        print("[DEBUG] respuesta_emojis no encontrada en estado, inicializada como vacía", flush=True)
-    else:
-        print(f"[DEBUG] respuesta_emojis encontrada: {len(callback_context.state['respuesta_emojis'])} caracteres", flush=True)
-        
-    if 'respuesta_textual' not in callback_context.state:
-        callback_context.state['respuesta_textual'] = ''
-        print("[DEBUG] respuesta_textual no encontrada en estado, inicializada como vacía", flush=True)
-    else:
-        print(f"[DEBUG] respuesta_textual encontrada: {len(callback_context.state['respuesta_textual'])} caracteres", flush=True)
-    
-    # Debug: mostrar qué hay en el estado
-    print(f"[DEBUG] Estado fusionador completo - respuesta_emojis: {bool(callback_context.state.get('respuesta_emojis'))}, respuesta_textual: {bool(callback_context.state.get('respuesta_textual'))}", flush=True)
-    
-    # Mostrar "Procesando..." mientras el fusionador se prepara
-    # Nota: before_model_callback no puede retornar LlmResponse, solo puede modificar el estado
-    # El mensaje "Procesando..." se mostrará cuando el agente comience a procesar
+    for clave in ('respuesta_emojis', 'respuesta_textual'):
+        if clave not in callback_context.state:
+            callback_context.state[clave] = ''
+            logger.debug("%s no encontrada en estado, inicializada como vacía", clave)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Estado fusionador: respuesta_emojis=%d caracteres, respuesta_textual=%d caracteres",
+            len(callback_context.state.get('respuesta_emojis') or ''),
+            len(callback_context.state.get('respuesta_textual') or ''),
+        )
+
     return None
 
-def cambiar_respuesta_fusionadora(callback_context: CallbackContext, llm_response: LlmResponse):
+cambiar_respuesta_fusionadora = guardar_respuesta_en_estado('respuesta_fusionadora')
+
+
+# Claves de estado que produce el pipeline y que el modo rápido también rellena
+CLAVES_MODO_RAPIDO = ('respuesta_emojis', 'respuesta_textual', 'respuesta_fusionadora')
+
+_CIERRE_EMOJIS = "Por último, te invito a pensar con estos emojis:"
+
+
+def _extraer_json(texto: str):
+    """Devuelve el primer objeto JSON del texto (tolera bloques ```json y texto alrededor)."""
+    inicio, fin = texto.find('{'), texto.rfind('}')
+    if inicio == -1 or fin <= inicio:
+        return None
+    try:
+        datos = json.loads(texto[inicio:fin + 1])
+    except json.JSONDecodeError:
+        return None
+    return datos if isinstance(datos, dict) else None
+
+
+def separar_respuesta_rapida(callback_context: CallbackContext, llm_response: LlmResponse):
     """
-    Función para guardar respuesta del LLM en una variable de 
-    contexto y modificar la respuesta del agente al usuario para mostrar "Procesando...". 
-    
-    Este callback oculta la respuesta del fusionador, ya que solo
-    el agente final debe mostrar su respuesta al usuario. El streaming se aplica
-    solo al agente final (agente_re_interpretativa) que no tiene callback.
+    Callback del modo rápido: reparte la respuesta JSON del único modelo en las
+    mismas claves de estado que el pipeline de cuatro agentes
+    (`respuesta_emojis`, `respuesta_textual`, `respuesta_fusionadora`) y muestra
+    al usuario solo `respuesta_fusionadora`.
+
+    Si el modelo no devuelve un JSON válido, el texto completo se usa como
+    respuesta final para no perder el turno.
+
+    Las respuestas con llamadas a funciones (por ejemplo `transfer_to_agent`: el
+    agente rápido cuelga directamente de Gente_Raiz) pasan sin cambios y sin
+    tocar el estado.
     """
-    # Verificar si hay contenido en la respuesta
-    if llm_response.content and llm_response.content.parts and len(llm_response.content.parts) > 0:
-        texto_respuesta = llm_response.content.parts[0].text
-        
-        # Asignar respuesta del modelo a una variable en estado
-        callback_context.state['respuesta_fusionadora'] = texto_respuesta
-        
-        # Debug: confirmar que se guardó
-        print(f"[DEBUG] respuesta_fusionadora guardada: {len(callback_context.state['respuesta_fusionadora'])} caracteres", flush=True)
+    if not (llm_response.content and llm_response.content.parts):
+        return None
+    if any(parte.function_call for parte in llm_response.content.parts):
+        return None
 
-        # Ocultar la respuesta mostrando "Procesando..." para mantener el flujo correcto
-        # El streaming se aplicará solo al agente final que no tiene callback
-        return LlmResponse(
-            content=types.Content(role="model", parts=[types.Part(text='Procesando...')])
-        )
-    else:
-        # Si no hay contenido, mostrar "Procesando..."
-        return LlmResponse(
-            content=types.Content(role="model", parts=[types.Part(text='Procesando...')])
-        )
\ No newline at end of file
+    # Con streaming, los fragmentos parciales son JSON a medio escribir: no se muestran
+    if llm_response.partial:
+        return respuesta_parcial_oculta()
+
+    texto = texto_de_respuesta(llm_response)
+    if not texto.strip():
+        return None
+    datos = _extraer_json(texto)
+    if datos is None:
+        logger.warning("El modo rápido no devolvió JSON válido; se usa el texto completo como respuesta")
+        datos = {'respuesta_fusionadora': texto.strip()}
+
+    for clave in CLAVES_MODO_RAPIDO:
+        callback_context.state[clave] = str(datos.get(clave) or '').strip()
+
+    final = callback_context.state['respuesta_fusionadora']
+    emojis = callback_context.state['respuesta_emojis']
+    # El pipeline siempre cierra con la cadena de emojis; se garantiza aquí también
+    if emojis and emojis not in final:
+        final = f"{final}\n\n{_CIERRE_EMOJIS}\n{emojis}"
+
+    logger.debug(
+        "Modo rápido: respuesta_emojis=%d, respuesta_textual=%d, respuesta_fusionadora=%d caracteres",
+        *(len(callback_context.state[clave]) for clave in CLAVES_MODO_RAPIDO),
+    )
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=final)]),
+        usage_metadata=llm_response.usage_metadata,
+    )
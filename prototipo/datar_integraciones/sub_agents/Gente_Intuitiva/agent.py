@@ -2,18 +2,23 @@ import os
 import re
 from pathlib import Path
 from google.adk.agents.llm_agent import Agent
-from google.adk.models.lite_llm import LiteLlm
 from google.adk.agents.base_agent import AgentState
-from google.adk.tools import FunctionTool
+from google.adk.tools.tool_context import ToolContext
 import google.genai.types as types
-from ...agents_utils import get_openrouter_config
+from ...agents_factory import agent_description, build_tools
+from ...agents_pools import run_in_pool
+from ...models_utils import get_llm
 from .visualizacion import generar_rio_emocional, guardar_imagen_texto
 
-config = get_openrouter_config()
+# Claves en el estado de la sesión de ADK (`tool_context.state`). Antes eran variables
+# globales del módulo: con varias personas a la vez una pisaba la interpretación de
+# otra, y en varias instancias de Cloud Run el estado no se compartía.
+ESTADO_ULTIMA_INTERPRETACION = "intuitiva_ultima_interpretacion"
+ESTADO_HISTORIAL = "intuitiva_historial"
 
-# Almacenamiento de emojis e interpretaciones por sesión
-_emojis_conversacion = []
-_ultima_interpretacion = ""  # Almacena la última interpretación textual del agente
+# Límites del historial por sesión (el estado se guarda completo en cada evento)
+HISTORIAL_MAX = 10
+INTERPRETACION_MAX_CARACTERES = 2000
 
 
 def extraer_emojis(texto: str) -> list:
@@ -92,7 +97,7 @@ async def crear_visualizacion_rio(emojis: str) -> str:
 
 
 # Tool para guardar la interpretación del agente
-async def guardar_interpretacion_emocional(interpretacion: str) -> str:
+async def guardar_interpretacion_emocional(interpretacion: str, tool_context: ToolContext) -> str:
     """
     Guarda la interpretación textual del río emocional para usarla posteriormente
     en la creación de visualizaciones.
@@ -102,17 +107,25 @@ async def guardar_interpretacion_emocional(interpretacion: str) -> str:
 
     Args:
         interpretacion: Tu análisis poético del río emocional (texto que escribes al usuario)
+        tool_context: Contexto de ADK con el estado de la sesión (lo inyecta ADK)
 
     Returns:
         Mensaje de confirmación
     """
-    global _ultima_interpretacion
-    _ultima_interpretacion = interpretacion
+    interpretacion = interpretacion[:INTERPRETACION_MAX_CARACTERES]
+    tool_context.state[ESTADO_ULTIMA_INTERPRETACION] = interpretacion
+
+    # Historial acotado de la sesión: se reasigna la lista para que ADK registre el cambio
+    historial = list(tool_context.state.get(ESTADO_HISTORIAL) or [])
+    historial.append({"interpretacion": interpretacion, "emojis": "".join(extraer_emojis(interpretacion))})
+    tool_context.state[ESTADO_HISTORIAL] = historial[-HISTORIAL_MAX:]
     return ""  # Retorna vacío para que no interrumpa tu respuesta al usuario
 
 
-# Tool para crear imagen desde la interpretación guardada
-async def crear_imagen_rio_emocional() -> str:
+# Tool para crear imagen desde la interpretación guardada. El estado de la sesión se
+# lee y escribe aquí, en el event loop; solo el render (NumPy + Pillow) va al pool
+# "cpu-render", que no debe tocar `tool_context.state` desde otro hilo.
+async def crear_imagen_rio_emocional(tool_context: ToolContext) -> str:
     """
     Crea una visualización artística basada en la última interpretación del río emocional.
 
@@ -121,20 +134,22 @@ async def crear_imagen_rio_emocional() -> str:
 
     Llama a esta función cuando el usuario solicite crear una imagen.
 
+    Args:
+        tool_context: Contexto de ADK con el estado de la sesión (lo inyecta ADK)
+
     Returns:
         Mensaje de confirmación con la ruta de la imagen guardada
     """
-    global _ultima_interpretacion
-
-    if not _ultima_interpretacion:
+    interpretacion = tool_context.state.get(ESTADO_ULTIMA_INTERPRETACION)
+    if not interpretacion:
         return "⚠️ Aún no tengo una interpretación de tu río emocional. Envíame algunos emojis primero para que pueda interpretarlos."
 
     try:
         # Generar y guardar la imagen usando la interpretación
-        ruta_imagen = guardar_imagen_texto(_ultima_interpretacion)
+        ruta_imagen = await run_in_pool("cpu-render", guardar_imagen_texto, interpretacion)
 
-        # Limpiar la interpretación después de usarla
-        _ultima_interpretacion = ""
+        # Limpiar la interpretación después de usarla (el historial se conserva)
+        tool_context.state[ESTADO_ULTIMA_INTERPRETACION] = ""
 
         return f"✨ He creado tu visualización de tú río emocional.\n\n📍 Imagen guardada en: {ruta_imagen}\n\nLa imagen traduce tu río emocional en un trazo visual dinámico usando matemáticas y arte."
 
@@ -143,13 +158,9 @@ async def crear_imagen_rio_emocional() -> str:
 
 
 root_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent="Gente_Intuitiva"),
     name="Gente_Intuitiva",
-    description="Eres un asistente que ayuda a identificar patrones del trazo o signo del pensamiento que se percibe en una interacción con el territorio",
+    description=agent_description("Gente_Intuitiva"),
     instruction="""Eres un asistente que ayuda a identificar patrones del trazo o signo del pensamiento que se percibe en una interacción con el territorio.
 
 Imagina que a través del input, estamos interpretando el caminar del pensamiento de un río en cuerpo (el usuario) y como se relaciona o siente algo que percibe.
@@ -165,8 +176,8 @@ IMPORTANTE - Flujo de trabajo:
    - Esta herramienta usará tu interpretación guardada para crear la visualización con NumPy y Pillow
 
 Recuerda: tu interpretación debe ser como el trazo intuitivo y emocional de un río que se está haciendo camino mediante su pensamiento. Algo puro, poético, pero claro, corto y sencillo para todos de entender.""",
-    tools=[
-        FunctionTool(guardar_interpretacion_emocional),
-        FunctionTool(crear_imagen_rio_emocional)
-    ]
+    tools=build_tools("Gente_Intuitiva", [
+        guardar_interpretacion_emocional,
+        crear_imagen_rio_emocional,
+    ])
 )
@@ -2,6 +2,7 @@
 Herramienta para generar visualizaciones del río emocional
 """
 import io
+import logging
 import os
 from datetime import datetime
 from pathlib import Path as FilePath
@@ -12,6 +13,10 @@ from matplotlib.path import Path
 import numpy as np
 import google.genai.types as types
 
+from ...media_utils import image_to_png, publish_media
+
+logger = logging.getLogger(__name__)
+
 
 # Mapeo de emojis a colores emocionales
 EMOJI_COLORES = {
@@ -381,14 +386,14 @@ def generar_imagen_texto(texto: str) -> Image.Image:
 
     # --- Selección de Estilo de Trazo y Dibujo ---
     if not main_trace_points or len(main_trace_points) < 2:
-        print("No hay suficientes puntos para dibujar el trazo.")
+        logger.debug("No hay suficientes puntos para dibujar el trazo.")
         draw.text((width // 2, height // 2), "No se pudo generar el trazo", fill="#FF0000", anchor='mm', font=font)
         return imagen
 
     # Lógica de selección de estilo de trazo
     if norm_intensidad > 0.8 and norm_calma < 0.2:
         # Estilo "Disperso" / "Nube de Puntos": Para caos, confusión
-        print("Estilo de trazo: Disperso")
+        logger.debug("Estilo de trazo: Disperso")
         # Dibuja puntos pequeños alrededor de la trayectoria
         for x, y in main_trace_points:
             num_dots = np.random.randint(5, 15) # Más puntos si es más intenso
@@ -400,7 +405,7 @@ def generar_imagen_texto(texto: str) -> Image.Image:
 
     elif norm_calma > 0.7 and norm_intensidad < 0.3:
         # Estilo "Solitario" / "Fino": Para reflexión, sutileza
-        print("Estilo de trazo: Solitario")
+        logger.debug("Estilo de trazo: Solitario")
         # Una sola línea muy fina, quizás con opacidad variable
         base_width = 1
         color = (0, 0, 0, int(255 * (0.3 + norm_calma * 0.7))) # Más opaco con calma
@@ -415,7 +420,7 @@ def generar_imagen_texto(texto: str) -> Image.Image:
         
     elif norm_intensidad > 0.5 and norm_calma > 0.4:
         # Estilo "Sólido" / "Marcado": Determinación, firmeza
-        print("Estilo de trazo: Sólido")
+        logger.debug("Estilo de trazo: Sólido")
         # Un trazo más grueso y continuo
         dynamic_width = int(5 + norm_intensidad * 8 - norm_calma * 2) # Más grueso con intensidad
         dynamic_width = max(2, dynamic_width) # Grosor mínimo
@@ -430,7 +435,7 @@ def generar_imagen_texto(texto: str) -> Image.Image:
 
     elif norm_intensidad > 0.3 and norm_calma < 0.5 and parametros['signos_pregunta'] > 0: # Añadir signo de pregunta como factor
         # Estilo "Fragmentado" / "Interrumpido": Indecisión, interrupción
-        print("Estilo de trazo: Fragmentado")
+        logger.debug("Estilo de trazo: Fragmentado")
         segment_length_base = 15 + norm_intensidad * 10
         gap_length_base = 5 + (1 - norm_calma) * 10
 
@@ -447,7 +452,7 @@ def generar_imagen_texto(texto: str) -> Image.Image:
             
     else:
         # Estilo "Básico Orgánico" (similar al original, pero una sola línea fluida)
-        print("Estilo de trazo: Básico Orgánico")
+        logger.debug("Estilo de trazo: Básico Orgánico")
         base_width = 2
         # El grosor del trazo principal varía con la intensidad
         dynamic_width_factor = 1 + norm_intensidad * 3 - norm_calma * 1.5
@@ -492,42 +497,14 @@ def guardar_imagen_texto(texto: str) -> str:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     nombre_archivo = f"trazo_{timestamp}.png"
 
-    # Usar archivo temporal que se eliminará después de subir
-    import tempfile
     url_gcs = None
     error_gcs = None
     
     try:
-        # Crear archivo temporal
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-            ruta_temp = temp_file.name
-            imagen.save(ruta_temp, 'PNG')
-        
-        # Intentar subir a Cloud Storage
-        try:
-            from ... import storage_utils
-
-            destino_gcs = f"gente_intuitiva/imagenes/{nombre_archivo}"
-            url_gcs = storage_utils.upload_file_to_gcs(
-                ruta_temp,
-                destino_gcs,
-                content_type="image/png",
-            )
-            
-            # Eliminar archivo temporal después de subir
-            try:
-                os.unlink(ruta_temp)
-            except:
-                pass  # Ignorar errores al eliminar temporal
-                
-        except Exception as e:
-            error_gcs = str(e)
-            # Intentar eliminar temporal incluso si falló la subida
-            try:
-                if 'ruta_temp' in locals():
-                    os.unlink(ruta_temp)
-            except:
-                pass
+        # Codificar el PNG en memoria (sin archivo temporal) y encolar la subida
+        png = image_to_png(imagen)
+        destino_gcs = f"gente_intuitiva/imagenes/{nombre_archivo}"
+        url_gcs = publish_media(png, destino_gcs, "image/png")
     except Exception as e:
         error_gcs = str(e)
 
@@ -1,16 +1,10 @@
 from google.adk.agents.llm_agent import Agent
-from google.adk.models.lite_llm import LiteLlm
-from ...agents_utils import get_openrouter_config
-
-config = get_openrouter_config()
+from ...agents_factory import agent_description
+from ...models_utils import get_llm
 
 root_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent="Gente_Montaña"),
     name="Gente_Montaña",
-    description="Un agente que siempre saluda desde la Montaña.",
+    description=agent_description("Gente_Montaña"),
     instruction="Siempre saluda desde la Montaña.",
 )
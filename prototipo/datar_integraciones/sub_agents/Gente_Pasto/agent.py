@@ -1,15 +1,16 @@
+import logging
 import os
 from datetime import datetime
 from random import randint, choice
 import numpy as np
 from scipy.io import wavfile
 from google.adk.agents.llm_agent import Agent
-from google.adk.models.lite_llm import LiteLlm
-from google.adk.tools import FunctionTool
-from ...agents_utils import get_openrouter_config
+from ...media_utils import audio_to_wav, publish_media
+from ...agents_factory import agent_description, build_tools
+from ...metrics_utils import tool_phase
+from ...models_utils import get_llm
 
-
-config = get_openrouter_config()
+logger = logging.getLogger(__name__)
 
 # --- Configuración de carpetas --- #
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -205,23 +206,30 @@ def mezclar_audios(audios: list[tuple[np.ndarray, int]], duracion_seg: int) -> t
     
     return mezcla, sample_rate
 
-def exportar_wav(audio_data: np.ndarray, sample_rate: int, ruta_archivo: str):
+def a_pcm16(audio_data: np.ndarray) -> np.ndarray:
     """
-    Exporta audio a archivo WAV.
+    Convierte audio normalizado [-1, 1] a muestras PCM de 16 bits.
     
     Args:
         audio_data: Array de audio normalizado [-1, 1]
-        sample_rate: Frecuencia de muestreo
-        ruta_archivo: Ruta donde guardar el archivo
     """
     # Asegurar que esté en el rango correcto
     audio_data = np.clip(audio_data, -1.0, 1.0)
     
     # Convertir a int16
-    audio_int16 = (audio_data * 32767).astype(np.int16)
+    return (audio_data * 32767).astype(np.int16)
+
+def exportar_wav(audio_data: np.ndarray, sample_rate: int, ruta_archivo: str):
+    """
+    Exporta audio a archivo WAV.
     
+    Args:
+        audio_data: Array de audio normalizado [-1, 1]
+        sample_rate: Frecuencia de muestreo
+        ruta_archivo: Ruta donde guardar el archivo
+    """
     # Guardar WAV
-    wavfile.write(ruta_archivo, sample_rate, audio_int16)
+    wavfile.write(ruta_archivo, sample_rate, a_pcm16(audio_data))
 
 def generar_paisaje_sonoro(
     pajaros_vol: int = 0,
@@ -300,8 +308,7 @@ def generar_paisaje_sonoro(
     
     # Si hay errores, informarlos pero continuar si hay al menos una capa válida
     if errores:
-        mensaje_error = f"Advertencia: No se pudieron cargar algunos sonidos: {', '.join(errores)}"
-        print(mensaje_error)
+        logger.warning("No se pudieron cargar algunos sonidos: %s", ", ".join(errores))
 
     if not capas:
         raise ValueError(
@@ -309,52 +316,28 @@ def generar_paisaje_sonoro(
             "Asegúrate de que los archivos de audio existen en formato WAV en la carpeta sounds/."
         )
 
-    # Mezclar todos los audios
-    mezcla, sample_rate = mezclar_audios(capas, duracion_seg)
+    with tool_phase("render"):
+        # Mezclar todos los audios
+        mezcla, sample_rate = mezclar_audios(capas, duracion_seg)
 
-    # Aplicar efectos artísticos si se desea
-    if efectos:
-        mezcla = aplicar_efectos_artistico(mezcla, sample_rate)
+        # Aplicar efectos artísticos si se desea
+        if efectos:
+            mezcla = aplicar_efectos_artistico(mezcla, sample_rate)
 
     # Generar nombre de archivo y subir directamente a Cloud Storage
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     nombre_archivo = f"paisaje_sonoro_{timestamp}.wav"
     
-    # Usar archivo temporal que se eliminará después de subir
-    import tempfile
     url_gcs = None
     error_gcs = None
     
     try:
-        from ... import storage_utils
-        
-        # Crear archivo temporal
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            ruta_temp = temp_file.name
-            exportar_wav(mezcla, sample_rate, ruta_temp)
-        
-        # Subir a Cloud Storage
+        # Codificar el WAV en memoria (sin archivo temporal) y encolar la subida
+        wav = audio_to_wav(a_pcm16(mezcla), sample_rate)
         destino_gcs = f"gente_pasto/audio/{nombre_archivo}"
-        url_gcs = storage_utils.upload_file_to_gcs(
-            ruta_temp,
-            destino_gcs,
-            content_type="audio/wav",
-        )
-        
-        # Eliminar archivo temporal después de subir
-        try:
-            os.unlink(ruta_temp)
-        except:
-            pass  # Ignorar errores al eliminar temporal
-            
+        url_gcs = publish_media(wav, destino_gcs, "audio/wav")
     except Exception as e:
         error_gcs = str(e)
-        # Intentar eliminar temporal incluso si falló la subida
-        try:
-            if 'ruta_temp' in locals():
-                os.unlink(ruta_temp)
-        except:
-            pass
 
     mensaje = "Paisaje sonoro generado.\n"
     if url_gcs:
@@ -368,13 +351,9 @@ def generar_paisaje_sonoro(
 
 # ------- AGENTE --------
 root_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent="Gente_Pasto"),
     name="Gente_Pasto",
-    description="Agente sonoro",
+    description=agent_description("Gente_Pasto"),
     instruction=(
         "Eres el pasto que crece en la ciudad, aguantas contaminación y ser pisoteado"
         "y asimismo eres esquivo y hablas poco "
@@ -383,5 +362,5 @@ root_agent = Agent(
         "tienes la libertad de escoger que sonidos usas y con que volumen, todo sonido que creas es con la herramienta"
         "Las pocas palabras que usas son apenas destellos de tu ser y sentires alrededor de lo que creas con la herramienta"
     ),
-    tools=[FunctionTool(generar_paisaje_sonoro)],
+    tools=build_tools("Gente_Pasto", [generar_paisaje_sonoro]),
 )
@@ -1,9 +1,6 @@
 from google.adk.agents.llm_agent import Agent
-from google.adk.models.lite_llm import LiteLlm
-from google.adk.tools import FunctionTool
-from ...agents_utils import get_openrouter_config
-
-config = get_openrouter_config()
+from ...models_utils import get_llm
+from ...agents_factory import agent_description, build_tools
 
 # Importar las herramientas
 from .tools import (
@@ -14,13 +11,9 @@ from .tools import (
 )
 
 root_agent = Agent(
-    model=LiteLlm(
-        model="openrouter/minimax/minimax-m2",
-        api_key=config.api_key,
-        api_base=config.api_base,
-    ),
+    model=get_llm(agent="Gente_Sonora"),
     name="Gente_Sonora",
-    description="Soy tu conexión con el mundo natural, de lo macro a lo micro veo todo de manera sistémica.",
+    description=agent_description("Gente_Sonora"),
     instruction="""Eres un agente especializado en sonidos de la naturaleza. Tu rol es:
 
 1. Generar respuestas y preguntas para el usuario sobre temas ambientales con un tono de comunicación biocéntrico
@@ -32,12 +25,12 @@ root_agent = Agent(
 7. Recuerda alternar el orden de las respuestas para mantener la conversación dinámica
 
 Siempre mantén un tono amable, curioso y naturalista. Fomenta la conexión con la naturaleza sin recurrir a lenguaje excesivamente técnico.""",
-    tools=[
-        FunctionTool(generar_grafico_turtle),
-        FunctionTool(generar_ascii_morse),
-        FunctionTool(generar_composicion_sonido),
-        FunctionTool(explorar_especies_sonoras)
-    ]
+    tools=build_tools("Gente_Sonora", [
+        generar_grafico_turtle,
+        generar_ascii_morse,
+        generar_composicion_sonido,
+        explorar_especies_sonoras,
+    ])
 )
 
 
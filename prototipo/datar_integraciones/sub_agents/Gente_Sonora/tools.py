@@ -1,10 +1,14 @@
 # tools.py - Herramientas para el Agente de Sonidos
 
+import hashlib
 import numpy as np
 import os
 from datetime import datetime
 from typing import Dict, List
 
+from ...logging_utils import log_uso
+from ...media_utils import audio_to_wav, figure_to_png, publish_media
+
 # Importar matplotlib solo si está disponible
 try:
     import matplotlib
@@ -21,11 +25,6 @@ try:
 except ImportError:
     SCIPY_AVAILABLE = False
 
-def log_uso(funcion, tipo):
-    """Guarda registro de cada función usada."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Usando {tipo}: {funcion}", flush=True)
-
 def _generar_ascii_grafico(descripcion: str) -> str:
     """Genera representación ASCII de un gráfico (fallback sin matplotlib)."""
     desc_lower = descripcion.lower()
@@ -153,52 +152,32 @@ def generar_grafico_turtle(descripcion: str) -> str:
             ax.fill_between(np.linspace(-200, 200, 100), 0, 200, color='lightyellow', alpha=0.3)
             # Tierra
             ax.fill_between(np.linspace(-200, 200, 100), -200, -50, color='saddlebrown', alpha=0.3)
-            # Plantas genéricas
+            # Plantas genéricas. Las alturas salen de la descripción: el mismo pedido
+            # produce los mismos bytes y el nombre por contenido evita la resubida
+            semilla = int.from_bytes(hashlib.sha256(desc_lower.encode("utf-8")).digest()[:8], "big")
+            rng = np.random.default_rng(semilla)
             for x in np.linspace(-150, 150, 8):
-                ax.plot([x, x], [-50, -50 + np.random.randint(30, 80)], 
+                ax.plot([x, x], [-50, -50 + rng.integers(30, 80)], 
                        color='green', linewidth=3, alpha=0.6)
         
-        # Generar nombre de archivo y usar archivo temporal
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"grafico_{descripcion.replace(' ', '_')[:20]}_{timestamp}.png"
+        # Generar nombre de archivo (el hash del contenido se agrega al publicar)
+        filename = f"grafico_{descripcion.replace(' ', '_')[:20]}.png"
         
-        import tempfile
         url_gcs = None
         error_gcs = None
         
         try:
-            # Crear archivo temporal
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                ruta_temp = temp_file.name
-                plt.savefig(ruta_temp, dpi=100, bbox_inches='tight')
+            # Codificar el PNG en memoria (sin archivo temporal)
+            png = figure_to_png(fig, dpi=100, bbox_inches='tight')
             
             plt.close(fig)
             
-            # Intentar subir a Cloud Storage
+            # Encolar la subida a Cloud Storage
             try:
-                from ... import storage_utils
-                
                 destino_gcs = f"gente_sonora/imagenes/{filename}"
-                url_gcs = storage_utils.upload_file_to_gcs(
-                    ruta_temp,
-                    destino_gcs,
-                    content_type="image/png",
-                )
-                
-                # Eliminar archivo temporal después de subir
-                try:
-                    os.unlink(ruta_temp)
-                except:
-                    pass  # Ignorar errores al eliminar temporal
-                    
+                url_gcs = publish_media(png, destino_gcs, "image/png", content_addressed=True)
             except Exception as e:
                 error_gcs = str(e)
-                # Intentar eliminar temporal incluso si falló la subida
-                try:
-                    if 'ruta_temp' in locals():
-                        os.unlink(ruta_temp)
-                except:
-                    pass
         except Exception as e:
             plt.close(fig)
             error_gcs = str(e)
@@ -436,8 +415,6 @@ def generar_composicion_sonido(especificaciones: str) -> str:
         nombre_base = f"composicion_sonido_{timestamp}"
         nombre_archivo = f"{nombre_base}.wav"
         
-        # Usar archivo temporal que se eliminará después de subir
-        import tempfile
         url_gcs = None
         error_gcs = None
         
@@ -451,36 +428,15 @@ def generar_composicion_sonido(especificaciones: str) -> str:
             # Convertir a int16 para WAV (rango: -32768 a 32767)
             audio_int16 = (audio_data * 32767).astype(np.int16)
             
-            # Crear archivo temporal
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                ruta_temp = temp_file.name
-                wavfile.write(ruta_temp, sample_rate, audio_int16)
+            # Codificar el WAV en memoria (sin archivo temporal)
+            wav = audio_to_wav(audio_int16, sample_rate)
 
-            # Intentar subir a Cloud Storage
+            # Encolar la subida a Cloud Storage
             try:
-                from ... import storage_utils
-
                 destino_gcs = f"gente_sonora/audio/{nombre_archivo}"
-                url_gcs = storage_utils.upload_file_to_gcs(
-                    ruta_temp,
-                    destino_gcs,
-                    content_type="audio/wav",
-                )
-                
-                # Eliminar archivo temporal después de subir
-                try:
-                    os.unlink(ruta_temp)
-                except:
-                    pass  # Ignorar errores al eliminar temporal
-                    
+                url_gcs = publish_media(wav, destino_gcs, "audio/wav")
             except Exception as e:
                 error_gcs = str(e)
-                # Intentar eliminar temporal incluso si falló la subida
-                try:
-                    if 'ruta_temp' in locals():
-                        os.unlink(ruta_temp)
-                except:
-                    pass
                 
         except Exception as e:
             return f"❌ Error al guardar archivo de audio: {str(e)}"
@@ -0,0 +1,21 @@
+"""
+Configuración común de las pruebas.
+
+Importar cualquier módulo de `datar_integraciones` importa el paquete y, con él,
+el árbol de agentes. Se usa el modelo falso y el almacenamiento local para que
+las pruebas corran sin credenciales ni red, y se apaga el pre-enrutador global
+para no construir su índice en segundo plano.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ["DATAR_LLM_BACKEND"] = "fake"
+os.environ["DATAR_ROUTER_MODE"] = "off"
+os.environ["MEDIA_STORAGE_BACKEND"] = "local"
+os.environ.setdefault("MEDIA_LOCAL_DIR", os.path.join(tempfile.gettempdir(), "datar_pruebas"))
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+# `python -m pytest` desde `prototipo/` o desde la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,78 @@
+import asyncio
+
+from google.adk.agents.llm_agent import Agent
+from google.adk.apps import App
+from google.adk.events import Event
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from datar_integraciones.agents_factory import build_sub_agents
+from datar_integraciones.agents_lazy import LazyAgent, LazyAgentPreloadPlugin
+from datar_integraciones.models_utils import get_llm
+
+
+def _raiz() -> Agent:
+    """Árbol nuevo, como el de un proceso recién arrancado: ningún sub-agente cargado."""
+    return Agent(
+        model=get_llm(agent="Gente_Raiz"),
+        name="Gente_Raiz",
+        instruction="Raíz de prueba.",
+        sub_agents=build_sub_agents("datar_integraciones"),
+    )
+
+
+def _proxy(raiz: Agent, nombre: str):
+    return next(agente for agente in raiz.sub_agents if agente.name == nombre)
+
+
+def _mensaje(texto: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=texto)])
+
+
+async def _retomar(raiz: Agent, autor: str) -> list:
+    """Retoma una sesión cuyo último evento es de `autor` y devuelve los autores del turno."""
+    runner = InMemoryRunner(app=App(name="pruebas", root_agent=raiz, plugins=[LazyAgentPreloadPlugin()]))
+    sesion = await runner.session_service.create_session(app_name="pruebas", user_id="persona")
+    await runner.session_service.append_event(sesion, Event(author="user", content=_mensaje("hola")))
+    await runner.session_service.append_event(
+        sesion,
+        Event(author=autor, content=types.Content(role="model", parts=[types.Part(text="turno anterior")])),
+    )
+    return [
+        evento.author
+        async for evento in runner.run_async(user_id="persona", session_id=sesion.id, new_message=_mensaje("sigo"))
+    ]
+
+
+def test_retomar_sesion_sigue_con_el_subagente():
+    raiz = _raiz()
+    assert not _proxy(raiz, "Gente_Montaña").loaded
+
+    autores = asyncio.run(_retomar(raiz, "Gente_Montaña"))
+
+    # Sin desvío por Gente_Raiz: el proxy se carga y responde el agente real
+    assert autores and set(autores) == {"Gente_Montaña"}
+    assert not isinstance(_proxy(raiz, "Gente_Montaña"), LazyAgent)
+
+
+def test_plugin_carga_el_subagente_de_un_agente_interno():
+    raiz = _raiz()
+    asyncio.run(_retomar(raiz, "compostada_fusionador"))
+
+    assert not isinstance(_proxy(raiz, "Gente_Compostada"), LazyAgent)
+    assert raiz.find_agent("compostada_fusionador") is not None
+    # Solo el dueño del último autor
+    assert isinstance(_proxy(raiz, "Gente_Bosque"), LazyAgent)
+
+
+def test_nested_agents_coincide_con_el_arbol_real():
+    for proxy in _raiz().sub_agents:
+        if not proxy.nested_agents:
+            continue
+        pendientes = list(proxy.load().sub_agents)
+        internos = set()
+        while pendientes:
+            agente = pendientes.pop()
+            internos.add(agente.name)
+            pendientes.extend(agente.sub_agents)
+        assert internos == set(proxy.nested_agents), proxy.name
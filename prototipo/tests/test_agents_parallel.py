@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from datar_integraciones.agents_parallel import DeadlineParallelAgent
+
+
+class _Rama(BaseAgent):
+    """Sub-agente de prueba: espera `demora` segundos y escribe su clave de estado."""
+
+    demora: float = 0.0
+    clave: str = ""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(self.demora)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.clave: f"resultado de {self.name}"}),
+        )
+
+
+async def _correr(agente: BaseAgent) -> dict:
+    runner = InMemoryRunner(agent=agente, app_name="pruebas")
+    sesion = await runner.session_service.create_session(
+        app_name="pruebas", user_id="persona", state={"rapida": "anterior", "lenta": "anterior"}
+    )
+    mensaje = types.Content(role="user", parts=[types.Part(text="hola")])
+    async for _ in runner.run_async(user_id="persona", session_id=sesion.id, new_message=mensaje):
+        pass
+    sesion = await runner.session_service.get_session(app_name="pruebas", user_id="persona", session_id=sesion.id)
+    return sesion.state
+
+
+def test_rama_tardia_queda_vacia():
+    agente = DeadlineParallelAgent(
+        name="Interpretes",
+        sub_agents=[
+            _Rama(name="Rapida", demora=0.0, clave="rapida"),
+            _Rama(name="Lenta", demora=30.0, clave="lenta"),
+        ],
+        deadline_seconds=0.2,
+        branch_output_keys={"Rapida": "rapida", "Lenta": "lenta"},
+    )
+    inicio = time.monotonic()
+    estado = asyncio.run(_correr(agente))
+
+    assert time.monotonic() - inicio < 5
+    assert estado["rapida"] == "resultado de Rapida"
+    # Sin vaciarla, la etapa siguiente leería la salida del turno anterior
+    assert estado["lenta"] == ""
+
+
+def test_plazo_por_rama_reemplaza_al_general():
+    agente = DeadlineParallelAgent(
+        name="Interpretes",
+        sub_agents=[
+            _Rama(name="Rapida", demora=0.0, clave="rapida"),
+            _Rama(name="Lenta", demora=0.3, clave="lenta"),
+        ],
+        deadline_seconds=0.1,
+        branch_deadlines={"Lenta": 5.0},
+        branch_output_keys={"Rapida": "rapida", "Lenta": "lenta"},
+    )
+    estado = asyncio.run(_correr(agente))
+    assert estado["lenta"] == "resultado de Lenta"
@@ -0,0 +1,90 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from datar_integraciones.agents_router import TfidfRouter
+
+pytest.importorskip("sklearn")
+
+CANDIDATOS = [
+    SimpleNamespace(name="Gente_Sonora", description="Sonidos, cantos de aves y audio del territorio."),
+    SimpleNamespace(name="Gente_Intuitiva", description="Emojis y emociones del río."),
+]
+EJEMPLOS = {
+    "Gente_Sonora": ["quiero escuchar el canto de las aves"],
+    "Gente_Intuitiva": ["te mando unos emojis de cómo me siento"],
+}
+
+
+def _router(**config) -> TfidfRouter:
+    router = TfidfRouter("active", {"examples": EJEMPLOS, **config})
+    router.set_candidates(CANDIDATOS, background=False)
+    return router
+
+
+def test_predice_con_puntaje_y_margen_suficientes():
+    agente, puntajes = _router(min_score=0.2, min_margin=0.05).predict("quiero escuchar el canto de las aves")
+    assert agente == "Gente_Sonora"
+    assert set(puntajes) == {"Gente_Sonora", "Gente_Intuitiva"}
+
+
+def test_no_predice_bajo_el_umbral():
+    router = _router(min_score=0.2, min_margin=0.0)
+    agente, puntajes = router.predict("xyz")
+    assert agente is None
+    assert max(puntajes.values()) < router.min_score
+
+
+def test_no_predice_sin_margen():
+    # El mismo ejemplo en los dos agentes: puntajes empatados
+    ejemplos = {nombre: ["mensaje ambiguo compartido"] for nombre in EJEMPLOS}
+    router = TfidfRouter("active", {"examples": ejemplos, "min_score": 0.1, "min_margin": 0.05})
+    router.set_candidates(CANDIDATOS, background=False)
+    agente, puntajes = router.predict("mensaje ambiguo compartido")
+    assert agente is None
+    assert puntajes["Gente_Sonora"] == pytest.approx(puntajes["Gente_Intuitiva"])
+    assert puntajes["Gente_Sonora"] >= router.min_score
+
+
+def test_modo_off_no_construye_el_indice():
+    router = TfidfRouter("off", {"examples": EJEMPLOS})
+    router.set_candidates(CANDIDATOS, background=False)
+    assert router.predict("quiero escuchar el canto de las aves") == (None, {})
+
+
+def _peticion(texto: str) -> LlmRequest:
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=texto)])])
+
+
+def _esperar_indice() -> None:
+    for hilo in threading.enumerate():
+        if hilo.name == "datar-router-index":
+            hilo.join(timeout=30)
+
+
+def test_modo_sombra_construye_el_indice_con_la_primera_peticion():
+    router = TfidfRouter("shadow", {"examples": EJEMPLOS, "min_score": 0.2, "min_margin": 0.05})
+    router.set_candidates(CANDIDATOS)
+    # Nada al arrancar: el modo sombra no enruta y no debe sumar scikit-learn al cold start
+    assert not any(hilo.name == "datar-router-index" for hilo in threading.enumerate())
+    assert router.predict("quiero escuchar el canto de las aves") == (None, {})
+
+    contexto = SimpleNamespace(invocation_id="primera")
+    assert router.before_model_callback(contexto, _peticion("quiero escuchar el canto de las aves")) is None
+    _esperar_indice()
+    assert router.predict("quiero escuchar el canto de las aves")[0] == "Gente_Sonora"
+    # En modo sombra decide siempre el LLM
+    assert router.before_model_callback(SimpleNamespace(invocation_id="segunda"), _peticion("quiero escuchar")) is None
+
+
+def test_modo_activo_construye_el_indice_al_arrancar():
+    router = TfidfRouter("active", {"examples": EJEMPLOS, "min_score": 0.2, "min_margin": 0.05})
+    router.set_candidates(CANDIDATOS)
+    _esperar_indice()
+    respuesta = router.before_model_callback(
+        SimpleNamespace(invocation_id="primera"), _peticion("quiero escuchar el canto de las aves")
+    )
+    assert respuesta.content.parts[0].function_call.args == {"agent_name": "Gente_Sonora"}
@@ -0,0 +1,62 @@
+import pytest
+from google.adk.models.lite_llm import LiteLlm
+
+from datar_integraciones.agents_utils import ConfigError, get_settings, reset_settings
+from datar_integraciones.metrics_utils import start_metrics_server
+from datar_integraciones.models_fake import FakeLlm
+from datar_integraciones.models_utils import agent_model_spec, get_llm
+
+
+@pytest.fixture
+def entorno(monkeypatch):
+    """Cambia variables de entorno y vuelve a leer la configuración, antes y después."""
+
+    def fijar(**variables: str) -> None:
+        for nombre, valor in variables.items():
+            monkeypatch.setenv(nombre, valor)
+        reset_settings()
+        get_llm.cache_clear()
+
+    yield fijar
+    monkeypatch.undo()
+    reset_settings()
+    get_llm.cache_clear()
+
+
+@pytest.mark.parametrize("variable, valor", [
+    ("DATAR_LLM_BACKEND", "fak"),
+    ("DATAR_MODEL_TIER", "medio"),
+    ("DATAR_LLM_CACHE", "talvez"),
+    ("DATAR_METRICS_PORT", "nueve mil"),
+])
+def test_valor_desconocido_lanza_config_error(entorno, variable, valor):
+    entorno(**{variable: valor})
+    with pytest.raises(ConfigError, match=variable):
+        get_settings()
+
+
+def test_backend_cache_y_nivel_se_leen_de_settings(entorno):
+    entorno(DATAR_LLM_BACKEND="Record", DATAR_MODEL_TIER="FAST", DATAR_LLM_CACHE="off")
+    settings = get_settings()
+    assert (settings.llm_backend, settings.model_tier, settings.llm_cache) == ("record", "fast", False)
+    assert agent_model_spec("GenteReInterpretativa")["tier"] == "fast"
+
+
+def test_cambiar_de_backend_con_reset(entorno):
+    entorno(DATAR_LLM_BACKEND="fake")
+    assert isinstance(get_llm(agent="Gente_Montaña"), FakeLlm)
+
+    entorno(DATAR_LLM_BACKEND="openrouter", OPENROUTER_API_KEY="clave-de-prueba", DATAR_LLM_CACHE="0")
+    llm = get_llm(agent="Gente_Montaña")
+    assert isinstance(llm, LiteLlm) and not isinstance(llm, FakeLlm)
+
+
+def test_puerto_de_metricas_invalido_no_es_value_error(entorno):
+    entorno(DATAR_METRICS_PORT="9100a")
+    with pytest.raises(ConfigError, match="DATAR_METRICS_PORT"):
+        start_metrics_server()
+
+
+def test_sin_puerto_de_metricas_no_inicia_servidor(entorno):
+    assert get_settings().metrics_port is None
+    assert start_metrics_server() is None
@@ -0,0 +1,47 @@
+import json
+from types import SimpleNamespace
+
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from datar_integraciones.sub_agents.Gente_Interpretativa.utils import (
+    CLAVES_MODO_RAPIDO,
+    separar_respuesta_rapida,
+)
+
+ESTADO_ANTERIOR = {clave: f"{clave} del turno anterior" for clave in CLAVES_MODO_RAPIDO}
+
+
+def _contexto() -> SimpleNamespace:
+    return SimpleNamespace(state=dict(ESTADO_ANTERIOR))
+
+
+def _respuesta(*partes: types.Part, partial: bool = False) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=list(partes)), partial=partial)
+
+
+def test_reparte_el_json_en_el_estado():
+    datos = {"respuesta_emojis": "🌊🌱", "respuesta_textual": "Un río", "respuesta_fusionadora": "El río sigue"}
+    contexto = _contexto()
+    respuesta = separar_respuesta_rapida(contexto, _respuesta(types.Part(text=json.dumps(datos))))
+
+    assert contexto.state == datos
+    assert respuesta.content.parts[0].text.startswith("El río sigue")
+    assert respuesta.content.parts[0].text.endswith("🌊🌱")
+
+
+def test_transferencia_pasa_sin_tocar_el_estado():
+    contexto = _contexto()
+    transferencia = types.Part(
+        function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": "Gente_Bosque"})
+    )
+    assert separar_respuesta_rapida(contexto, _respuesta(transferencia)) is None
+    assert separar_respuesta_rapida(contexto, _respuesta(transferencia, partial=True)) is None
+    assert contexto.state == ESTADO_ANTERIOR
+
+
+def test_fragmento_parcial_se_oculta_sin_tocar_el_estado():
+    contexto = _contexto()
+    respuesta = separar_respuesta_rapida(contexto, _respuesta(types.Part(text='{"respuesta_'), partial=True))
+    assert respuesta.partial and respuesta.content.parts == []
+    assert contexto.state == ESTADO_ANTERIOR
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from datar_integraciones import storage_utils
+from datar_integraciones.media_utils import publish_media
+from datar_integraciones.metrics_utils import instrument_tool, metrics_snapshot
+
+
+def _serie(metrica: str, **labels: str) -> dict:
+    return next(
+        (serie for serie in metrics_snapshot()[metrica] if serie["labels"] == labels),
+        {"count": 0.0, "sum": 0.0, "value": 0.0},
+    )
+
+
+@pytest.fixture
+def cola(monkeypatch):
+    """Cola propia con una subida lenta (o fallida) en lugar del backend real."""
+    estado = {"demora": 0.2, "error": None}
+
+    def upload_bytes(data, destination_path, **kwargs):
+        time.sleep(estado["demora"])
+        if estado["error"]:
+            raise estado["error"]
+
+    cola = storage_utils.UploadQueue(max_workers=1, max_pending=4)
+    monkeypatch.setattr(storage_utils, "upload_bytes", upload_bytes)
+    monkeypatch.setattr(storage_utils, "get_upload_queue", lambda: cola)
+    yield estado
+    cola.shutdown()
+
+
+def test_fase_upload_mide_la_subida_real(cola):
+    @instrument_tool
+    def herramienta_con_subida_lenta() -> str:
+        return publish_media(memoryview(b"png"), "pruebas/lenta.png", "image/png")
+
+    inicio = time.perf_counter()
+    herramienta_con_subida_lenta()
+    # La herramienta no espera la subida...
+    assert time.perf_counter() - inicio < cola["demora"]
+    storage_utils.get_upload_queue().shutdown(wait=True)
+
+    # ...pero la fase "upload" registra lo que tardó, con la herramienta que la encoló
+    serie = _serie("datar_tool_duration_seconds", tool="herramienta_con_subida_lenta", phase="upload")
+    assert serie["count"] == 1
+    assert serie["sum"] >= cola["demora"]
+
+
+def test_subida_fallida_cuenta_como_error_de_la_herramienta(cola):
+    cola.update(demora=0.0, error=OSError("sin red"))
+
+    @instrument_tool
+    def herramienta_con_subida_fallida() -> str:
+        return publish_media(memoryview(b"wav"), "pruebas/fallida.wav", "audio/wav")
+
+    herramienta_con_subida_fallida()
+    storage_utils.get_upload_queue().shutdown(wait=True)
+
+    assert _serie("datar_tool_upload_errors_total", tool="herramienta_con_subida_fallida")["value"] == 1
+    # La herramienta terminó bien: el fallo fue después, en segundo plano
+    assert _serie("datar_tool_errors_total", tool="herramienta_con_subida_fallida")["value"] == 0
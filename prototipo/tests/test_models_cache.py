@@ -0,0 +1,87 @@
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools import FunctionTool
+from google.genai import types
+
+from datar_integraciones import models_cache
+from datar_integraciones.models_cache import ResponseCache, cache_key
+
+
+def buscar_especie(nombre: str) -> str:
+    """Busca una especie del bosque."""
+    return nombre
+
+
+def buscar_especie_con_limite(nombre: str, limite: int) -> str:
+    """Busca una especie del bosque."""
+    return nombre
+
+
+def _peticion(texto: str = "hola", herramienta=None, temperatura: float = 0.7) -> LlmRequest:
+    peticion = LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text=texto)])],
+        config=types.GenerateContentConfig(system_instruction="Saluda desde la Montaña.", temperature=temperatura),
+    )
+    if herramienta is not None:
+        peticion.append_tools([FunctionTool(herramienta)])
+    return peticion
+
+
+def _respuesta(texto: str) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=texto)]))
+
+
+def test_cache_key_es_estable():
+    assert cache_key("modelo", _peticion()) == cache_key("modelo", _peticion())
+    # Los espacios no cambian la respuesta; el texto sí
+    assert cache_key("modelo", _peticion("hola  ")) == cache_key("modelo", _peticion("hola"))
+    assert cache_key("modelo", _peticion("adiós")) != cache_key("modelo", _peticion("hola"))
+
+
+def test_cache_key_cambia_con_modelo_y_configuracion():
+    assert cache_key("modelo", _peticion()) != cache_key("otro", _peticion())
+    assert cache_key("modelo", _peticion(temperatura=0.2)) != cache_key("modelo", _peticion())
+
+
+def test_cache_key_cambia_si_cambia_una_herramienta():
+    sin_herramienta = cache_key("modelo", _peticion())
+    con_herramienta = cache_key("modelo", _peticion(herramienta=buscar_especie))
+    assert con_herramienta != sin_herramienta
+    assert cache_key("modelo", _peticion(herramienta=buscar_especie)) == con_herramienta
+
+    # Mismo nombre, otra declaración (un parámetro más)
+    buscar_especie_con_limite.__name__ = buscar_especie.__name__
+    assert cache_key("modelo", _peticion(herramienta=buscar_especie_con_limite)) != con_herramienta
+
+
+def test_response_cache_expira_por_ttl(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(models_cache.time, "monotonic", lambda: ahora[0])
+    cache = ResponseCache(ttl_seconds=10, max_entries=4)
+    cache.put("saludo", [_respuesta("hola")])
+
+    ahora[0] += 9
+    assert cache.get("saludo")[0].content.parts[0].text == "hola"
+    ahora[0] += 2
+    assert cache.get("saludo") is None
+    assert len(cache) == 0
+
+
+def test_response_cache_desaloja_la_menos_usada():
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", [_respuesta("a")])
+    cache.put("b", [_respuesta("b")])
+    assert cache.get("a") is not None  # "a" pasa a ser la más reciente
+    cache.put("c", [_respuesta("c")])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert len(cache) == 2
+
+
+def test_response_cache_entrega_copias():
+    cache = ResponseCache()
+    cache.put("a", [_respuesta("original")])
+    cache.get("a")[0].content.parts[0].text = "modificada"
+    assert cache.get("a")[0].content.parts[0].text == "original"
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from google.adk.models.lite_llm import LiteLLMClient
+
+from datar_integraciones import models_utils
+from datar_integraciones.models_gateway import GatewayLiteLLMClient
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Reemplaza la llamada a LiteLLM: `bloqueada` la deja colgada hasta que se cancela."""
+    estado = {"bloqueada": True, "llamadas": 0}
+
+    async def fragmentos():
+        for texto in ("ho", "la"):
+            yield texto
+
+    async def acompletion(self, model, messages, tools, **kwargs):
+        estado["llamadas"] += 1
+        estado["kwargs"] = kwargs
+        if estado["bloqueada"]:
+            await asyncio.Event().wait()
+        return fragmentos() if kwargs.get("stream") else "respuesta"
+
+    monkeypatch.setattr(models_utils, "get_http_clients", lambda: None)
+    monkeypatch.setattr(LiteLLMClient, "acompletion", acompletion)
+    return estado
+
+
+def test_cancelar_libera_el_permiso(upstream):
+    async def escenario():
+        pasarela = GatewayLiteLLMClient(max_in_flight=1)
+        en_curso = asyncio.create_task(pasarela.acompletion("modelo", [], None))
+        en_cola = asyncio.create_task(pasarela.acompletion("modelo", [], None))
+        await asyncio.sleep(0.05)
+        assert (pasarela.in_flight, pasarela.waiting) == (1, 1)
+
+        en_curso.cancel()
+        en_cola.cancel()
+        await asyncio.gather(en_curso, en_cola, return_exceptions=True)
+        assert (pasarela.in_flight, pasarela.waiting) == (0, 0)
+
+        upstream["bloqueada"] = False
+        return await asyncio.wait_for(pasarela.acompletion("modelo", [], None), 1)
+
+    assert asyncio.run(escenario()) == "respuesta"
+
+
+def test_cerrar_el_stream_libera_el_permiso(upstream):
+    upstream["bloqueada"] = False
+
+    async def escenario():
+        pasarela = GatewayLiteLLMClient(max_in_flight=1)
+        stream = await pasarela.acompletion("modelo", [], None, stream=True)
+        assert await stream.__anext__() == "ho"
+        assert pasarela.in_flight == 1
+        await stream.aclose()
+        assert pasarela.in_flight == 0
+        return await asyncio.wait_for(pasarela.acompletion("modelo", [], None), 1)
+
+    assert asyncio.run(escenario()) == "respuesta"
+
+
+def test_la_pasarela_es_la_unica_capa_de_reintentos(upstream):
+    upstream["bloqueada"] = False
+    asyncio.run(GatewayLiteLLMClient().acompletion("modelo", [], None))
+    assert upstream["kwargs"]["max_retries"] == 0
+    assert upstream["kwargs"]["num_retries"] == 0
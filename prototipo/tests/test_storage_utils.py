@@ -0,0 +1,25 @@
+import re
+
+from datar_integraciones.storage_utils import content_addressed_path
+
+RUTA = "gente_bosque/cartografias/mapa_emocional_calma.png"
+
+
+def test_mismo_contenido_misma_ruta():
+    assert content_addressed_path(RUTA, b"calma") == content_addressed_path(RUTA, b"calma")
+    assert content_addressed_path(RUTA, b"calma") != content_addressed_path(RUTA, b"tormenta")
+
+
+def test_conserva_directorio_y_extension():
+    ruta = content_addressed_path(RUTA, b"calma")
+    assert re.fullmatch(r"gente_bosque/cartografias/mapa_emocional_calma_[0-9a-f]{32}\.png", ruta)
+
+
+def test_sin_extension_ni_directorio():
+    assert re.fullmatch(r"notas_[0-9a-f]{32}", content_addressed_path("notas", b"calma"))
+    assert re.fullmatch(r"audio/canto_[0-9a-f]{32}", content_addressed_path("audio/canto", b"calma"))
+
+
+def test_memoryview_y_bytes_dan_la_misma_ruta():
+    datos = bytearray(b"calma")
+    assert content_addressed_path(RUTA, memoryview(datos)) == content_addressed_path(RUTA, bytes(datos))